@@ -4,9 +4,27 @@
 
 import frappe
 from frappe import _
-from frappe.utils import now, getdate, add_days
+from frappe.utils import now, getdate, add_days, get_datetime, flt, cint, time_diff_in_hours
 import json
 
+from sheria_app.case_overview import get_overview
+from sheria_app.case_timeline import get_timeline_page
+from sheria_app.client_services.doctype.client_financial_event.client_financial_event import get_events_page
+from sheria_app.client_services.doctype.client_identity_key.client_identity_key import find_client_by_identity
+from sheria_app.client_services.doctype.trust_account_balance.trust_account_balance import (
+	get_trust_balance,
+	lock_trust_balance,
+)
+from sheria_app.client_services.doctype.web_intake_submission.web_intake_submission import queue_intake
+from sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card import (
+	get_case_rates,
+	get_employee_rates,
+	resolve_billing_rate,
+)
+from sheria_app.legal_practice.doctype.time_entry.time_entry import get_time_entry_link_maps
+from sheria_app.legal_practice.doctype.wip_ledger_entry.wip_ledger_entry import get_wip_page, get_wip_totals
+from sheria_app.rate_limit import check_rate_limit
+
 @frappe.whitelist()
 def get_case_statistics():
 	"""Get case statistics for dashboard"""
@@ -85,6 +103,7 @@ def get_recent_activities(limit=10):
 		formatted_activities = []
 		for activity in activities:
 			formatted_activities.append({
+				"name": activity.name,
 				"activity": activity.activity_type,
 				"description": activity.description,
 				"case_title": activity.case_title,
@@ -171,9 +190,13 @@ def request_service(service):
 		frappe.log_error(f"Error requesting service: {str(e)}")
 		return {"error": "Failed to request service"}
 
-@frappe.whitelist()
+@frappe.whitelist(allow_guest=True)
 def submit_service_booking(**kwargs):
-	"""Submit service booking from web form"""
+	"""Submit service booking from web form
+
+	The booking is queued and processed in the background; poll
+	get_intake_status with the returned intake_id for the outcome.
+	"""
 	try:
 		# Validate required fields
 		required_fields = ["service_name", "client_name", "client_email", "client_phone"]
@@ -181,39 +204,63 @@ def submit_service_booking(**kwargs):
 			if not kwargs.get(field):
 				return {"error": f"{field.replace('_', ' ').title()} is required"}
 
-		# Find or create client
-		client = find_or_create_client(kwargs)
+		# Only well-formed submissions count towards the limit
+		check_rate_limit("service_booking", kwargs)
 
-		# Find service
-		service = frappe.db.get_value("Legal Service", {"service_name": kwargs.get("service_name")})
-		if not service:
-			return {"error": "Service not found"}
+		kwargs.pop("cmd", None)
+		intake_id = queue_intake("Service Booking", kwargs, email=kwargs.get("client_email"))
 
-		# Create service request
-		service_request = frappe.get_doc({
-			"doctype": "Service Request",
-			"service": service,
-			"client": client,
-			"description": kwargs.get("description", ""),
-			"preferred_date": kwargs.get("preferred_date"),
-			"status": "Submitted",
-			"request_date": getdate(),
-			"source": "Web Form"
-		})
-		service_request.insert()
-		service_request.submit()
-
-		# Send confirmation email
-		send_booking_confirmation(service_request, kwargs)
-
-		return {"success": True, "request_id": service_request.name}
+		return {"success": True, "intake_id": intake_id, "status": "Queued"}
+	except frappe.RateLimitExceededError as e:
+		frappe.clear_messages()
+		return {"error": str(e)}
 	except Exception as e:
 		frappe.log_error(f"Error submitting service booking: {str(e)}")
 		return {"error": "Failed to submit booking"}
 
-@frappe.whitelist()
+def process_service_booking(data, context):
+	"""Intake handler: create the service request for a queued booking"""
+	# Find service
+	services = context.setdefault("services", {})
+	if data.get("service_name") not in services:
+		services[data.get("service_name")] = frappe.db.get_value("Legal Service", {"service_name": data.get("service_name")})
+
+	service = services[data.get("service_name")]
+	if not service:
+		frappe.throw(_("Service not found"))
+
+	# Find or create client, once per email in the batch
+	clients = context.setdefault("clients", {})
+	client = clients.get(data.get("client_email")) or find_or_create_client(data)
+
+	# Create service request
+	service_request = frappe.get_doc({
+		"doctype": "Service Request",
+		"service": service,
+		"client": client,
+		"description": data.get("description", ""),
+		"preferred_date": data.get("preferred_date"),
+		"status": "Submitted",
+		"request_date": getdate(),
+		"source": "Web Form"
+	})
+	# Limits were applied when the booking was accepted
+	service_request.flags.rate_limit_checked = True
+	service_request.insert(ignore_permissions=True)
+	service_request.submit()
+
+	# Only cache the client once the booking is through; a failed booking rolls
+	# back to its savepoint and would take a newly created client with it
+	clients[data.get("client_email")] = client
+
+	# Send confirmation email
+	send_booking_confirmation(service_request, data)
+
+	return "Service Request", service_request.name
+
+@frappe.whitelist(allow_guest=True)
 def submit_contact(**kwargs):
-	"""Submit contact form"""
+	"""Submit contact form; the contact is created in the background"""
 	try:
 		# Validate required fields
 		required_fields = ["name", "email", "message"]
@@ -221,31 +268,43 @@ def submit_contact(**kwargs):
 			if not kwargs.get(field):
 				return {"error": f"{field.title()} is required"}
 
-		# Create contact record
-		contact = frappe.get_doc({
-			"doctype": "Contact",
-			"first_name": kwargs.get("name").split()[0],
-			"last_name": " ".join(kwargs.get("name").split()[1:]) if len(kwargs.get("name").split()) > 1 else "",
-			"email_id": kwargs.get("email"),
-			"phone": kwargs.get("phone", ""),
-			"address": kwargs.get("address", ""),
-			"contact_type": "Customer"
-		})
-		contact.insert()
+		check_rate_limit("contact", kwargs)
 
-		# Send contact email
-		send_contact_email(kwargs)
+		kwargs.pop("cmd", None)
+		intake_id = queue_intake("Contact", kwargs, email=kwargs.get("email"))
 
-		return {"success": True, "contact_id": contact.name}
+		return {"success": True, "intake_id": intake_id, "status": "Queued"}
+	except frappe.RateLimitExceededError as e:
+		frappe.clear_messages()
+		return {"error": str(e)}
 	except Exception as e:
 		frappe.log_error(f"Error submitting contact: {str(e)}")
 		return {"error": "Failed to submit contact"}
 
+def process_contact(data, context):
+	"""Intake handler: create the contact for a queued contact form"""
+	name_parts = data.get("name").split()
+
+	contact = frappe.get_doc({
+		"doctype": "Contact",
+		"first_name": name_parts[0],
+		"last_name": " ".join(name_parts[1:]),
+		"email_id": data.get("email"),
+		"phone": data.get("phone", ""),
+		"address": data.get("address", ""),
+		"contact_type": "Customer"
+	})
+	contact.insert(ignore_permissions=True)
+
+	context.setdefault("contacts", []).append(data)
+
+	return "Contact", contact.name
+
 def find_or_create_client(data):
 	"""Find existing client or create new one"""
 	try:
-		# Try to find existing client by email
-		existing_client = frappe.db.get_value("Client", {"email": data.get("client_email")})
+		# Try to find existing client by normalized email
+		existing_client = find_client_by_identity({"Email": data.get("client_email")})
 		if existing_client:
 			return existing_client
 
@@ -259,7 +318,7 @@ def find_or_create_client(data):
 			"client_type": "Individual",
 			"status": "Active"
 		})
-		client.insert()
+		client.insert(ignore_permissions=True)
 
 		return client.name
 	except Exception as e:
@@ -283,21 +342,26 @@ def send_booking_confirmation(service_request, data):
 	except Exception as e:
 		frappe.log_error(f"Error sending booking confirmation: {str(e)}")
 
-def send_contact_email(data):
-	"""Send contact form email"""
+def send_contact_emails(context):
+	"""Send the admin one email for all contact forms processed in an intake batch"""
+	contacts = context.get("contacts") or []
+	if not contacts:
+		return
+
 	try:
-		subject = _("New Contact Form Submission")
-		message = frappe.render_template("sheria/templates/emails/contact_form.html", {
-			"data": data
-		})
+		messages = [
+			frappe.render_template("sheria/templates/emails/contact_form.html", {"data": data})
+			for data in contacts
+		]
 
 		# Send to admin
 		admin_email = frappe.db.get_single_value("Sheria Settings", "admin_email") or "admin@sheria_app.co.ke"
 
 		frappe.sendmail(
 			recipients=[admin_email],
-			subject=subject,
-			message=message
+			subject=_("New Contact Form Submission") if len(contacts) == 1
+				else _("{0} New Contact Form Submissions").format(len(contacts)),
+			message="<hr>".join(messages)
 		)
 	except Exception as e:
 		frappe.log_error(f"Error sending contact email: {str(e)}")
@@ -338,26 +402,45 @@ def get_legal_fees(case=None, service=None):
 		return {"error": "Failed to get fees"}
 
 @frappe.whitelist()
-def get_case_timeline(case):
-	"""Get case timeline"""
+def get_case_timeline(case, event_types=None, after_date=None, after_type=None, after_name=None, page_length=50):
+	"""Page through a case's activities, hearings, documents, time entries and tasks, newest first"""
+	if not frappe.has_permission("Legal Case", "read", case):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
 	try:
-		timeline = frappe.db.sql("""
-			SELECT
-				ct.activity_date,
-				ct.activity_type,
-				ct.description,
-				ct.created_by,
-				ct.creation
-			FROM `tabCase Timeline` ct
-			WHERE ct.case = %s
-				AND ct.docstatus = 1
-			ORDER BY ct.activity_date DESC, ct.creation DESC
-		""", (case,), as_dict=True)
+		if isinstance(event_types, str):
+			event_types = json.loads(event_types)
+
+		page_length = min(cint(page_length) or 50, 500)
+		after = (after_date, after_type, after_name) if after_date and after_type and after_name else None
+		events, next_cursor = get_timeline_page(case, after=after, event_types=event_types, page_length=page_length)
 
-		return timeline
+		return {"events": events, "next_cursor": next_cursor}
 	except Exception as e:
 		frappe.log_error(f"Error getting case timeline: {str(e)}")
-		return []
+		return {"error": "Failed to get case timeline"}
+
+@frappe.whitelist()
+def get_case_overview(case, sections=None, etags=None, limit=5):
+	"""Counts, totals and next items of a case's hearings, tasks, time, fees, documents and trust balance
+
+	`sections` picks sections to compute (fees and documents are deferred by
+	default); `etags` maps sections to ETags the caller holds, which come back
+	as not modified.
+	"""
+	if not frappe.has_permission("Legal Case", "read", case):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	try:
+		if isinstance(sections, str):
+			sections = json.loads(sections)
+		if isinstance(etags, str):
+			etags = json.loads(etags)
+
+		return get_overview(case, sections=sections, etags=etags, limit=limit)
+	except Exception as e:
+		frappe.log_error(f"Error getting case overview: {str(e)}")
+		return {"error": "Failed to get case overview"}
 
 @frappe.whitelist()
 def get_case_documents(case):
@@ -463,6 +546,111 @@ def create_time_entry(**kwargs):
 		frappe.log_error(f"Error creating time entry: {str(e)}")
 		return {"error": "Failed to create time entry"}
 
+@frappe.whitelist()
+def create_time_entries(entries):
+	"""Create time entries in bulk from a timesheet or a client timer log
+
+	Each entry is either a timesheet row (date, hours or start/end time) or a
+	timer log row (started_at, stopped_at). All rows are validated against
+	prefetched employee, case and rate maps and inserted in a single transaction;
+	failing rows are rolled back individually and reported by index.
+	"""
+	try:
+		if isinstance(entries, str):
+			entries = json.loads(entries)
+
+		if not isinstance(entries, list) or not entries:
+			return {"error": "No time entries provided"}
+
+		employees = [entry.get("employee") for entry in entries]
+		cases = [entry.get("case") for entry in entries]
+		employee_map, case_map = get_time_entry_link_maps(employees, cases)
+		employee_rates = get_employee_rates(employees)
+		case_rates = get_case_rates(cases)
+
+		created = []
+		errors = []
+
+		for idx, entry in enumerate(entries):
+			try:
+				values = normalize_time_entry(entry)
+
+				employee = employee_map.get(values.get("employee"))
+				if not employee:
+					raise frappe.ValidationError(_("Employee {0} not found").format(values.get("employee")))
+
+				case = None
+				if values.get("case"):
+					case = case_map.get(values["case"])
+					if not case:
+						raise frappe.ValidationError(_("Legal Case {0} not found").format(values["case"]))
+
+				time_entry = frappe.get_doc(dict(values,
+					doctype="Time Entry",
+					employee_name=employee.employee_name,
+					case_title=case.case_details_title if case else None,
+					billing_rate=values.get("billing_rate") or resolve_billing_rate(
+						employee.name, values.get("case"), values["date"],
+						employee_rates=employee_rates, case_rates=case_rates
+					),
+					status="Draft"
+				))
+				time_entry.flags.links_prefetched = True
+
+				frappe.db.savepoint("bulk_time_entry")
+				try:
+					time_entry.insert()
+				except Exception:
+					frappe.db.rollback(save_point="bulk_time_entry")
+					raise
+
+				created.append({"row": idx, "time_entry_id": time_entry.name, "hours": time_entry.hours})
+			except Exception as e:
+				errors.append({"row": idx, "error": str(e)})
+
+		return {"success": not errors, "created": created, "errors": errors}
+	except Exception as e:
+		frappe.log_error(f"Error creating time entries: {str(e)}")
+		return {"error": "Failed to create time entries"}
+
+def normalize_time_entry(entry):
+	"""Convert a timesheet or timer log row into Time Entry field values"""
+	values = {
+		"employee": entry.get("employee"),
+		"case": entry.get("case"),
+		"task": entry.get("task"),
+		"activity_type": entry.get("activity_type"),
+		"description": entry.get("description"),
+		"date": entry.get("date"),
+		"start_time": entry.get("start_time"),
+		"end_time": entry.get("end_time"),
+		"hours": entry.get("hours"),
+		"billing_rate": entry.get("billing_rate"),
+		"is_billable": entry.get("is_billable", entry.get("billable", 1))
+	}
+
+	# Timer log rows carry full timestamps instead of date + times
+	if entry.get("started_at") and entry.get("stopped_at"):
+		started_at = get_datetime(entry.get("started_at"))
+		stopped_at = get_datetime(entry.get("stopped_at"))
+		if stopped_at <= started_at:
+			raise frappe.ValidationError(_("Timer stopped before it started"))
+
+		values["date"] = getdate(started_at)
+		values["hours"] = flt(time_diff_in_hours(stopped_at, started_at), 2)
+		if getdate(started_at) == getdate(stopped_at):
+			values["start_time"] = started_at.strftime("%H:%M:%S")
+			values["end_time"] = stopped_at.strftime("%H:%M:%S")
+
+	for field in ["employee", "date", "description"]:
+		if not values.get(field):
+			raise frappe.ValidationError(_("{0} is required").format(field.replace("_", " ").title()))
+
+	if not values.get("hours") and not (values.get("start_time") and values.get("end_time")):
+		raise frappe.ValidationError(_("Hours or Start and End Time are required"))
+
+	return values
+
 @frappe.whitelist()
 def submit_time_entry(time_entry_id):
 	"""Submit time entry for approval"""
@@ -1020,48 +1208,42 @@ def generate_invoice_from_time_entries(time_entries, client=None, case=None):
 def get_billable_time_entries(client=None, case=None, date_from=None, date_to=None):
 	"""Get approved billable time entries for invoicing"""
 	try:
-		filters = {
-			"status": "Approved",
-			"is_billable": 1,
-			"billed": 0,
-			"docstatus": 1
-		}
+		conditions = []
+		values = {}
 
 		if client:
-			filters["client"] = client
+			conditions.append("wip.client = %(client)s")
+			values["client"] = client
 		if case:
-			filters["case"] = case
+			conditions.append("wip.case = %(case)s")
+			values["case"] = case
+		if date_from:
+			conditions.append("wip.date >= %(date_from)s")
+			values["date_from"] = date_from
+		if date_to:
+			conditions.append("wip.date <= %(date_to)s")
+			values["date_to"] = date_to
 
-		# Date range filter
-		date_condition = ""
-		if date_from and date_to:
-			date_condition = f" AND date BETWEEN '{date_from}' AND '{date_to}'"
-		elif date_from:
-			date_condition = f" AND date >= '{date_from}'"
-		elif date_to:
-			date_condition = f" AND date <= '{date_to}'"
+		where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
 		entries = frappe.db.sql(f"""
 			SELECT
-				te.name,
-				te.employee,
-				te.employee_name,
-				te.case,
-				lc.case_title,
-				te.date,
-				te.hours,
-				te.billing_rate,
-				te.billing_amount,
+				wip.time_entry as name,
+				wip.employee,
+				wip.employee_name,
+				wip.client,
+				wip.case,
+				wip.case_title,
+				wip.date,
+				wip.hours,
+				wip.billing_rate,
+				wip.amount as billing_amount,
 				te.description
-			FROM `tabTime Entry` te
-			LEFT JOIN `tabLegal Case` lc ON lc.name = te.case
-			WHERE te.status = 'Approved'
-				AND te.is_billable = 1
-				AND te.billed = 0
-				AND te.docstatus = 1
-			{date_condition}
-			ORDER BY te.date DESC
-		""", as_dict=True)
+			FROM `tabWIP Ledger Entry` wip
+			JOIN `tabTime Entry` te ON te.name = wip.time_entry
+			{where}
+			ORDER BY wip.date DESC
+		""", values, as_dict=True)
 
 		# Group by client/case for easier invoicing
 		grouped_entries = {}
@@ -1070,7 +1252,7 @@ def get_billable_time_entries(client=None, case=None, date_from=None, date_to=No
 			if key not in grouped_entries:
 				grouped_entries[key] = {
 					"case_title": entry.case_title or "General Services",
-					"client": client,
+					"client": entry.client or client,
 					"entries": [],
 					"total_hours": 0,
 					"total_amount": 0
@@ -1078,7 +1260,7 @@ def get_billable_time_entries(client=None, case=None, date_from=None, date_to=No
 
 			grouped_entries[key]["entries"].append(entry)
 			grouped_entries[key]["total_hours"] += entry.hours or 0
-			grouped_entries[key]["total_amount"] += entry.total_amount or 0
+			grouped_entries[key]["total_amount"] += entry.billing_amount or 0
 
 		return grouped_entries
 
@@ -1086,6 +1268,38 @@ def get_billable_time_entries(client=None, case=None, date_from=None, date_to=No
 		frappe.log_error(f"Error getting billable time entries: {str(e)}")
 		return {"error": "Failed to get billable time entries"}
 
+@frappe.whitelist()
+def get_wip_summary(client=None, case=None, group_by="case"):
+	"""Get unbilled hours, value and aging buckets per client or case"""
+	if not frappe.has_permission("WIP Ledger Entry", "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	try:
+		return get_wip_totals(client=client, case=case, group_by=group_by)
+	except Exception as e:
+		frappe.log_error(f"Error getting WIP summary: {str(e)}")
+		return {"error": "Failed to get WIP summary"}
+
+@frappe.whitelist()
+def get_client_wip(client, after_date=None, after_name=None, page_length=50):
+	"""Page through a client's unbilled time, newest first"""
+	if not frappe.has_permission("WIP Ledger Entry", "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	try:
+		page_length = min(cint(page_length) or 50, 500)
+		after = (after_date, after_name) if after_date and after_name else None
+		rows = get_wip_page(client, after=after, page_length=page_length)
+
+		next_cursor = None
+		if len(rows) == page_length:
+			next_cursor = {"after_date": rows[-1].date, "after_name": rows[-1].name}
+
+		return {"entries": rows, "next_cursor": next_cursor}
+	except Exception as e:
+		frappe.log_error(f"Error getting client WIP: {str(e)}")
+		return {"error": "Failed to get client WIP"}
+
 @frappe.whitelist()
 def create_trust_account_transaction(client, amount, transaction_type, description, reference=None):
 	"""Create trust account transaction for client funds"""
@@ -1105,13 +1319,13 @@ def create_trust_account_transaction(client, amount, transaction_type, descripti
 			"reference": reference
 		})
 		transaction.insert()
+		# Submission posts the balance change under the client's balance row lock
 		transaction.submit()
 
-		# Update client trust balance
-		update_client_trust_balance(client)
-
 		return {"success": True, "transaction_id": transaction.name}
 
+	except frappe.ValidationError as e:
+		return {"error": str(e)}
 	except Exception as e:
 		frappe.log_error(f"Error creating trust transaction: {str(e)}")
 		return {"error": "Failed to create trust transaction"}
@@ -1120,20 +1334,7 @@ def create_trust_account_transaction(client, amount, transaction_type, descripti
 def get_client_trust_balance(client):
 	"""Get client's trust account balance"""
 	try:
-		balance = frappe.db.sql("""
-			SELECT
-				SUM(CASE
-					WHEN transaction_type = 'Deposit' THEN amount
-					WHEN transaction_type = 'Withdrawal' THEN -amount
-					WHEN transaction_type = 'Payment' THEN -amount
-					ELSE 0
-				END) as balance
-			FROM `tabTrust Account Transaction`
-			WHERE client = %s
-				AND docstatus = 1
-		""", (client,), as_dict=True)
-
-		return {"balance": balance[0].balance or 0}
+		return {"balance": get_trust_balance(client)}
 
 	except Exception as e:
 		frappe.log_error(f"Error getting trust balance: {str(e)}")
@@ -1143,61 +1344,47 @@ def get_client_trust_balance(client):
 def get_client_billing_history(client, limit=50):
 	"""Get client's billing and payment history"""
 	try:
-		# Get sales invoices
-		invoices = frappe.db.sql("""
-			SELECT
-				'Invoice' as type,
-				name,
-				posting_date as date,
-				grand_total as amount,
-				outstanding_amount,
-				status
-			FROM `tabSales Invoice`
-			WHERE customer = %s
-				AND docstatus = 1
-			ORDER BY posting_date DESC
-			LIMIT %s
-		""", (client, limit), as_dict=True)
+		return get_events_page(client, page_length=cint(limit) or 50)
 
-		# Get trust account transactions
-		transactions = frappe.db.sql("""
-			SELECT
-				CONCAT('Trust ', transaction_type) as type,
-				name,
-				transaction_date as date,
-				CASE
-					WHEN transaction_type = 'Deposit' THEN amount
-					WHEN transaction_type = 'Withdrawal' THEN -amount
-					WHEN transaction_type = 'Payment' THEN -amount
-					ELSE 0
-				END as amount,
-				0 as outstanding_amount,
-				'Completed' as status
-			FROM `tabTrust Account Transaction`
-			WHERE client = %s
-				AND docstatus = 1
-			ORDER BY transaction_date DESC
-			LIMIT %s
-		""", (client, limit), as_dict=True)
+	except Exception as e:
+		frappe.log_error(f"Error getting billing history: {str(e)}")
+		return {"error": "Failed to get billing history"}
 
-		# Combine and sort
-		history = invoices + transactions
-		history.sort(key=lambda x: x.date, reverse=True)
+@frappe.whitelist()
+def get_client_financial_events(client, after_date=None, after_type=None, after_name=None,
+	event_types=None, page_length=50):
+	"""Page through a client's invoices, payments and trust movements, newest first"""
+	if not frappe.has_permission("Client Financial Event", "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
 
-		return history[:limit]
+	try:
+		if isinstance(event_types, str):
+			event_types = json.loads(event_types)
+
+		page_length = min(cint(page_length) or 50, 500)
+		after = (after_date, after_type, after_name) if after_date and after_type and after_name else None
+		events = get_events_page(client, after=after, event_types=event_types, page_length=page_length)
+
+		next_cursor = None
+		if len(events) == page_length:
+			last = events[-1]
+			next_cursor = {"after_date": last.date, "after_type": last.type, "after_name": last.name}
+
+		return {"events": events, "next_cursor": next_cursor}
 
 	except Exception as e:
-		frappe.log_error(f"Error getting billing history: {str(e)}")
-		return {"error": "Failed to get billing history"}
+		frappe.log_error(f"Error getting client financial events: {str(e)}")
+		return {"error": "Failed to get financial events"}
 
 @frappe.whitelist()
 def apply_client_payment(client, amount, payment_type, reference=None, description=None):
 	"""Apply payment from client (trust account or direct payment)"""
 	try:
 		if payment_type == "trust_account":
-			# Deduct from trust account
-			balance = get_client_trust_balance(client)["balance"]
-			if balance < amount:
+			# Lock the client's balance row so concurrent payments are checked
+			# and posted one at a time within this transaction
+			balance = lock_trust_balance(client)
+			if balance < flt(amount):
 				return {"error": "Insufficient trust account balance"}
 
 			# Create trust withdrawal
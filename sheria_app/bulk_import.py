@@ -0,0 +1,548 @@
+# Bulk Import for Sheria Doctypes
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Bulk loader for legacy matters, hearings, time entries and trust transactions.
+
+Rows are mapped to fields, coerced, checked against links prefetched once per
+chunk and written in chunked transactions. In deferred mode each chunk is a
+single multi-row INSERT and the side effects the controllers would run per
+document (WIP ledger, trust balances, reminders, conflict index) run once
+after the import.
+Without deferred mode every row goes through the full controller insert.
+Submitted trust transactions always take that path, so each posting runs the
+balance lock, overdraft check and ledger entry of its controller.
+
+With an upsert key, rows matching a draft document update it; fields a row
+leaves out keep the document's values. Rows matching a submitted or cancelled
+document are refused.
+
+Deferred mode bypasses controllers and per-document permissions, so from the
+desk it is limited to System Managers; import_records defaults to the
+controller path.
+
+From the console:
+	bench --site <site> execute sheria_app.bulk_import.bulk_import --kwargs "{'doctype': 'Time Entry', 'rows': rows}"
+"""
+
+import time
+
+import frappe
+from frappe import _
+from frappe.model import no_value_fields, table_fields
+from frappe.utils import (
+	add_days, cint, flt, get_datetime, get_time, getdate, now, nowdate, time_diff_in_hours
+)
+
+from sheria_app.client_services.doctype.client_financial_event.client_financial_event import (
+	rebuild_financial_events,
+)
+from sheria_app.client_services.doctype.trust_account_balance.trust_account_balance import (
+	rebuild_trust_balances,
+)
+from sheria_app.crm_extensions.doctype.deal_trust_movement.deal_trust_movement import (
+	rebuild_deal_trust_movements,
+)
+from sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card import (
+	get_case_rates,
+	get_employee_rates,
+	resolve_billing_rate,
+)
+from sheria_app.legal_practice.doctype.conflict_party.conflict_party import (
+	get_case_chunk_matters,
+	write_conflict_parties,
+)
+from sheria_app.legal_practice.doctype.time_entry.time_entry import get_time_entry_link_maps
+from sheria_app.legal_practice.doctype.wip_ledger_entry.wip_ledger_entry import rebuild_wip_ledger
+
+CHUNK_SIZE = 5000
+STANDARD_COLUMNS = ["name", "creation", "modified", "owner", "modified_by"]
+NUMERIC_FIELDTYPES = ("Int", "Check", "Float", "Currency", "Percent")
+
+
+def bulk_import(doctype, rows, column_map=None, upsert_key=None, deferred=True, submit=False,
+	chunk_size=CHUNK_SIZE):
+	"""Insert or update rows of a supported doctype in chunks
+
+	column_map maps source column -> fieldname; unmapped columns that match a
+	field are taken as is. With upsert_key, rows whose key matches an existing
+	document update it instead of inserting. Returns counts, per-row errors and
+	throughput.
+	"""
+	if doctype not in IMPORT_PROFILES:
+		frappe.throw(_("Bulk import is not supported for {0}").format(doctype))
+
+	profile = IMPORT_PROFILES[doctype]
+	meta = frappe.get_meta(doctype)
+	fields = {
+		df.fieldname: df for df in meta.fields
+		if df.fieldtype not in no_value_fields and df.fieldtype not in table_fields
+	}
+
+	if upsert_key and upsert_key != "name" and upsert_key not in fields:
+		frappe.throw(_("Unknown upsert key {0}").format(upsert_key))
+
+	submit = cint(submit) and meta.is_submittable
+	# Postings that must run their controller on submit cannot be bulk written as submitted
+	deferred = deferred and not (submit and profile.get("submit_through_controller"))
+	chunk_size = cint(chunk_size) or CHUNK_SIZE
+	stats = {"inserted": 0, "updated": 0, "errors": []}
+	imported = []
+	started = time.monotonic()
+
+	for start in range(0, len(rows), chunk_size):
+		chunk = []
+		for idx, row in enumerate(rows[start:start + chunk_size], start + 1):
+			try:
+				chunk.append(map_row(row, column_map, fields, idx))
+			except Exception as e:
+				stats["errors"].append({"row": idx, "error": str(e)})
+
+		chunk = set_existing_values(doctype, upsert_key, chunk, fields, stats["errors"])
+		chunk = validate_chunk(chunk, fields, stats["errors"])
+		chunk = profile["prepare"](chunk, stats["errors"])
+		if not chunk:
+			continue
+
+		try:
+			if deferred:
+				inserted, updated = write_chunk(doctype, profile, fields, chunk, submit)
+			else:
+				inserted, updated = save_chunk(doctype, chunk, submit, stats["errors"])
+
+			frappe.db.commit()
+		except Exception as e:
+			frappe.db.rollback()
+			frappe.log_error(f"Error importing {doctype} rows {start + 1}-{start + len(chunk)}: {str(e)}")
+			stats["errors"].extend({"row": row["_row"], "error": str(e)} for row in chunk)
+			continue
+
+		stats["inserted"] += inserted
+		stats["updated"] += updated
+		imported.extend(row["name"] for row in chunk if row.get("name"))
+
+	if deferred and imported and profile.get("after_import"):
+		profile["after_import"](imported)
+		frappe.db.commit()
+
+	elapsed = time.monotonic() - started
+	stats["seconds"] = round(elapsed, 2)
+	stats["rows_per_second"] = round((stats["inserted"] + stats["updated"]) / elapsed) if elapsed else 0
+
+	return stats
+
+
+@frappe.whitelist()
+def import_records(doctype, rows, column_map=None, upsert_key=None, deferred=0, submit=0):
+	"""Bulk import rows posted as JSON"""
+	if (
+		not frappe.has_permission(doctype, "create")
+		or (upsert_key and not frappe.has_permission(doctype, "write"))
+		or (cint(submit) and not frappe.has_permission(doctype, "submit"))
+		or (cint(deferred) and "System Manager" not in frappe.get_roles())
+	):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	try:
+		return bulk_import(
+			doctype,
+			frappe.parse_json(rows),
+			column_map=frappe.parse_json(column_map) if column_map else None,
+			upsert_key=upsert_key,
+			deferred=cint(deferred),
+			submit=cint(submit)
+		)
+	except frappe.ValidationError:
+		raise
+	except Exception as e:
+		frappe.log_error(f"Error importing {doctype} records: {str(e)}")
+		return {"error": "Failed to import records"}
+
+
+def map_row(row, column_map, fields, idx):
+	"""Rename source columns to fieldnames and coerce values by field type"""
+	values = frappe._dict(_row=idx)
+
+	for column, value in row.items():
+		fieldname = (column_map or {}).get(column, column)
+		if fieldname == "name" or fieldname in fields:
+			values[fieldname] = coerce_value(fields.get(fieldname), value)
+
+	return values
+
+
+def coerce_value(df, value):
+	if value in (None, "") or not df:
+		return value
+
+	if df.fieldtype in ("Int", "Check"):
+		return cint(value)
+	if df.fieldtype in ("Float", "Currency", "Percent"):
+		return flt(value)
+	if df.fieldtype == "Date":
+		return getdate(value)
+	if df.fieldtype == "Datetime":
+		return get_datetime(value)
+	if df.fieldtype == "Time":
+		return get_time(value)
+
+	return value
+
+
+def validate_chunk(chunk, fields, errors):
+	"""Apply defaults to new rows and check mandatory, select and link values for a chunk
+
+	Link values are checked against one query per linked doctype for the whole
+	chunk. Returns the rows that passed; the rest are added to errors.
+	"""
+	existing_links = {}
+	for fieldname, df in fields.items():
+		if df.fieldtype != "Link":
+			continue
+
+		values = list({row[fieldname] for row in chunk if row.get(fieldname)})
+		if values:
+			existing_links[fieldname] = set(frappe.get_all(df.options, filters={"name": ["in", values]}, pluck="name"))
+
+	valid = []
+	for row in chunk:
+		problems = []
+
+		for fieldname, df in fields.items():
+			if not row.get("_update") and row.get(fieldname) in (None, "") and df.default is not None:
+				row[fieldname] = get_default_value(df)
+
+			value = row.get(fieldname)
+
+			if df.reqd and value in (None, ""):
+				problems.append(_("{0} is required").format(df.label))
+			elif value in (None, ""):
+				continue
+			elif df.fieldtype == "Select" and df.options and value not in df.options.split("\n"):
+				problems.append(_("{0} is not a valid {1}").format(value, df.label))
+			elif fieldname in existing_links and value not in existing_links[fieldname]:
+				problems.append(_("{0} {1} not found").format(df.options, value))
+
+		if problems:
+			errors.append({"row": row["_row"], "error": ", ".join(problems)})
+		else:
+			valid.append(row)
+
+	return valid
+
+
+def get_default_value(df):
+	if df.default == "Today":
+		return getdate(nowdate())
+	if df.default in ("now", "Now"):
+		return get_datetime()
+	if df.default == "__user":
+		return frappe.session.user
+
+	return coerce_value(df, df.default)
+
+
+def set_existing_values(doctype, upsert_key, chunk, fields, errors):
+	"""Mark rows whose upsert key matches a draft, filling the fields they leave out from it
+
+	Partial rows then keep the document's other values instead of taking
+	defaults, and every update row carries the same columns. Rows matching a
+	submitted or cancelled document are dropped with an error. Returns the
+	rows to import.
+	"""
+	if not upsert_key:
+		return chunk
+
+	keys = list({row[upsert_key] for row in chunk if row.get(upsert_key)})
+	if not keys:
+		return chunk
+
+	existing = {
+		doc[upsert_key]: doc
+		for doc in frappe.get_all(doctype,
+			filters={upsert_key: ["in", keys]},
+			fields=list({"name", "docstatus", upsert_key, *fields})
+		)
+	}
+
+	valid = []
+	for row in chunk:
+		doc = existing.get(row.get(upsert_key))
+		if doc and doc.docstatus != 0:
+			errors.append({"row": row["_row"], "error": _("{0} {1} is submitted or cancelled and cannot be updated").format(
+				_(doctype), doc.name)})
+			continue
+
+		if doc:
+			for fieldname in fields:
+				if fieldname not in row:
+					row[fieldname] = doc[fieldname]
+
+			row.update({"name": doc.name, "_update": True})
+
+		valid.append(row)
+
+	return valid
+
+
+def write_chunk(doctype, profile, fields, chunk, submit):
+	"""Write a chunk with one INSERT ... ON DUPLICATE KEY UPDATE statement per column set
+
+	Rows are grouped by the columns they carry, so a row never writes NULL into
+	a field it did not give. Only drafts are ever updated: a row that runs
+	into a submitted or cancelled document leaves it as it is. Returns
+	(inserted, updated).
+	"""
+	new_rows = [row for row in chunk if not row.get("_update")]
+	profile["autoname"](new_rows)
+
+	timestamp = now()
+	user = frappe.session.user
+	for row in chunk:
+		row.update({"creation": timestamp, "modified": timestamp, "owner": user, "modified_by": user})
+		if not row.get("_update"):
+			row["docstatus"] = 1 if submit else 0
+
+	groups = {}
+	for row in chunk:
+		columns = ("docstatus",) if not row.get("_update") else ()
+		columns += tuple(sorted(fieldname for fieldname in row if fieldname in fields))
+		groups.setdefault(columns, []).append(row)
+
+	for field_columns, rows in groups.items():
+		columns = STANDARD_COLUMNS + list(field_columns)
+		update_columns = [column for column in columns if column not in ("name", "creation", "owner", "docstatus")]
+
+		placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+		values = [get_column_value(fields, row, column) for row in rows for column in columns]
+
+		frappe.db.sql(f"""
+			INSERT INTO `tab{doctype}` ({', '.join(f'`{column}`' for column in columns)})
+			VALUES {placeholders}
+			ON DUPLICATE KEY UPDATE {', '.join(
+				f'`{column}` = IF(docstatus = 0, VALUES(`{column}`), `{column}`)' for column in update_columns
+			)}
+		""", values)
+
+	return len(new_rows), len(chunk) - len(new_rows)
+
+
+def get_column_value(fields, row, column):
+	"""Row value for a column, with 0 for numeric fields the row left empty"""
+	value = row.get(column)
+	if value is None and column in fields and fields[column].fieldtype in NUMERIC_FIELDTYPES:
+		return 0
+
+	return value
+
+
+def save_chunk(doctype, chunk, submit, errors):
+	"""Insert or update each row through its controller, isolating failures per row
+
+	Returns (inserted, updated).
+	"""
+	inserted = updated = 0
+
+	for row in chunk:
+		values = {k: v for k, v in row.items() if not k.startswith("_")}
+		frappe.db.savepoint("bulk_import")
+
+		try:
+			if row.get("_update"):
+				doc = frappe.get_doc(doctype, row["name"])
+				doc.update({k: v for k, v in values.items() if k != "name"})
+				doc.flags.links_prefetched = True
+				doc.save()
+				updated += 1
+			else:
+				doc = frappe.get_doc(dict(values, doctype=doctype))
+				doc.flags.links_prefetched = True
+				doc.insert()
+				if submit:
+					doc.submit()
+				inserted += 1
+
+			row["name"] = doc.name
+		except Exception as e:
+			frappe.db.rollback(save_point="bulk_import")
+			errors.append({"row": row["_row"], "error": str(e)})
+			row["name"] = None
+
+	return inserted, updated
+
+
+def reserve_series(key, count):
+	"""Take `count` consecutive numbers from a naming series in one update
+
+	Returns the first number of the block.
+	"""
+	frappe.db.sql("INSERT IGNORE INTO `tabSeries` (name, current) VALUES (%s, 0)", (key,))
+	current = frappe.db.sql("SELECT current FROM `tabSeries` WHERE name = %s FOR UPDATE", (key,))[0][0]
+	frappe.db.sql("UPDATE `tabSeries` SET current = current + %s WHERE name = %s", (count, key))
+
+	return cint(current) + 1
+
+
+def name_from_series(prefix, digits):
+	"""Namer for `format:PREFIX{###}` autonames
+
+	Frappe draws the digits of a braced `{###}` from the unprefixed series, so
+	the block is reserved from that same counter.
+	"""
+	def autoname(rows):
+		if not rows:
+			return
+
+		first = reserve_series("", len(rows))
+		for number, row in enumerate(rows, first):
+			row["name"] = prefix.format(number=str(number).zfill(digits), **row)
+
+	return autoname
+
+
+def name_trust_transactions(rows):
+	"""Name by the mandatory transaction_id, as the doctype's field autoname does"""
+	for row in rows:
+		row["name"] = row["transaction_id"]
+
+
+def prepare_legal_cases(rows, errors):
+	valid = []
+	for row in rows:
+		if row.get("header_case_year") and len(str(row.header_case_year)) != 4:
+			errors.append({"row": row["_row"], "error": _("Case Year must be a 4-digit year")})
+		elif not row.get("header_case_number"):
+			errors.append({"row": row["_row"], "error": _("Case Number is required")})
+		else:
+			row.case_details_date_opened = row.get("case_details_date_opened") or getdate(nowdate())
+			valid.append(row)
+
+	return valid
+
+
+def prepare_time_entries(rows, errors):
+	"""Derive hours, names, rates and amounts from links prefetched for the chunk"""
+	employees = [row.employee for row in rows]
+	cases = [row.get("case") for row in rows]
+	employee_map, case_map = get_time_entry_link_maps(employees, cases)
+	employee_rates = get_employee_rates(employees)
+	case_rates = get_case_rates(cases)
+
+	valid = []
+	for row in rows:
+		if row.get("start_time") and row.get("end_time"):
+			row.hours = flt(time_diff_in_hours(
+				get_datetime(f"{row.date} {row.end_time}"),
+				get_datetime(f"{row.date} {row.start_time}")
+			))
+
+		if flt(row.get("hours")) <= 0:
+			errors.append({"row": row["_row"], "error": _("Hours must be greater than 0")})
+			continue
+
+		row.employee_name = employee_map[row.employee].employee_name
+		row.case_title = case_map[row.case].case_details_title if row.get("case") else None
+
+		if row.is_billable and not row.get("billing_rate"):
+			row.billing_rate = resolve_billing_rate(row.employee, row.get("case"), row.date,
+				employee_rates=employee_rates, case_rates=case_rates)
+		row.billing_amount = flt(row.hours * flt(row.get("billing_rate"))) if row.is_billable else 0
+
+		valid.append(row)
+
+	return valid
+
+
+def prepare_case_hearings(rows, errors):
+	"""Fill case titles; legacy hearings may be in the past, so dates are not checked"""
+	cases = list({row.case for row in rows})
+	titles = dict(frappe.get_all("Legal Case",
+		filters={"name": ["in", cases]},
+		fields=["name", "case_details_title"],
+		as_list=True
+	)) if cases else {}
+
+	for row in rows:
+		row.case_title = titles.get(row.case)
+
+	return rows
+
+
+def prepare_trust_transactions(rows, errors):
+	valid = []
+	for row in rows:
+		if flt(row.amount) <= 0:
+			errors.append({"row": row["_row"], "error": _("Amount must be greater than zero")})
+		else:
+			valid.append(row)
+
+	return valid
+
+
+def after_legal_case_import(names):
+	"""Index the parties of imported cases for conflict checks, a chunk at a time"""
+	for start in range(0, len(names), CHUNK_SIZE):
+		cases = frappe.get_all("Legal Case",
+			filters={"name": ["in", names[start:start + CHUNK_SIZE]]},
+			fields=["name", "case_details_title", "case_details_client_name"]
+		)
+		write_conflict_parties("Legal Case", get_case_chunk_matters(cases))
+
+
+def after_time_entry_import(names):
+	rebuild_wip_ledger()
+
+
+def after_case_hearing_import(names):
+	"""Send the reminders hearings inside the reminder window would have sent on save"""
+	due = frappe.get_all("Case Hearing",
+		filters={
+			"name": ["in", names],
+			"reminder_sent": 0,
+			"hearing_date": ["between", [nowdate(), add_days(nowdate(), 7)]]
+		},
+		pluck="name"
+	)
+
+	for name in due:
+		frappe.get_doc("Case Hearing", name).send_hearing_reminder()
+
+	if due:
+		frappe.db.sql("""
+			UPDATE `tabCase Hearing`
+			SET reminder_sent = 1, reminder_date = %(now)s
+			WHERE name IN %(names)s
+		""", {"now": now(), "names": tuple(due)})
+
+
+def after_trust_transaction_import(names):
+	rebuild_trust_balances()
+	rebuild_financial_events()
+	rebuild_deal_trust_movements()
+
+
+IMPORT_PROFILES = {
+	"Legal Case": {
+		"autoname": name_from_series("{number}-{header_case_number}-{header_case_year}", 4),
+		"prepare": prepare_legal_cases,
+		"after_import": after_legal_case_import
+	},
+	"Time Entry": {
+		"autoname": name_from_series("TE-{number}", 5),
+		"prepare": prepare_time_entries,
+		"after_import": after_time_entry_import
+	},
+	"Case Hearing": {
+		"autoname": name_from_series("CH-{number}", 5),
+		"prepare": prepare_case_hearings,
+		"after_import": after_case_hearing_import
+	},
+	"Trust Account Transaction": {
+		"autoname": name_trust_transactions,
+		"prepare": prepare_trust_transactions,
+		"after_import": after_trust_transaction_import,
+		# Submitting posts under the balance lock (overdraft check) and writes the ledger
+		"submit_through_controller": True
+	}
+}
@@ -0,0 +1,310 @@
+# Sheria Bulk Print
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Background printing of many documents to a single PDF or a zip of PDFs.
+
+A job loads its documents in chunks. Each chunk needs one query for the
+parent rows, one per child table and one per related collection that the
+print formats loop over (hearings, case documents, notes, client and lawyer
+cases). The documents are rendered through a compiled-template cache keyed
+by print format and `modified`, in Frappe's sandboxed Jinja environment with
+the print style and letter head of the desk print view. wkhtmltopdf
+conversions run in a process
+pool. Progress is published over realtime and kept in the cache for polling,
+and the result is saved as a private File.
+"""
+
+import io
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import frappe
+from frappe import _
+from frappe.utils import now
+
+BULK_PRINT_CACHE_KEY = "sheria_bulk_print"
+BULK_PRINT_EVENT = "sheria_bulk_print"
+PRINT_CHUNK_SIZE = 100
+PDF_WORKERS = 4
+MAX_DOCUMENTS = 5000
+
+# Compiled print templates by (print format, modified)
+_compiled_templates = {}
+
+
+def get_case_hearings(names):
+	return frappe.db.sql("""
+		SELECT `case` AS parent, hearing_date, hearing_time, hearing_type, court AS court_name,
+			judge AS judge_name, status, outcome
+		FROM `tabCase Hearing`
+		WHERE `case` IN %s
+		ORDER BY hearing_date, hearing_time
+	""", (tuple(names),), as_dict=True)
+
+
+def get_case_documents(names):
+	return frappe.db.sql("""
+		SELECT parent, document_type, document_name, date_uploaded AS date, '' AS status
+		FROM `tabCase Documents Table`
+		WHERE parenttype = 'Legal Case' AND parent IN %s
+		ORDER BY idx
+	""", (tuple(names),), as_dict=True)
+
+
+def get_case_notes(names):
+	return frappe.db.sql("""
+		SELECT `case` AS parent, date, performed_by AS added_by, description AS note
+		FROM `tabCase Activity`
+		WHERE `case` IN %s
+		ORDER BY date
+	""", (tuple(names),), as_dict=True)
+
+
+def get_client_cases(names):
+	return frappe.db.sql("""
+		SELECT lc.case_details_client_name AS parent, lc.name AS case_number, lc.header_case_type AS case_type,
+			lc.case_details_date_opened AS filing_date,
+			(SELECT cs.status FROM `tabCase Status Table` cs
+				WHERE cs.parenttype = 'Legal Case' AND cs.parent = lc.name
+				ORDER BY cs.date DESC, cs.idx DESC LIMIT 1) AS status
+		FROM `tabLegal Case` lc
+		WHERE lc.case_details_client_name IN %s
+		ORDER BY lc.case_details_date_opened DESC
+	""", (tuple(names),), as_dict=True)
+
+
+def get_lawyer_cases(names):
+	return frappe.db.sql("""
+		SELECT lt.lawyer AS parent, lc.name AS case_number, lc.case_details_client_name AS client_name,
+			(SELECT cs.status FROM `tabCase Status Table` cs
+				WHERE cs.parenttype = 'Legal Case' AND cs.parent = lc.name
+				ORDER BY cs.date DESC, cs.idx DESC LIMIT 1) AS status,
+			NULL AS priority
+		FROM `tabLawyer Table` lt
+		JOIN `tabLegal Case` lc ON lc.name = lt.parent
+		WHERE lt.parenttype = 'Legal Case' AND lt.lawyer IN %s
+		ORDER BY lc.case_details_date_opened DESC
+	""", (tuple(names),), as_dict=True)
+
+
+# Collections the print formats iterate, loaded for a whole chunk at once
+PRINT_COLLECTIONS = {
+	"Legal Case": {
+		"hearings": get_case_hearings,
+		"case_documents": get_case_documents,
+		"case_notes": get_case_notes
+	},
+	"Client": {
+		"client_cases": get_client_cases
+	},
+	"Lawyer": {
+		"lawyer_cases": get_lawyer_cases
+	}
+}
+
+
+def get_compiled_template(print_format):
+	"""Compiled Jinja template and CSS of a print format, compiled once per version"""
+	print_format = frappe.db.get_value("Print Format", print_format, ["name", "html", "css", "modified"], as_dict=True)
+	if not print_format or not print_format.html:
+		frappe.throw(_("Print Format {0} has no HTML template").format(print_format.name if print_format else ""))
+
+	key = (print_format.name, str(print_format.modified))
+	if key not in _compiled_templates:
+		# Drop older versions of this format
+		for stale in [k for k in _compiled_templates if k[0] == print_format.name]:
+			del _compiled_templates[stale]
+
+		_compiled_templates[key] = (frappe.get_jenv().from_string(print_format.html), print_format.css or "")
+
+	return _compiled_templates[key]
+
+
+def load_print_docs(doctype, names):
+	"""Documents of a chunk with child tables and print collections attached, in name order"""
+	docs = {
+		row.name: row
+		for row in frappe.get_all(doctype, filters={"name": ["in", names]}, fields=["*"])
+	}
+
+	collections = {
+		df.fieldname: lambda names, df=df: frappe.get_all(df.options,
+			filters={"parenttype": doctype, "parentfield": df.fieldname, "parent": ["in", names]},
+			fields=["*"],
+			order_by="idx"
+		)
+		for df in frappe.get_meta(doctype).get_table_fields()
+	}
+	collections.update(PRINT_COLLECTIONS.get(doctype, {}))
+
+	for fieldname, loader in collections.items():
+		for doc in docs.values():
+			doc[fieldname] = []
+		for row in loader(list(docs)):
+			docs[row.parent][fieldname].append(row)
+
+	return [docs[name] for name in names if name in docs]
+
+
+def get_print_letter_head(doc, letter_heads):
+	"""Rendered header and footer of the document's letter head, or the default one"""
+	from frappe.www.printview import get_letter_head
+
+	key = doc.get("letter_head") or ""
+	if key not in letter_heads:
+		letter_heads[key] = get_letter_head(doc, no_letterhead=False) or {}
+
+	letter_head = letter_heads[key]
+	return (
+		frappe.render_template(letter_head.get("content") or "", {"doc": doc}),
+		frappe.render_template(letter_head.get("footer") or "", {"doc": doc})
+	)
+
+
+def render_print_html(template, css, doc, letter_heads):
+	# The environment's globals hold the safe `frappe` and `_`; only the document is passed in
+	body = template.render({"doc": doc})
+	header, footer = get_print_letter_head(doc, letter_heads)
+	return (
+		f'<!DOCTYPE html><html><head><meta charset="utf-8"><style>{css}</style></head><body>'
+		f'<div class="print-format"><div class="letter-head">{header}</div>{body}'
+		f'<div class="letter-head-footer">{footer}</div></div></body></html>'
+	)
+
+
+def html_to_pdf(html, options):
+	"""Process pool worker: convert one document's HTML with wkhtmltopdf"""
+	import pdfkit
+
+	return pdfkit.from_string(html, False, options=options)
+
+
+@frappe.whitelist()
+def enqueue_bulk_print(doctype, names, print_format=None, output="pdf"):
+	"""Queue a bulk print of `names`; returns the job id to poll with get_bulk_print_status"""
+	if not frappe.has_permission(doctype, "print"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	names = frappe.parse_json(names) if isinstance(names, str) else names
+	# Keep only documents the user may read, in the requested order
+	permitted = set(frappe.get_list(doctype, filters={"name": ["in", names]}, pluck="name", limit_page_length=0))
+	names = [name for name in names if name in permitted]
+
+	if not names:
+		frappe.throw(_("No documents to print"))
+	if len(names) > MAX_DOCUMENTS:
+		frappe.throw(_("Bulk print is limited to {0} documents").format(MAX_DOCUMENTS))
+
+	print_format = print_format or frappe.get_meta(doctype).default_print_format
+	if not print_format:
+		frappe.throw(_("Select a print format"))
+
+	job_id = frappe.generate_hash(length=12)
+	set_job_status(job_id, {"status": "Queued", "total": len(names), "done": 0, "user": frappe.session.user})
+
+	frappe.enqueue(
+		"sheria_app.bulk_print.run_bulk_print",
+		queue="long",
+		timeout=3600,
+		job_id=f"{BULK_PRINT_CACHE_KEY}:{job_id}",
+		bulk_print_id=job_id,
+		doctype=doctype,
+		names=names,
+		print_format=print_format,
+		output=output,
+		enqueue_after_commit=True
+	)
+
+	return {"job_id": job_id, "total": len(names)}
+
+
+def run_bulk_print(bulk_print_id, doctype, names, print_format, output="pdf"):
+	"""Render `names` chunk by chunk and convert them to PDF in a process pool"""
+	from frappe.utils.pdf import prepare_options
+	from frappe.www.printview import get_print_style
+
+	job_id = bulk_print_id
+	try:
+		template, css = get_compiled_template(print_format)
+		css = f"{get_print_style()}\n{css}"
+		_html, options = prepare_options("<html></html>", {})
+		total = len(names)
+		letter_heads = {}
+		pdfs = []
+
+		# spawn, so workers do not inherit this worker's database connection
+		with ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+			for start in range(0, total, PRINT_CHUNK_SIZE):
+				docs = load_print_docs(doctype, names[start:start + PRINT_CHUNK_SIZE])
+				html = [render_print_html(template, css, doc, letter_heads) for doc in docs]
+
+				for doc, pdf in zip(docs, pool.map(html_to_pdf, html, [options] * len(html))):
+					pdfs.append((doc.name, pdf))
+
+				publish_progress(job_id, "Running", min(start + PRINT_CHUNK_SIZE, total), total)
+
+		file_url = save_output(doctype, job_id, pdfs, output)
+		publish_progress(job_id, "Completed", total, total, file_url=file_url)
+
+	except Exception as e:
+		frappe.log_error(f"Error in bulk print {job_id}: {str(e)}")
+		publish_progress(job_id, "Failed", 0, len(names), error=str(e))
+
+
+def save_output(doctype, job_id, pdfs, output):
+	"""Merge the PDFs, or zip them one file per document, into a private File"""
+	buffer = io.BytesIO()
+
+	if output == "zip":
+		with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+			for name, pdf in pdfs:
+				archive.writestr(f"{name.replace('/', '-')}.pdf", pdf)
+		file_name = f"{doctype}-{job_id}.zip"
+	else:
+		from pypdf import PdfWriter
+
+		writer = PdfWriter()
+		for _name, pdf in pdfs:
+			writer.append(io.BytesIO(pdf))
+		writer.write(buffer)
+		file_name = f"{doctype}-{job_id}.pdf"
+
+	file = frappe.get_doc({
+		"doctype": "File",
+		"file_name": file_name,
+		"is_private": 1,
+		"content": buffer.getvalue()
+	})
+	file.insert(ignore_permissions=True)
+	frappe.db.commit()
+
+	return file.file_url
+
+
+def get_job_status(job_id):
+	return frappe.cache().get_value(f"{BULK_PRINT_CACHE_KEY}:{job_id}")
+
+
+def set_job_status(job_id, status):
+	frappe.cache().set_value(f"{BULK_PRINT_CACHE_KEY}:{job_id}", status, expires_in_sec=86400)
+
+
+def publish_progress(job_id, status, done, total, **extra):
+	job = get_job_status(job_id) or {}
+	job.update(extra, status=status, done=done, total=total, updated_on=now())
+	set_job_status(job_id, job)
+
+	if job.get("user"):
+		frappe.publish_realtime(BULK_PRINT_EVENT, dict(job, job_id=job_id), user=job["user"])
+
+
+@frappe.whitelist()
+def get_bulk_print_status(job_id):
+	job = get_job_status(job_id)
+	if not job or job.get("user") != frappe.session.user:
+		frappe.throw(_("Bulk print job not found"), frappe.DoesNotExistError)
+
+	return dict(job, job_id=job_id)
@@ -0,0 +1,239 @@
+# Sheria Case Overview
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Everything the case form and client portal summarize about a matter, in one call.
+
+The overview is split into sections: hearings, tasks, time, fees, documents
+and trust. Each section has a summary of counts and totals and its next few
+items. Totals come from aggregate queries and the WIP and trust balance
+rollups, not from loading the rows.
+
+Every section has an ETag built from a cheap version query (row count and
+latest `modified` of its sources, plus the date for sections that depend on
+it, and the balance itself for trust). When the caller sends the ETag it already holds, the section comes back as
+not modified and its summary and items are not computed. Sections in
+DEFERRED_SECTIONS are only computed when asked for by name, so a form can
+expand them later.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import cint, flt, getdate
+
+from sheria_app.client_services.doctype.trust_account_balance.trust_account_balance import get_trust_balance
+from sheria_app.legal_practice.doctype.wip_ledger_entry.wip_ledger_entry import get_wip_totals
+
+DEFAULT_ITEMS = 5
+MAX_ITEMS = 50
+DEFERRED_SECTIONS = ("fees", "documents")
+
+
+def get_hearings_section(case, limit):
+	summary = frappe.db.sql("""
+		SELECT
+			COUNT(*) AS total,
+			IFNULL(SUM(hearing_date >= CURDATE() AND status NOT IN ('Cancelled', 'Completed')), 0) AS upcoming,
+			MIN(CASE WHEN hearing_date >= CURDATE() AND status NOT IN ('Cancelled', 'Completed')
+				THEN hearing_date END) AS next_hearing_date
+		FROM `tabCase Hearing`
+		WHERE `case` = %s
+	""", (case,), as_dict=True)[0]
+
+	items = frappe.db.sql("""
+		SELECT name, hearing_date, hearing_time, hearing_type, court, judge, status
+		FROM `tabCase Hearing`
+		WHERE `case` = %s
+			AND hearing_date >= CURDATE()
+			AND status NOT IN ('Cancelled', 'Completed')
+		ORDER BY hearing_date, hearing_time
+		LIMIT %s
+	""", (case, limit), as_dict=True)
+
+	return summary, items
+
+
+def get_tasks_section(case, limit):
+	summary = frappe.db.sql("""
+		SELECT
+			COUNT(*) AS total,
+			IFNULL(SUM(status NOT IN ('Completed', 'Cancelled')), 0) AS open,
+			IFNULL(SUM(status NOT IN ('Completed', 'Cancelled') AND due_date < CURDATE()), 0) AS overdue
+		FROM `tabTask`
+		WHERE `case` = %s
+	""", (case,), as_dict=True)[0]
+
+	items = frappe.db.sql("""
+		SELECT name, subject, assigned_to, status, priority, due_date, progress
+		FROM `tabTask`
+		WHERE `case` = %s
+			AND status NOT IN ('Completed', 'Cancelled')
+		ORDER BY due_date IS NULL, due_date, name
+		LIMIT %s
+	""", (case, limit), as_dict=True)
+
+	return summary, items
+
+
+def get_time_section(case, limit):
+	summary = frappe.db.sql("""
+		SELECT
+			COUNT(*) AS entries,
+			IFNULL(SUM(hours), 0) AS hours,
+			IFNULL(SUM(CASE WHEN is_billable THEN hours ELSE 0 END), 0) AS billable_hours,
+			IFNULL(SUM(CASE WHEN is_billable THEN billing_amount ELSE 0 END), 0) AS billable_amount
+		FROM `tabTime Entry`
+		WHERE `case` = %s
+	""", (case,), as_dict=True)[0]
+
+	wip = get_wip_totals(case=case)
+	summary.unbilled_hours = flt(wip[0].hours) if wip else 0
+	summary.unbilled_amount = flt(wip[0].amount) if wip else 0
+
+	items = frappe.db.sql("""
+		SELECT name, date, employee_name, activity_type, hours, billing_amount, status
+		FROM `tabTime Entry`
+		WHERE `case` = %s
+		ORDER BY date DESC, name DESC
+		LIMIT %s
+	""", (case, limit), as_dict=True)
+
+	return summary, items
+
+
+def get_fees_section(case, limit):
+	if not frappe.db.table_exists("Legal Fee"):
+		return {"total": 0, "amount": 0}, []
+
+	summary = frappe.db.sql("""
+		SELECT COUNT(*) AS total, IFNULL(SUM(amount), 0) AS amount
+		FROM `tabLegal Fee`
+		WHERE `case` = %s AND docstatus = 1
+	""", (case,), as_dict=True)[0]
+
+	items = frappe.db.sql("""
+		SELECT name, fee_type, amount, currency, description, creation
+		FROM `tabLegal Fee`
+		WHERE `case` = %s AND docstatus = 1
+		ORDER BY creation DESC
+		LIMIT %s
+	""", (case, limit), as_dict=True)
+
+	return summary, items
+
+
+def get_documents_section(case, limit):
+	summary = frappe.db.sql("""
+		SELECT COUNT(*) AS total, MAX(date_uploaded) AS last_uploaded
+		FROM `tabCase Documents Table`
+		WHERE parenttype = 'Legal Case' AND parent = %s
+	""", (case,), as_dict=True)[0]
+
+	items = frappe.db.sql("""
+		SELECT name, document_name, document_type, file_attachment, date_uploaded
+		FROM `tabCase Documents Table`
+		WHERE parenttype = 'Legal Case' AND parent = %s
+		ORDER BY date_uploaded DESC, idx DESC
+		LIMIT %s
+	""", (case, limit), as_dict=True)
+
+	return summary, items
+
+
+def get_trust_section(case, limit):
+	client = frappe.db.get_value("Legal Case", case, "case_details_client_name")
+	return {"client": client, "balance": get_trust_balance(client) if client else 0}, []
+
+
+# Section -> loader, the sources its version is read from and whether it changes with the date.
+# A source is (doctype, case column, extra condition).
+OVERVIEW_SECTIONS = {
+	"hearings": {
+		"loader": get_hearings_section,
+		"sources": [("Case Hearing", "case", None)],
+		"daily": True
+	},
+	"tasks": {
+		"loader": get_tasks_section,
+		"sources": [("Task", "case", None)],
+		"daily": True
+	},
+	"time": {
+		"loader": get_time_section,
+		"sources": [("Time Entry", "case", None), ("WIP Ledger Entry", "case", None)]
+	},
+	"fees": {
+		"loader": get_fees_section,
+		"sources": [("Legal Fee", "case", "docstatus = 1")]
+	},
+	"documents": {
+		"loader": get_documents_section,
+		"sources": [("Case Documents Table", "parent", "parenttype = 'Legal Case'")]
+	},
+	"trust": {
+		"loader": get_trust_section,
+		"sources": []
+	}
+}
+
+
+def get_section_version(section, case):
+	"""Row count and latest change of each source of a section"""
+	config = OVERVIEW_SECTIONS[section]
+	version = []
+
+	for doctype, case_field, condition in config["sources"]:
+		if not frappe.db.table_exists(doctype):
+			continue
+
+		version.extend(frappe.db.sql(f"""
+			SELECT COUNT(*), MAX(modified)
+			FROM `tab{doctype}`
+			WHERE `{case_field}` = %s {f"AND {condition}" if condition else ""}
+		""", (case,))[0])
+
+	if section == "trust":
+		# The balance itself: `modified` is written with NOW() to the second, and clients without a row fall back to the ledger
+		client = frappe.db.get_value("Legal Case", case, "case_details_client_name")
+		version.extend([client, get_trust_balance(client) if client else None])
+
+	if config.get("daily"):
+		version.append(getdate())
+
+	return version
+
+
+def get_section_etag(section, case, limit):
+	version = frappe.as_json([section, case, limit, get_section_version(section, case)])
+	return hashlib.md5(version.encode()).hexdigest()
+
+
+def get_overview(case, sections=None, etags=None, limit=DEFAULT_ITEMS):
+	"""Summary, next `limit` items and ETag of each requested section
+
+	Sections not requested come back as {"deferred": True}; sections whose ETag
+	matches `etags` come back as {"etag", "not_modified": True}.
+	"""
+	limit = min(cint(limit) or DEFAULT_ITEMS, MAX_ITEMS)
+	sections = [section for section in sections if section in OVERVIEW_SECTIONS] if sections else [
+		section for section in OVERVIEW_SECTIONS if section not in DEFERRED_SECTIONS
+	]
+	etags = etags or {}
+
+	overview = {}
+	for section in OVERVIEW_SECTIONS:
+		if section not in sections:
+			overview[section] = {"deferred": True}
+			continue
+
+		etag = get_section_etag(section, case, limit)
+		if etags.get(section) == etag:
+			overview[section] = {"etag": etag, "not_modified": True}
+			continue
+
+		summary, items = OVERVIEW_SECTIONS[section]["loader"](case, limit)
+		overview[section] = {"etag": etag, "summary": summary, "items": items}
+
+	return overview
@@ -0,0 +1,107 @@
+# Sheria Case Timeline
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+A matter's history as one stream of events, newest first.
+
+Activities, hearings, documents, time entries and tasks are each read with
+one query that range-scans the source's (case, date) index and returns at most
+a page of rows. The per-source pages are then k-way merged. Events are ordered
+by (date, type, name). The cursor of a page is that triple for its last event,
+and it turns into an index range condition on every source, so a page costs
+the same however far back in an old matter it is.
+"""
+
+import heapq
+
+import frappe
+
+# Event type -> source table, its case and date columns, and the event columns
+TIMELINE_SOURCES = {
+	"Activity": {
+		"table": "tabCase Activity",
+		"case_field": "case",
+		"date_field": "date",
+		"fields": "activity_type AS title, description, status, NULL AS time"
+	},
+	"Document": {
+		"table": "tabCase Documents Table",
+		"case_field": "parent",
+		"date_field": "date_uploaded",
+		"fields": "document_name AS title, document_type AS description, NULL AS status, NULL AS time",
+		"conditions": ["parenttype = 'Legal Case'"]
+	},
+	"Hearing": {
+		"table": "tabCase Hearing",
+		"case_field": "case",
+		"date_field": "hearing_date",
+		"fields": "hearing_type AS title, court AS description, status, hearing_time AS time"
+	},
+	"Task": {
+		"table": "tabTask",
+		"case_field": "case",
+		"date_field": "due_date",
+		"fields": "subject AS title, description, status, NULL AS time"
+	},
+	"Time Entry": {
+		"table": "tabTime Entry",
+		"case_field": "case",
+		"date_field": "date",
+		"fields": "activity_type AS title, description, status, start_time AS time"
+	}
+}
+
+
+def get_source_page(event_type, case, after=None, page_length=50):
+	"""Newest events of one source before the `after` (date, type, name) cursor"""
+	source = TIMELINE_SOURCES[event_type]
+	date_field = f"`{source['date_field']}`"
+	values = {"case": case, "page_length": page_length}
+	conditions = [f"`{source['case_field']}` = %(case)s", f"{date_field} IS NOT NULL"]
+	conditions.extend(source.get("conditions", []))
+
+	if after:
+		after_date, after_type, after_name = after
+		values.update({"after_date": after_date, "after_name": after_name})
+
+		# The type is fixed within a source, so the cursor is a range on (date, name)
+		if event_type < after_type:
+			conditions.append(f"{date_field} <= %(after_date)s")
+		elif event_type == after_type:
+			conditions.append(f"""({date_field} < %(after_date)s
+				OR ({date_field} = %(after_date)s AND name < %(after_name)s))""")
+		else:
+			conditions.append(f"{date_field} < %(after_date)s")
+
+	return frappe.db.sql(f"""
+		SELECT
+			'{event_type}' AS type,
+			name,
+			{date_field} AS date,
+			{source['fields']}
+		FROM `{source['table']}`
+		WHERE {' AND '.join(conditions)}
+		ORDER BY {date_field} DESC, name DESC
+		LIMIT %(page_length)s
+	""", values, as_dict=True)
+
+
+def get_timeline_page(case, after=None, event_types=None, page_length=50):
+	"""One page of a case's events, newest first, and the cursor of the next page
+
+	Each source returns one row more than the page so the merge can tell
+	whether anything is left.
+	"""
+	event_types = [event_type for event_type in event_types or TIMELINE_SOURCES if event_type in TIMELINE_SOURCES]
+	pages = [get_source_page(event_type, case, after, page_length + 1) for event_type in event_types]
+
+	events = list(heapq.merge(*pages, key=lambda event: (event.date, event.type, event.name), reverse=True))
+
+	next_cursor = None
+	if len(events) > page_length:
+		events = events[:page_length]
+		last = events[-1]
+		next_cursor = {"after_date": last.date, "after_type": last.type, "after_name": last.name}
+
+	return events, next_cursor
@@ -7,6 +7,8 @@ frappe.ui.form.on('Time Entry', {
 
         // Calculate total amount on refresh
         calculate_total(frm);
+
+        add_timer_buttons(frm);
     },
 
     start_time: function(frm) {
@@ -53,4 +55,79 @@ function calculate_total(frm) {
     } else {
         frm.set_value('total_amount', 0);
     }
-}
\ No newline at end of file
+}
+
+// Timer log - kept in the browser and synced in one call
+const TIMER_LOG_KEY = 'sheria_time_entry_timer_log';
+
+function get_timer_log() {
+    return JSON.parse(localStorage.getItem(TIMER_LOG_KEY) || '[]');
+}
+
+function set_timer_log(log) {
+    localStorage.setItem(TIMER_LOG_KEY, JSON.stringify(log));
+}
+
+function add_timer_buttons(frm) {
+    let log = get_timer_log();
+    let running = log.find(row => !row.stopped_at);
+
+    if (running) {
+        frm.add_custom_button(__('Stop Timer'), function() {
+            running.stopped_at = frappe.datetime.now_datetime();
+            set_timer_log(log);
+            frm.refresh();
+        }, __('Timer'));
+    } else {
+        frm.add_custom_button(__('Start Timer'), function() {
+            log.push({
+                employee: frm.doc.employee,
+                case: frm.doc.case,
+                task: frm.doc.task,
+                activity_type: frm.doc.activity_type,
+                description: frm.doc.description || __('Timed work'),
+                started_at: frappe.datetime.now_datetime()
+            });
+            set_timer_log(log);
+            frm.refresh();
+        }, __('Timer'));
+    }
+
+    let stopped = log.filter(row => row.stopped_at);
+    if (stopped.length) {
+        frm.add_custom_button(__('Sync Timer Log ({0})', [stopped.length]), function() {
+            sync_timer_log();
+        }, __('Timer'));
+    }
+}
+
+function sync_timer_log() {
+    let log = get_timer_log();
+    let stopped = log.filter(row => row.stopped_at);
+
+    frappe.call({
+        method: 'sheria_app.api.create_time_entries',
+        args: {
+            entries: stopped
+        },
+        callback: function(r) {
+            if (!r.message || r.message.error) {
+                frappe.msgprint(r.message ? r.message.error : __('Failed to sync timer log'));
+                return;
+            }
+
+            // Keep failed rows and the running timer for the next sync
+            let failed = r.message.errors.map(err => stopped[err.row]);
+            set_timer_log(log.filter(row => !row.stopped_at).concat(failed));
+
+            frappe.show_alert({
+                message: __('{0} time entries created', [r.message.created.length]),
+                indicator: 'green'
+            });
+
+            if (failed.length) {
+                frappe.msgprint(r.message.errors.map(err => __('Row {0}: {1}', [err.row + 1, err.error])).join('<br>'));
+            }
+        }
+    });
+}
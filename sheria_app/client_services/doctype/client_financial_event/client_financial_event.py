@@ -0,0 +1,159 @@
+# Client Financial Event
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt
+
+TRUST_SIGNS = {
+	"Deposit": 1,
+	"Withdrawal": -1,
+	"Payment": -1,
+	"Adjustment": 1
+}
+
+
+class ClientFinancialEvent(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index(
+		"Client Financial Event", ["client", "event_date", "event_type", "reference_name"],
+		index_name="client_event_cursor"
+	)
+
+
+def get_event_values(doc):
+	"""Map a source document to its client financial event"""
+	if doc.doctype == "Sales Invoice":
+		return {
+			"client": doc.customer,
+			"event_date": doc.posting_date,
+			"event_type": "Invoice",
+			"amount": flt(doc.grand_total)
+		}
+
+	if doc.doctype == "Payment Entry":
+		if doc.party_type != "Customer":
+			return None
+		return {
+			"client": doc.party,
+			"event_date": doc.posting_date,
+			"event_type": "Payment",
+			"amount": flt(doc.paid_amount)
+		}
+
+	if doc.doctype == "Trust Account Transaction":
+		return {
+			"client": doc.client,
+			"event_date": doc.transaction_date,
+			"event_type": f"Trust {doc.transaction_type}",
+			"amount": flt(doc.amount) * TRUST_SIGNS.get(doc.transaction_type, 0)
+		}
+
+
+def post_financial_event(doc, method=None):
+	"""Record a submitted invoice, payment or trust transaction in the event stream"""
+	values = get_event_values(doc)
+	if not values or not values["client"]:
+		return
+
+	frappe.get_doc(dict(values,
+		doctype="Client Financial Event",
+		reference_doctype=doc.doctype,
+		reference_name=doc.name
+	)).insert(ignore_permissions=True)
+
+
+def remove_financial_event(doc, method=None):
+	"""Drop the event for a cancelled source document"""
+	frappe.db.delete("Client Financial Event", {
+		"reference_doctype": doc.doctype,
+		"reference_name": doc.name
+	})
+
+
+def rebuild_financial_events():
+	"""Rebuild the event stream from submitted source documents"""
+	frappe.db.delete("Client Financial Event")
+
+	common = "NOW(), NOW(), 'Administrator', 'Administrator', 0"
+	columns = """(name, client, event_date, event_type, reference_doctype, reference_name, amount,
+		creation, modified, owner, modified_by, docstatus)"""
+
+	frappe.db.sql(f"""
+		INSERT INTO `tabClient Financial Event` {columns}
+		SELECT
+			MD5(CONCAT('Sales Invoice', name)), customer, posting_date, 'Invoice',
+			'Sales Invoice', name, grand_total, {common}
+		FROM `tabSales Invoice`
+		WHERE docstatus = 1
+	""")
+
+	frappe.db.sql(f"""
+		INSERT INTO `tabClient Financial Event` {columns}
+		SELECT
+			MD5(CONCAT('Payment Entry', name)), party, posting_date, 'Payment',
+			'Payment Entry', name, paid_amount, {common}
+		FROM `tabPayment Entry`
+		WHERE docstatus = 1
+			AND party_type = 'Customer'
+	""")
+
+	frappe.db.sql(f"""
+		INSERT INTO `tabClient Financial Event` {columns}
+		SELECT
+			MD5(CONCAT('Trust Account Transaction', name)), client, transaction_date,
+			CONCAT('Trust ', transaction_type),
+			'Trust Account Transaction', name,
+			CASE
+				WHEN transaction_type IN ('Withdrawal', 'Payment') THEN -amount
+				ELSE amount
+			END,
+			{common}
+		FROM `tabTrust Account Transaction`
+		WHERE docstatus = 1
+	""")
+
+
+def get_events_page(client, after=None, event_types=None, page_length=50):
+	"""Page through a client's financial events, newest first
+
+	Ordered by (event_date, event_type, reference_name); `after` is that triple
+	for the last row of the previous page, so every page is a single range scan
+	on the client_event_cursor index whatever its depth.
+	"""
+	values = {"client": client, "page_length": page_length}
+	conditions = ["fe.client = %(client)s"]
+
+	if after:
+		conditions.append("""(
+			fe.event_date < %(after_date)s
+			OR (fe.event_date = %(after_date)s AND fe.event_type < %(after_type)s)
+			OR (fe.event_date = %(after_date)s AND fe.event_type = %(after_type)s
+				AND fe.reference_name < %(after_name)s)
+		)""")
+		values.update({"after_date": after[0], "after_type": after[1], "after_name": after[2]})
+
+	if event_types:
+		conditions.append("fe.event_type IN %(event_types)s")
+		values["event_types"] = tuple(event_types)
+
+	return frappe.db.sql(f"""
+		SELECT
+			fe.event_type as type,
+			fe.reference_doctype,
+			fe.reference_name as name,
+			fe.event_date as date,
+			fe.amount,
+			IFNULL(si.outstanding_amount, 0) as outstanding_amount,
+			IFNULL(si.status, 'Completed') as status
+		FROM `tabClient Financial Event` fe
+		LEFT JOIN `tabSales Invoice` si
+			ON fe.reference_doctype = 'Sales Invoice' AND si.name = fe.reference_name
+		WHERE {' AND '.join(conditions)}
+		ORDER BY fe.event_date DESC, fe.event_type DESC, fe.reference_name DESC
+		LIMIT %(page_length)s
+	""", values, as_dict=True)
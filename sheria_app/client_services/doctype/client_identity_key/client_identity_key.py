@@ -0,0 +1,383 @@
+# Client Identity Key
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Identity index over Clients and Legal CRM Leads.
+
+Each record is stored under its normalized identifiers: lower-cased email,
+E.164 phone, KRA PIN, ID/passport number and a phonetic name key. Exact lookups
+are a single indexed query on (key_type, key_value). Records that share only
+the name key are returned as fuzzy candidates.
+"""
+
+import re
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import now
+
+DEFAULT_COUNTRY_CODE = "254"
+DUPLICATE_CLUSTERS_CACHE_KEY = "sheria_client_duplicate_clusters"
+REBUILD_CHUNK_SIZE = 2000
+
+EXACT_KEY_TYPES = ("Email", "Phone", "KRA PIN", "ID Number")
+FUZZY_KEY_TYPES = ("Name Key",)
+
+# Ranking weight of a match on each key type
+KEY_WEIGHTS = {
+	"KRA PIN": 1.0,
+	"ID Number": 1.0,
+	"Email": 0.9,
+	"Phone": 0.8,
+	"Name Key": 0.3
+}
+
+# Indexed doctype -> key type -> source fields
+IDENTITY_SOURCES = {
+	"Client": {
+		"Email": ["email", "email_address"],
+		"Phone": ["phone", "phone_number"],
+		"KRA PIN": ["kra_pin"],
+		"ID Number": ["id_number", "id_passport_number"],
+		"Name Key": ["client_name"]
+	},
+	"Legal CRM Lead": {
+		"Email": ["email"],
+		"Phone": ["phone", "mobile_no"],
+		"KRA PIN": ["kra_pin"],
+		"ID Number": ["id_passport_number"],
+		"Name Key": ["lead_name"]
+	}
+}
+
+SOUNDEX_CODES = {
+	letter: digit
+	for digit, letters in {"1": "BFPV", "2": "CGJKQSXZ", "3": "DT", "4": "L", "5": "MN", "6": "R"}.items()
+	for letter in letters
+}
+
+
+class ClientIdentityKey(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Client Identity Key", ["key_type", "key_value"])
+	frappe.db.add_index("Client Identity Key", ["reference_doctype", "reference_name"])
+
+
+def normalize_email(value):
+	value = value.strip().lower()
+	return value if "@" in value else None
+
+
+def normalize_phone(value):
+	"""E.164 form of a phone number, reading local numbers as Kenyan"""
+	digits = re.sub(r"\D", "", value)
+	if not value.strip().startswith("+"):
+		if digits.startswith("00"):
+			digits = digits[2:]
+		elif digits.startswith("0"):
+			digits = DEFAULT_COUNTRY_CODE + digits[1:]
+		elif len(digits) == 9:
+			digits = DEFAULT_COUNTRY_CODE + digits
+
+	return f"+{digits}" if len(digits) >= 8 else None
+
+
+def normalize_identifier(value):
+	return re.sub(r"[^A-Z0-9]", "", value.upper()) or None
+
+
+def soundex(word):
+	"""American Soundex code of a word, e.g. Robert -> R163"""
+	word = re.sub(r"[^A-Z]", "", word.upper())
+	if not word:
+		return ""
+
+	code = word[0]
+	last = SOUNDEX_CODES.get(word[0])
+	for letter in word[1:]:
+		digit = SOUNDEX_CODES.get(letter)
+		if digit and digit != last:
+			code += digit
+		if letter not in "HW":
+			last = digit
+
+	return (code + "000")[:4]
+
+
+def get_name_key(value):
+	"""Order-independent phonetic key of a person or company name"""
+	codes = sorted(filter(None, (soundex(token) for token in value.split())))
+	return " ".join(codes) or None
+
+
+NORMALIZERS = {
+	"Email": normalize_email,
+	"Phone": normalize_phone,
+	"KRA PIN": normalize_identifier,
+	"ID Number": normalize_identifier,
+	"Name Key": get_name_key
+}
+
+
+def get_identity_keys(values):
+	"""{(key_type, normalized value)} from a {key_type: raw value or list of values} map"""
+	keys = set()
+	for key_type, raw_values in values.items():
+		if not isinstance(raw_values, (list, tuple)):
+			raw_values = [raw_values]
+
+		for raw in raw_values:
+			value = NORMALIZERS[key_type](str(raw)) if raw else None
+			if value:
+				keys.add((key_type, value[:140]))
+
+	return keys
+
+
+def get_record_values(doctype, record):
+	"""{key_type: [raw values]} of a Client or Lead document or row"""
+	return {
+		key_type: [record.get(field) for field in fields]
+		for key_type, fields in IDENTITY_SOURCES[doctype].items()
+	}
+
+
+def get_display_name(doctype, record):
+	return record.get(IDENTITY_SOURCES[doctype]["Name Key"][0]) or record.get("name")
+
+
+def update_identity_index(doc, method=None):
+	"""doc_events handler: re-index a saved Client or Legal CRM Lead"""
+	write_identity_keys(doc.doctype, [doc])
+
+
+def remove_from_identity_index(doc, method=None):
+	"""doc_events handler: drop a deleted record from the index"""
+	frappe.db.delete("Client Identity Key", {"reference_doctype": doc.doctype, "reference_name": doc.name})
+
+
+def write_identity_keys(doctype, records):
+	"""Replace the index rows of `records` (documents or dicts with name and source fields) in bulk"""
+	if not records:
+		return
+
+	frappe.db.delete("Client Identity Key", {
+		"reference_doctype": doctype,
+		"reference_name": ["in", [record.get("name") for record in records]]
+	})
+
+	timestamp = now()
+	user = frappe.session.user
+	fields = ["name", "key_type", "key_value", "reference_doctype", "reference_name", "display_name",
+		"creation", "modified", "owner", "modified_by"]
+	values = [
+		(frappe.generate_hash(length=10), key_type, key_value, doctype, record.get("name"),
+			get_display_name(doctype, record), timestamp, timestamp, user, user)
+		for record in records
+		for key_type, key_value in get_identity_keys(get_record_values(doctype, record))
+	]
+
+	if values:
+		frappe.db.bulk_insert("Client Identity Key", fields, values)
+
+
+def find_identity_matches(values, doctypes=None, exclude=None, key_types=EXACT_KEY_TYPES):
+	"""{(doctype, name): {"display_name", "matched_on"}} of indexed records sharing a key with `values`
+
+	`exclude` is a (doctype, name) pair left out of the result, e.g. the record being saved.
+	"""
+	keys = [key for key in get_identity_keys(values) if key[0] in key_types]
+	if not keys:
+		return {}
+
+	conditions = " OR ".join(["(key_type = %s AND key_value = %s)"] * len(keys))
+	params = [value for key in keys for value in key]
+
+	if doctypes:
+		conditions = f"({conditions}) AND reference_doctype IN %s"
+		params.append(tuple(doctypes))
+
+	matches = {}
+	for row in frappe.db.sql(f"""
+		SELECT reference_doctype, reference_name, display_name, key_type
+		FROM `tabClient Identity Key`
+		WHERE {conditions}
+	""", params, as_dict=True):
+		record = (row.reference_doctype, row.reference_name)
+		if record == exclude:
+			continue
+
+		match = matches.setdefault(record, {"display_name": row.display_name, "matched_on": []})
+		match["matched_on"].append(row.key_type)
+
+	return matches
+
+
+def find_client_by_identity(values):
+	"""Name of the Client sharing an exact identifier with `values`, strongest match first"""
+	matches = find_identity_matches(values, doctypes=["Client"])
+	if not matches:
+		return None
+
+	return max(matches.items(), key=lambda item: get_match_score(item[1]["matched_on"]))[0][1]
+
+
+def get_match_score(matched_on):
+	return round(sum(KEY_WEIGHTS[key_type] for key_type in set(matched_on)), 2)
+
+
+@frappe.whitelist()
+def find_client_matches(email=None, phone=None, kra_pin=None, id_number=None, name=None):
+	"""Clients and leads matching the given details, ranked; name-only matches are fuzzy candidates"""
+	if not frappe.has_permission("Client Identity Key", "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	values = {"Email": email, "Phone": phone, "KRA PIN": kra_pin, "ID Number": id_number, "Name Key": name}
+	matches = find_identity_matches(values, key_types=EXACT_KEY_TYPES + FUZZY_KEY_TYPES)
+
+	results = [
+		{
+			"reference_doctype": doctype,
+			"reference_name": docname,
+			"display_name": match["display_name"],
+			"matched_on": sorted(set(match["matched_on"])),
+			"score": get_match_score(match["matched_on"]),
+			"exact": any(key_type in EXACT_KEY_TYPES for key_type in match["matched_on"])
+		}
+		for (doctype, docname), match in matches.items()
+	]
+
+	return sorted(results, key=lambda result: -result["score"])
+
+
+def rebuild_identity_index():
+	"""Re-index every Client and Legal CRM Lead in keyset chunks"""
+	frappe.db.delete("Client Identity Key")
+
+	for doctype in IDENTITY_SOURCES:
+		if not frappe.db.table_exists(doctype):
+			continue
+
+		meta = frappe.get_meta(doctype)
+		fields = ["name"] + [
+			field
+			for source_fields in IDENTITY_SOURCES[doctype].values()
+			for field in source_fields
+			if meta.has_field(field)
+		]
+
+		last_name = ""
+		while True:
+			records = frappe.get_all(doctype,
+				filters={"name": [">", last_name]},
+				fields=fields,
+				order_by="name",
+				limit_page_length=REBUILD_CHUNK_SIZE
+			)
+			if not records:
+				break
+
+			write_identity_keys(doctype, records)
+			frappe.db.commit()
+			last_name = records[-1].name
+
+
+def enqueue_duplicate_clustering():
+	frappe.enqueue(
+		"sheria_app.client_services.doctype.client_identity_key.client_identity_key.cluster_duplicate_clients",
+		queue="long",
+		job_id="sheria_client_duplicate_clusters",
+		deduplicate=True
+	)
+
+
+def cluster_duplicate_clients():
+	"""Group indexed records into duplicate clusters for review
+
+	Records sharing an exact identifier are linked transitively into "Likely"
+	clusters. Records that share only a name key become "Possible" clusters.
+	"""
+	rows = frappe.db.sql("""
+		SELECT k.key_type, k.key_value, k.reference_doctype, k.reference_name, k.display_name
+		FROM `tabClient Identity Key` k
+		JOIN (
+			SELECT key_type, key_value
+			FROM `tabClient Identity Key`
+			GROUP BY key_type, key_value
+			HAVING COUNT(*) > 1
+		) shared ON shared.key_type = k.key_type AND shared.key_value = k.key_value
+	""", as_dict=True)
+
+	groups = {}
+	display_names = {}
+	for row in rows:
+		record = (row.reference_doctype, row.reference_name)
+		groups.setdefault((row.key_type, row.key_value), set()).add(record)
+		display_names[record] = row.display_name
+
+	# Union-find over records linked by a shared exact identifier
+	parents = {}
+
+	def find(record):
+		parents.setdefault(record, record)
+		while parents[record] != record:
+			parents[record] = parents[parents[record]]
+			record = parents[record]
+		return record
+
+	exact_groups = {key: records for key, records in groups.items() if key[0] in EXACT_KEY_TYPES}
+	for records in exact_groups.values():
+		first, *rest = records
+		for record in rest:
+			parents[find(record)] = find(first)
+
+	members = {}
+	for records in exact_groups.values():
+		for record in records:
+			members.setdefault(find(record), set()).add(record)
+
+	matched_on = {}
+	for (key_type, _value), records in exact_groups.items():
+		matched_on.setdefault(find(next(iter(records))), set()).add(key_type)
+
+	clusters = [
+		get_cluster("Likely", records, matched_on[root], display_names)
+		for root, records in members.items()
+	]
+
+	for (key_type, _value), records in groups.items():
+		# Name-only groups, unless an exact cluster already holds all of them
+		if key_type in FUZZY_KEY_TYPES and len({find(record) for record in records}) > 1:
+			clusters.append(get_cluster("Possible", records, {key_type}, display_names))
+
+	result = {"generated_on": now(), "clusters": clusters}
+	frappe.cache().set_value(DUPLICATE_CLUSTERS_CACHE_KEY, result)
+	return result
+
+
+def get_cluster(confidence, records, matched_on, display_names):
+	return {
+		"confidence": confidence,
+		"matched_on": sorted(matched_on),
+		"records": [
+			{"reference_doctype": doctype, "reference_name": name, "display_name": display_names.get((doctype, name))}
+			for doctype, name in sorted(records)
+		]
+	}
+
+
+@frappe.whitelist()
+def get_duplicate_clusters(refresh=False):
+	"""Latest duplicate clusters; refresh queues a new clustering run"""
+	if not frappe.has_permission("Client Identity Key", "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	if frappe.parse_json(refresh):
+		enqueue_duplicate_clustering()
+
+	return frappe.cache().get_value(DUPLICATE_CLUSTERS_CACHE_KEY) or {"generated_on": None, "clusters": []}
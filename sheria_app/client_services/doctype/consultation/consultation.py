@@ -0,0 +1,16 @@
+# Consultation DocType
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class Consultation(Document):
+	"""Slots are reserved by the web_forms.validate_consultation_booking hook
+	and released by consultation_slot.release_consultation_slots"""
+
+	def on_submit(self):
+		self.db_set("status", "Scheduled")
+
+	def on_cancel(self):
+		self.db_set("status", "Cancelled")
@@ -0,0 +1,98 @@
+# Tests for locked trust postings
+# Run with: bench --site <site> run-tests --doctype "Trust Account Balance"
+
+import threading
+import time
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from sheria_app.client_services.doctype.trust_account_balance.trust_account_balance import (
+    get_trust_balance,
+    post_trust_movement,
+)
+
+TEST_CLIENT = "_Test Trust Client"
+OPENING_BALANCE = 1000
+WITHDRAWAL_AMOUNT = 10
+WORKERS = 8
+WITHDRAWALS_PER_WORKER = 25
+
+
+class TestTrustAccountBalance(FrappeTestCase):
+    """Trust postings must serialise per client and never overdraw"""
+
+    def setUp(self):
+        self.reset_balance()
+
+    def tearDown(self):
+        frappe.db.delete("Trust Account Balance", {"client": TEST_CLIENT})
+        frappe.db.commit()
+
+    def reset_balance(self):
+        # Committed, because the concurrent workers read through their own connections
+        frappe.db.delete("Trust Account Balance", {"client": TEST_CLIENT})
+        frappe.db.sql("""
+            INSERT INTO `tabTrust Account Balance`
+                (name, client, balance, creation, modified, owner, modified_by, docstatus)
+            VALUES (%s, %s, %s, NOW(), NOW(), 'Administrator', 'Administrator', 0)
+        """, (TEST_CLIENT, TEST_CLIENT, OPENING_BALANCE))
+        frappe.db.commit()
+
+    def test_posting_returns_balances(self):
+        """A posting reports the balance before and after the change"""
+        before, after = post_trust_movement(TEST_CLIENT, -250)
+        self.assertEqual(before, OPENING_BALANCE)
+        self.assertEqual(after, OPENING_BALANCE - 250)
+        self.assertEqual(get_trust_balance(TEST_CLIENT), OPENING_BALANCE - 250)
+
+    def test_overdraw_rejected(self):
+        """A withdrawal larger than the balance is rejected and changes nothing"""
+        post_trust_movement(TEST_CLIENT, -600)
+        self.assertRaises(frappe.ValidationError, post_trust_movement, TEST_CLIENT, -600)
+        self.assertEqual(get_trust_balance(TEST_CLIENT), OPENING_BALANCE - 600)
+
+    def test_concurrent_withdrawals_never_overdraw(self):
+        """Parallel withdrawals drain the account exactly to zero and no further"""
+        site = frappe.local.site
+        results = {"posted": 0, "rejected": 0, "negative": 0}
+        results_lock = threading.Lock()
+
+        def withdraw():
+            frappe.init(site=site)
+            frappe.connect()
+            try:
+                for _ in range(WITHDRAWALS_PER_WORKER):
+                    try:
+                        _, after = post_trust_movement(TEST_CLIENT, -WITHDRAWAL_AMOUNT)
+                        frappe.db.commit()
+                        outcome = "negative" if after < 0 else "posted"
+                    except frappe.ValidationError:
+                        frappe.db.rollback()
+                        outcome = "rejected"
+
+                    with results_lock:
+                        results[outcome] += 1
+            finally:
+                frappe.destroy()
+
+        workers = [threading.Thread(target=withdraw) for _ in range(WORKERS)]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+
+        attempts = WORKERS * WITHDRAWALS_PER_WORKER
+        print(
+            f"\nTrust postings: {attempts} attempts from {WORKERS} workers in {elapsed:.2f}s "
+            f"({attempts / elapsed:.0f} postings/s), "
+            f"{results['posted']} posted, {results['rejected']} rejected"
+        )
+
+        frappe.db.rollback()
+        self.assertEqual(results["negative"], 0)
+        self.assertEqual(results["posted"], OPENING_BALANCE // WITHDRAWAL_AMOUNT)
+        self.assertEqual(results["rejected"], attempts - results["posted"])
+        self.assertEqual(get_trust_balance(TEST_CLIENT), 0)
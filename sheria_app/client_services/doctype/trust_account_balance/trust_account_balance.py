@@ -0,0 +1,112 @@
+# Trust Account Balance
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt
+
+LEDGER_BALANCE_SQL = """
+	SELECT COALESCE(SUM(
+		CASE
+			WHEN transaction_type IN ('Withdrawal', 'Payment') THEN -amount
+			WHEN transaction_type IN ('Deposit', 'Adjustment') THEN amount
+			ELSE 0
+		END
+	), 0)
+	FROM `tabTrust Account Transaction`
+	WHERE client = %(client)s
+		AND docstatus = 1
+"""
+
+
+class TrustAccountBalance(Document):
+	pass
+
+
+def lock_trust_balance(client):
+	"""Lock the client's balance row until the current transaction ends and return the balance
+
+	Every trust posting for a client goes through this row, so concurrent
+	postings for the same client run one after another while different
+	clients never block each other.
+	"""
+	balance = select_balance_for_update(client)
+
+	if not balance:
+		# Seed a missing row from the ledger; IGNORE keeps concurrent seeds safe
+		frappe.db.sql(f"""
+			INSERT IGNORE INTO `tabTrust Account Balance`
+				(name, client, balance, creation, modified, owner, modified_by, docstatus)
+			SELECT %(client)s, %(client)s, ({LEDGER_BALANCE_SQL}), NOW(), NOW(), %(user)s, %(user)s, 0
+		""", {"client": client, "user": frappe.session.user})
+		balance = select_balance_for_update(client)
+
+	return flt(balance[0][0]) if balance else 0
+
+
+def select_balance_for_update(client):
+	return frappe.db.sql("""
+		SELECT balance
+		FROM `tabTrust Account Balance`
+		WHERE name = %s
+		FOR UPDATE
+	""", (client,))
+
+
+def post_trust_movement(client, balance_change, transaction=None):
+	"""Apply a balance change under the client's row lock
+
+	Returns (balance_before, balance_after). Throws if the posting would take
+	the account below zero, leaving the balance untouched.
+	"""
+	balance_before = lock_trust_balance(client)
+	balance_after = flt(balance_before + flt(balance_change), 2)
+
+	if balance_after < 0:
+		frappe.throw(_("Insufficient trust account balance. Available: {0}").format(
+			frappe.utils.fmt_money(balance_before, currency=frappe.defaults.get_global_default("currency"))
+		))
+
+	frappe.db.sql("""
+		UPDATE `tabTrust Account Balance`
+		SET balance = %s, last_transaction = %s, modified = NOW()
+		WHERE name = %s
+	""", (balance_after, transaction, client))
+
+	# Keep the denormalised copy on Client in step while the lock is held
+	if frappe.db.table_exists("Client") and frappe.db.has_column("Client", "trust_balance"):
+		frappe.db.set_value("Client", client, "trust_balance", balance_after, update_modified=False)
+
+	return balance_before, balance_after
+
+
+def get_trust_balance(client):
+	"""Current trust balance without taking a lock"""
+	balance = frappe.db.get_value("Trust Account Balance", client, "balance")
+	if balance is None:
+		balance = frappe.db.sql(LEDGER_BALANCE_SQL, {"client": client})[0][0]
+
+	return flt(balance)
+
+
+def rebuild_trust_balances():
+	"""Recompute every client's balance row from the submitted ledger"""
+	frappe.db.delete("Trust Account Balance")
+	frappe.db.sql("""
+		INSERT INTO `tabTrust Account Balance`
+			(name, client, balance, creation, modified, owner, modified_by, docstatus)
+		SELECT
+			client, client,
+			SUM(CASE
+				WHEN transaction_type IN ('Withdrawal', 'Payment') THEN -amount
+				WHEN transaction_type IN ('Deposit', 'Adjustment') THEN amount
+				ELSE 0
+			END),
+			NOW(), NOW(), 'Administrator', 'Administrator', 0
+		FROM `tabTrust Account Transaction`
+		WHERE docstatus = 1
+			AND client IS NOT NULL
+		GROUP BY client
+	""")
@@ -7,6 +7,16 @@ from frappe import _
 from frappe.utils import getdate, now
 from frappe.model.document import Document
 
+from sheria_app.client_services.doctype.client_financial_event.client_financial_event import (
+	post_financial_event,
+	remove_financial_event,
+)
+from sheria_app.client_services.doctype.trust_account_balance.trust_account_balance import (
+	get_trust_balance,
+	post_trust_movement,
+)
+from sheria_app.crm_extensions.doctype.deal_trust_movement.deal_trust_movement import sync_trust_movement
+
 class TrustAccountTransaction(Document):
 	def autoname(self):
 		"""Generate transaction ID"""
@@ -45,10 +55,14 @@ class TrustAccountTransaction(Document):
 	def on_submit(self):
 		"""Update client trust balance on submission"""
 		self.update_client_balance()
+		post_financial_event(self)
+		sync_trust_movement(self)
 
 	def on_cancel(self):
 		"""Update client trust balance on cancellation"""
 		self.update_client_balance(reverse=True)
+		remove_financial_event(self)
+		sync_trust_movement(self, cancelled=True)
 
 	def validate_amount(self):
 		"""Validate transaction amount"""
@@ -77,33 +91,31 @@ class TrustAccountTransaction(Document):
 		self.balance_before = self.get_client_balance()
 
 	def update_client_balance(self, reverse=False):
-		"""Update client's trust account balance"""
-		try:
-			# Calculate balance change
-			multiplier = -1 if reverse else 1
-
-			if self.transaction_type == "Deposit":
-				balance_change = self.amount * multiplier
-			elif self.transaction_type in ["Withdrawal", "Payment"]:
-				balance_change = -self.amount * multiplier
-			elif self.transaction_type == "Adjustment":
-				# For adjustments, amount can be positive or negative
-				balance_change = self.amount * multiplier
-			else:
-				return
-
-			# Update balance after
-			self.balance_after = self.balance_before + balance_change
+		"""Post the balance change under the client's trust balance row lock"""
+		# Calculate balance change
+		multiplier = -1 if reverse else 1
+
+		if self.transaction_type == "Deposit":
+			balance_change = self.amount * multiplier
+		elif self.transaction_type in ["Withdrawal", "Payment"]:
+			balance_change = -self.amount * multiplier
+		elif self.transaction_type == "Adjustment":
+			# For adjustments, amount can be positive or negative
+			balance_change = self.amount * multiplier
+		else:
+			return
 
-			# Update client's trust balance
-			current_balance = frappe.db.get_value("Client", self.client, "trust_balance") or 0
-			new_balance = current_balance + balance_change
+		try:
+			balance_before, new_balance = post_trust_movement(self.client, balance_change, self.name)
 
-			frappe.db.set_value("Client", self.client, "trust_balance", new_balance)
+			if not reverse:
+				self.db_set({"balance_before": balance_before, "balance_after": new_balance})
 
 			# Create ledger entry for audit trail
 			self.create_ledger_entry(balance_change, new_balance)
 
+		except frappe.ValidationError:
+			raise
 		except Exception as e:
 			frappe.log_error(f"Error updating client balance: {str(e)}")
 			frappe.throw(_("Failed to update client trust balance"))
@@ -111,23 +123,7 @@ class TrustAccountTransaction(Document):
 	def get_client_balance(self):
 		"""Get current client trust balance"""
 		try:
-			balance = frappe.db.sql("""
-				SELECT
-					COALESCE(SUM(
-						CASE
-							WHEN transaction_type = 'Deposit' THEN amount
-							WHEN transaction_type IN ('Withdrawal', 'Payment') THEN -amount
-							WHEN transaction_type = 'Adjustment' THEN amount
-							ELSE 0
-						END
-					), 0) as balance
-				FROM `tabTrust Account Transaction`
-				WHERE client = %s
-					AND docstatus = 1
-					AND name != %s
-			""", (self.client, self.name), as_dict=True)
-
-			return balance[0].balance if balance else 0
+			return get_trust_balance(self.client)
 
 		except Exception as e:
 			frappe.log_error(f"Error getting client balance: {str(e)}")
@@ -153,6 +149,9 @@ class TrustAccountTransaction(Document):
 		except Exception as e:
 			frappe.log_error(f"Error creating ledger entry: {str(e)}")
 
+def on_doctype_update():
+	frappe.db.add_index("Trust Account Transaction", ["client", "transaction_date"])
+
 @frappe.whitelist()
 def get_client_trust_statement(client, from_date=None, to_date=None):
 	"""Get client's trust account statement"""
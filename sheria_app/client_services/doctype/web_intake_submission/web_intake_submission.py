@@ -0,0 +1,165 @@
+# Web Intake Submission
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+import json
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_to_date, now
+
+# Intake type -> handler(payload, context) returning (reference_doctype, reference_name),
+# and an optional after_batch(context) run once per processed batch
+INTAKE_TYPES = {
+	"Service Booking": {
+		"handler": "sheria_app.api.process_service_booking"
+	},
+	"Contact": {
+		"handler": "sheria_app.api.process_contact",
+		"after_batch": "sheria_app.api.send_contact_emails"
+	},
+	"Service Request": {
+		"handler": "sheria_app.web_pages.process_service_request",
+		"after_batch": "sheria_app.web_pages.send_service_request_notifications"
+	}
+}
+
+INTAKE_BATCH_SIZE = 100
+STALE_PROCESSING_MINUTES = 30
+
+
+class WebIntakeSubmission(Document):
+	pass
+
+
+def queue_intake(intake_type, payload, email=None):
+	"""Persist a guest submission and schedule its processing
+
+	Returns the intake id the portal polls with get_intake_status.
+	"""
+	intake = frappe.get_doc({
+		"doctype": "Web Intake Submission",
+		"intake_type": intake_type,
+		"status": "Queued",
+		"email": email,
+		"payload": json.dumps(payload, default=str)
+	})
+	intake.insert(ignore_permissions=True)
+
+	enqueue_intake_processing()
+
+	return intake.name
+
+
+def enqueue_intake_processing():
+	frappe.enqueue(
+		"sheria_app.client_services.doctype.web_intake_submission.web_intake_submission.process_intake_queue",
+		queue="short",
+		job_id="web_intake_queue",
+		deduplicate=True,
+		enqueue_after_commit=True
+	)
+
+
+def claim_intake_batch(batch_size=INTAKE_BATCH_SIZE):
+	"""Mark the oldest queued submissions as Processing and return them
+
+	SKIP LOCKED lets several workers drain the queue without taking the same rows.
+	"""
+	names = frappe.db.sql_list("""
+		SELECT name
+		FROM `tabWeb Intake Submission`
+		WHERE status = 'Queued'
+		ORDER BY creation
+		LIMIT %s
+		FOR UPDATE SKIP LOCKED
+	""", (batch_size,))
+
+	if not names:
+		return []
+
+	frappe.db.sql("""
+		UPDATE `tabWeb Intake Submission`
+		SET status = 'Processing', modified = %(now)s
+		WHERE name IN %(names)s
+	""", {"now": now(), "names": tuple(names)})
+	frappe.db.commit()
+
+	return frappe.get_all("Web Intake Submission",
+		filters={"name": ["in", names]},
+		fields=["name", "intake_type", "payload"],
+		order_by="creation"
+	)
+
+
+def process_intake_queue(batch_size=INTAKE_BATCH_SIZE):
+	"""Drain the intake queue batch by batch
+
+	Each submission runs under its own savepoint; handlers share a per-batch
+	context so clients and services are looked up once per batch, and batch
+	notifications go out after the batch commits.
+	"""
+	while True:
+		batch = claim_intake_batch(batch_size)
+		if not batch:
+			break
+
+		context = frappe._dict()
+		for intake in batch:
+			frappe.db.savepoint("web_intake")
+			try:
+				handler = frappe.get_attr(INTAKE_TYPES[intake.intake_type]["handler"])
+				reference_doctype, reference_name = handler(json.loads(intake.payload), context)
+				values = {
+					"status": "Completed",
+					"reference_doctype": reference_doctype,
+					"reference_name": reference_name,
+					"error": None
+				}
+			except Exception as e:
+				frappe.db.rollback(save_point="web_intake")
+				frappe.log_error(f"Error processing web intake {intake.name}: {str(e)}")
+				values = {"status": "Failed", "error": str(e)}
+
+			values["processed_at"] = now()
+			frappe.db.set_value("Web Intake Submission", intake.name, values, update_modified=False)
+
+		frappe.db.commit()
+
+		for intake_type in {intake.intake_type for intake in batch}:
+			after_batch = INTAKE_TYPES[intake_type].get("after_batch")
+			if after_batch:
+				frappe.get_attr(after_batch)(context)
+
+		frappe.db.commit()
+
+
+def requeue_stale_intakes():
+	"""Scheduler safety net: retry submissions left Processing by a lost worker and drain the queue"""
+	frappe.db.sql("""
+		UPDATE `tabWeb Intake Submission`
+		SET status = 'Queued'
+		WHERE status = 'Processing'
+			AND modified < %s
+	""", (add_to_date(now(), minutes=-STALE_PROCESSING_MINUTES),))
+
+	if frappe.db.exists("Web Intake Submission", {"status": "Queued"}):
+		enqueue_intake_processing()
+
+
+@frappe.whitelist(allow_guest=True)
+def get_intake_status(intake_id):
+	"""Outcome of a queued web submission"""
+	intake = frappe.db.get_value("Web Intake Submission", intake_id,
+		["status", "reference_doctype", "reference_name"], as_dict=True)
+
+	if not intake:
+		frappe.throw(_("Submission not found"), frappe.DoesNotExistError)
+
+	return {
+		"intake_id": intake_id,
+		"status": intake.status,
+		"reference_doctype": intake.reference_doctype if intake.status == "Completed" else None,
+		"reference_name": intake.reference_name if intake.status == "Completed" else None
+	}
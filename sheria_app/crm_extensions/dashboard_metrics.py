@@ -0,0 +1,221 @@
+# Legal CRM Dashboard Metrics
+# Copyright (c) 2025, Coale Tech and contributors
+# For license information, please see license.txt
+
+"""
+Declarative KPI definitions for the Legal CRM dashboards.
+
+A metric is (table, aggregate, condition). compute_metrics groups every
+requested metric by table and evaluates each group as conditional aggregates
+in a single statement, so adding a KPI adds a column, not a table scan.
+"""
+
+import frappe
+from frappe import _
+
+CRM_METRICS = {
+	"total_leads": {
+		"table": "Legal CRM Lead",
+		"aggregate": "COUNT"
+	},
+	"qualified_leads": {
+		"table": "Legal CRM Lead",
+		"aggregate": "COUNT",
+		"condition": "status = 'Qualified'"
+	},
+	"converted_leads": {
+		"table": "Legal CRM Lead",
+		"aggregate": "COUNT",
+		"condition": "converted = 1"
+	},
+	"total_deals": {
+		"table": "Legal CRM Deal",
+		"aggregate": "COUNT"
+	},
+	"won_deals": {
+		"table": "Legal CRM Deal",
+		"aggregate": "COUNT",
+		"condition": "status = 'Won'"
+	},
+	"pipeline_value": {
+		"table": "Legal CRM Deal",
+		"aggregate": "SUM",
+		"field": "expected_deal_value",
+		"condition": "status IN ('Proposal', 'Negotiation')"
+	},
+	"won_value": {
+		"table": "Legal CRM Deal",
+		"aggregate": "SUM",
+		"field": "deal_value",
+		"condition": "status = 'Won'"
+	},
+	"average_deal_value": {
+		"table": "Legal CRM Deal",
+		"aggregate": "AVG",
+		"field": "expected_deal_value"
+	}
+}
+
+# Dimension name -> column in each table
+CRM_DIMENSIONS = {
+	"practice_area": {
+		"Legal CRM Lead": "practice_area",
+		"Legal CRM Deal": "practice_area"
+	},
+	"lawyer": {
+		"Legal CRM Lead": "lead_owner",
+		"Legal CRM Deal": "deal_owner"
+	},
+	"client_type": {
+		"Legal CRM Lead": "client_type",
+		"Legal CRM Deal": "client_type"
+	},
+	"status": {
+		"Legal CRM Lead": "status",
+		"Legal CRM Deal": "status"
+	}
+}
+
+AGGREGATES = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+
+def get_metric_expression(metric):
+	"""Conditional aggregate SQL for a metric definition"""
+	aggregate = metric["aggregate"].upper()
+	if aggregate not in AGGREGATES:
+		frappe.throw(_("Unsupported aggregate {0}").format(aggregate))
+
+	condition = metric.get("condition")
+
+	if aggregate == "COUNT":
+		return f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)" if condition else "COUNT(*)"
+
+	field = f"`{metric['field']}`"
+	if condition:
+		field = f"CASE WHEN {condition} THEN {field} END"
+
+	return f"{aggregate}({field})"
+
+
+def get_table_statement(table, metrics, filters, start_date, end_date, group_by):
+	"""One SELECT over `table` computing every metric in `metrics`
+
+	Returns (sql, params). Dimension columns are aliased to their dimension
+	names so results from different tables line up.
+	"""
+	params = {}
+	conditions = []
+	date_field = metrics[0][1].get("date_field", "creation")
+
+	if start_date:
+		conditions.append(f"`{date_field}` >= %(start_date)s")
+		params["start_date"] = start_date
+	if end_date:
+		conditions.append(f"`{date_field}` <= %(end_date)s")
+		params["end_date"] = end_date
+
+	for dimension, value in (filters or {}).items():
+		if value:
+			conditions.append(f"`{CRM_DIMENSIONS[dimension][table]}` = %({dimension})s")
+			params[dimension] = value
+
+	columns = [f"`{CRM_DIMENSIONS[dimension][table]}` as `{dimension}`" for dimension in group_by]
+	columns += [f"{get_metric_expression(metric)} as `{name}`" for name, metric in metrics]
+
+	sql = f"SELECT {', '.join(columns)} FROM `tab{table}`"
+	if conditions:
+		sql += f" WHERE {' AND '.join(conditions)}"
+	if group_by:
+		sql += f" GROUP BY {', '.join(f'`{dimension}`' for dimension in group_by)}"
+
+	return sql, params
+
+
+def compute_metrics(metric_names=None, filters=None, start_date=None, end_date=None, group_by=None,
+	definitions=None):
+	"""Evaluate metrics with one statement per table
+
+	filters maps dimension names to values, group_by is a list of dimension
+	names. Without group_by the result is {metric: value} from a single
+	statement; with group_by it is a list of rows, one per dimension tuple.
+	"""
+	definitions = definitions or CRM_METRICS
+	metric_names = metric_names or list(definitions)
+	group_by = group_by or []
+
+	for dimension in list(filters or {}) + group_by:
+		if dimension not in CRM_DIMENSIONS:
+			frappe.throw(_("Unknown dimension {0}").format(dimension))
+
+	by_table = {}
+	for name in metric_names:
+		if name not in definitions:
+			frappe.throw(_("Unknown metric {0}").format(name))
+		by_table.setdefault(definitions[name]["table"], []).append((name, definitions[name]))
+
+	statements = {
+		table: get_table_statement(table, metrics, filters, start_date, end_date, group_by)
+		for table, metrics in by_table.items()
+	}
+
+	if not group_by:
+		# Scalar aggregates from every table combine into one row
+		params = {}
+		subqueries = []
+		for idx, (sql, table_params) in enumerate(statements.values()):
+			subqueries.append(f"({sql}) t{idx}")
+			params.update(table_params)
+
+		row = frappe.db.sql(f"SELECT * FROM {' CROSS JOIN '.join(subqueries)}", params, as_dict=True)[0]
+		return {name: row.get(name) or 0 for name in metric_names}
+
+	rows = {}
+	for sql, params in statements.values():
+		for row in frappe.db.sql(sql, params, as_dict=True):
+			key = tuple(row[dimension] for dimension in group_by)
+			rows.setdefault(key, {dimension: row[dimension] for dimension in group_by}).update(row)
+
+	for row in rows.values():
+		for name in metric_names:
+			row[name] = row.get(name) or 0
+
+	return list(rows.values())
+
+
+def parse_name_list(value):
+	"""A JSON list, a JSON string or plain comma-separated names as a list of names"""
+	if not value:
+		return []
+
+	if isinstance(value, str):
+		try:
+			value = frappe.parse_json(value)
+		except ValueError:
+			value = [name.strip() for name in value.split(",") if name.strip()]
+
+	return [value] if isinstance(value, str) else list(value)
+
+
+@frappe.whitelist()
+def get_metric_breakdown(metrics=None, group_by=None, date_range=None, practice_area=None, lawyer=None,
+	client_type=None):
+	"""Get CRM metrics broken down by practice area, lawyer, client type or status"""
+	from sheria_app.crm_extensions.doctype.legal_crm_dashboard.legal_crm_dashboard import (
+		get_date_range_bucket,
+	)
+
+	if not frappe.has_permission("Legal CRM Dashboard", "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	metrics = parse_name_list(metrics) or None
+	group_by = parse_name_list(group_by)
+
+	bucket = get_date_range_bucket(date_range) if date_range else {"start_date": None, "end_date": None}
+
+	return compute_metrics(
+		metrics,
+		filters={"practice_area": practice_area, "lawyer": lawyer, "client_type": client_type},
+		start_date=bucket["start_date"],
+		end_date=bucket["end_date"],
+		group_by=group_by
+	)
@@ -0,0 +1,135 @@
+# Copyright (c) 2025, Coale Tech and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+from sheria_app.client_services.doctype.trust_account_balance.trust_account_balance import get_trust_balance
+
+# Recent movements kept on the deal form; older ones load through get_deal_trust_movements
+TRUST_MOVEMENTS_LIMIT = 50
+
+class DealTrustMovement(Document):
+	pass
+
+
+def get_kra_pin_clients(kra_pin):
+	"""Clients registered under a KRA PIN"""
+	if not kra_pin or not frappe.db.table_exists("Client"):
+		return []
+
+	return frappe.get_all("Client", filters={"kra_pin": kra_pin}, pluck="name")
+
+
+def get_kra_pin_trust_balance(clients):
+	return sum(get_trust_balance(client) for client in clients)
+
+
+def get_trust_movements(clients, after_date=None, after_name=None, page_length=20):
+	"""Submitted trust movements for clients, newest first, paged by (date, name)"""
+	if not clients:
+		return []
+
+	values = {"clients": tuple(clients), "page_length": page_length}
+	cursor_condition = ""
+
+	if after_date and after_name:
+		cursor_condition = """AND (transaction_date < %(after_date)s
+			OR (transaction_date = %(after_date)s AND name < %(after_name)s))"""
+		values.update({"after_date": after_date, "after_name": after_name})
+
+	return frappe.db.sql(f"""
+		SELECT
+			name, transaction_date, transaction_type, amount,
+			balance_after, description, reference
+		FROM `tabTrust Account Transaction`
+		WHERE client IN %(clients)s
+			AND docstatus = 1
+			{cursor_condition}
+		ORDER BY transaction_date DESC, name DESC
+		LIMIT %(page_length)s
+	""", values, as_dict=True)
+
+
+def get_movement_row(movement):
+	"""Deal Trust Movement values for a trust transaction"""
+	sign = -1 if movement.transaction_type in ("Withdrawal", "Payment") else 1
+	return {
+		"transaction": movement.name,
+		"transaction_date": movement.transaction_date,
+		"transaction_type": movement.transaction_type,
+		"amount": sign * (movement.amount or 0),
+		"balance_after": movement.balance_after,
+		"description": movement.description,
+		"reference": movement.reference
+	}
+
+
+def sync_trust_movement(transaction, cancelled=False):
+	"""Apply one posted or cancelled trust transaction to the deals sharing its KRA PIN"""
+	if not frappe.db.table_exists("Client"):
+		return
+
+	kra_pin = frappe.db.get_value("Client", transaction.client, "kra_pin")
+	if not kra_pin:
+		return
+
+	deals = frappe.get_all("Legal CRM Deal", filters={"kra_pin": kra_pin}, pluck="name")
+	if not deals:
+		return
+
+	trust_balance = get_kra_pin_trust_balance(get_kra_pin_clients(kra_pin))
+
+	for deal in deals:
+		if cancelled:
+			frappe.db.delete("Deal Trust Movement", {"parent": deal, "transaction": transaction.name})
+		else:
+			frappe.get_doc(dict(get_movement_row(transaction),
+				doctype="Deal Trust Movement",
+				parent=deal,
+				parenttype="Legal CRM Deal",
+				parentfield="trust_account_transactions"
+			)).db_insert()
+
+		renumber_deal_trust_movements(deal)
+
+		# Bump modified so open forms see the child table changed
+		frappe.db.set_value("Legal CRM Deal", deal, "trust_balance", trust_balance)
+
+
+def renumber_deal_trust_movements(deal):
+	"""Order a deal's movements newest first like rebuild_deal_trust_movements and drop the oldest"""
+	frappe.db.sql("""
+		UPDATE `tabDeal Trust Movement` movement
+		JOIN (
+			SELECT name, ROW_NUMBER() OVER (ORDER BY transaction_date DESC, `transaction` DESC) AS row_idx
+			FROM `tabDeal Trust Movement`
+			WHERE parent = %(deal)s AND parenttype = 'Legal CRM Deal'
+		) ordered ON ordered.name = movement.name
+		SET movement.idx = ordered.row_idx
+	""", {"deal": deal})
+
+	frappe.db.delete("Deal Trust Movement", {
+		"parent": deal,
+		"parenttype": "Legal CRM Deal",
+		"idx": [">", TRUST_MOVEMENTS_LIMIT]
+	})
+
+
+def rebuild_deal_trust_movements():
+	"""Rebuild every deal's trust movements and balance from the ledger"""
+	for deal in frappe.get_all("Legal CRM Deal", filters={"kra_pin": ["is", "set"]}, fields=["name", "kra_pin"]):
+		clients = get_kra_pin_clients(deal.kra_pin)
+		frappe.db.delete("Deal Trust Movement", {"parent": deal.name, "parenttype": "Legal CRM Deal"})
+
+		for idx, movement in enumerate(get_trust_movements(clients, page_length=TRUST_MOVEMENTS_LIMIT), 1):
+			frappe.get_doc(dict(get_movement_row(movement),
+				doctype="Deal Trust Movement",
+				parent=deal.name,
+				parenttype="Legal CRM Deal",
+				parentfield="trust_account_transactions",
+				idx=idx
+			)).db_insert()
+
+		frappe.db.set_value("Legal CRM Deal", deal.name, "trust_balance",
+			get_kra_pin_trust_balance(clients), update_modified=False)
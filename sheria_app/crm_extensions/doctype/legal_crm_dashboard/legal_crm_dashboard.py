@@ -4,201 +4,98 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import nowdate, add_months, add_days, getdate
+from frappe.utils import nowdate, now_datetime, add_months, add_days, getdate
 import json
 
+from sheria_app.crm_extensions.dashboard_metrics import compute_metrics
+
+DASHBOARD_METRICS = ["total_leads", "qualified_leads", "total_deals", "won_deals", "pipeline_value"]
+
+SNAPSHOT_CACHE_PREFIX = "sheria_crm_dashboard"
+# Snapshots older than this are served once more while a refresh runs in the background
+SNAPSHOT_TTL = 600
+SNAPSHOT_EXPIRY = 86400
+
 class LegalCRMDashboard(Document):
 	def before_save(self):
 		"""Calculate dashboard metrics before saving"""
 		self.calculate_metrics()
 		self.generate_charts()
 
+	def on_update(self):
+		self.store_snapshot()
+
 	def calculate_metrics(self):
 		"""Calculate key legal CRM metrics"""
 		filters = self.get_date_filters()
+		metrics = self.get_metric_values(filters)
 
 		# Lead metrics
-		self.total_leads = self.get_total_leads(filters)
-		self.qualified_leads = self.get_qualified_leads(filters)
+		self.total_leads = metrics["total_leads"]
+		self.qualified_leads = metrics["qualified_leads"]
 		self.conversion_rate = (self.qualified_leads / self.total_leads * 100) if self.total_leads > 0 else 0
 
 		# Deal metrics
-		self.total_deals = self.get_total_deals(filters)
-		self.won_deals = self.get_won_deals(filters)
-		self.pipeline_value = self.get_pipeline_value(filters)
+		self.total_deals = metrics["total_deals"]
+		self.won_deals = metrics["won_deals"]
+		self.pipeline_value = metrics["pipeline_value"]
 
 	def get_date_filters(self):
 		"""Get date filters based on selected range"""
-		today = getdate(nowdate())
-
-		if self.date_range == "This Month":
-			start_date = today.replace(day=1)
-			end_date = add_months(start_date, 1) - add_days(start_date, 1)
-		elif self.date_range == "Last Month":
-			end_date = today.replace(day=1) - add_days(today.replace(day=1), 1)
-			start_date = end_date.replace(day=1)
-		elif self.date_range == "This Quarter":
-			quarter = (today.month - 1) // 3 + 1
-			start_date = getdate(f"{today.year}-{3*quarter-2}-01")
-			end_date = add_months(start_date, 3) - add_days(start_date, 1)
-		else:  # Default to last 30 days
-			start_date = add_days(today, -30)
-			end_date = today
-
+		return get_date_range_bucket(self.date_range)
+
+	def get_metric_values(self, filters):
+		"""Get lead and deal metrics in a single conditional-aggregate statement"""
+		return compute_metrics(
+			DASHBOARD_METRICS,
+			filters={
+				"practice_area": self.practice_area_filter,
+				"lawyer": self.lawyer_filter,
+				"client_type": self.client_type_filter
+			},
+			start_date=filters["start_date"],
+			end_date=filters["end_date"]
+		)
+
+	def get_snapshot_key(self):
+		"""Cache key for the current filters and date range bucket"""
+		return get_snapshot_key(
+			self.date_range, self.practice_area_filter, self.lawyer_filter, self.client_type_filter
+		)
+
+	def get_snapshot(self):
 		return {
-			"start_date": start_date,
-			"end_date": end_date
-		}
-
-	def get_total_leads(self, filters):
-		"""Get total leads count"""
-		additional_filters = {}
-		if self.practice_area_filter:
-			additional_filters["practice_area"] = self.practice_area_filter
-		if self.lawyer_filter:
-			additional_filters["lead_owner"] = self.lawyer_filter
-		if self.client_type_filter:
-			additional_filters["client_type"] = self.client_type_filter
-
-		query = """
-			SELECT COUNT(*)
-			FROM `tabLegal CRM Lead`
-			WHERE creation >= %(start_date)s AND creation <= %(end_date)s
-		"""
-		params = {
-			"start_date": filters["start_date"],
-			"end_date": filters["end_date"]
-		}
-
-		if additional_filters:
-			conditions = []
-			for field, value in additional_filters.items():
-				conditions.append(f"{field} = %({field})s")
-				params[field] = value
-			query += " AND " + " AND ".join(conditions)
-
-		result = frappe.db.sql(query, params)
-		return result[0][0] if result else 0
-
-	def get_qualified_leads(self, filters):
-		"""Get qualified leads count"""
-		additional_filters = {}
-		if self.practice_area_filter:
-			additional_filters["practice_area"] = self.practice_area_filter
-		if self.lawyer_filter:
-			additional_filters["lead_owner"] = self.lawyer_filter
-		if self.client_type_filter:
-			additional_filters["client_type"] = self.client_type_filter
-
-		query = """
-			SELECT COUNT(*)
-			FROM `tabLegal CRM Lead`
-			WHERE status = 'Qualified' AND creation >= %(start_date)s AND creation <= %(end_date)s
-		"""
-		params = {
-			"start_date": filters["start_date"],
-			"end_date": filters["end_date"]
-		}
-
-		if additional_filters:
-			conditions = []
-			for field, value in additional_filters.items():
-				conditions.append(f"{field} = %({field})s")
-				params[field] = value
-			query += " AND " + " AND ".join(conditions)
-
-		result = frappe.db.sql(query, params)
-		return result[0][0] if result else 0
-
-	def get_total_deals(self, filters):
-		"""Get total deals count"""
-		additional_filters = {}
-		if self.practice_area_filter:
-			additional_filters["practice_area"] = self.practice_area_filter
-		if self.lawyer_filter:
-			additional_filters["deal_owner"] = self.lawyer_filter
-		if self.client_type_filter:
-			additional_filters["client_type"] = self.client_type_filter
-
-		query = """
-			SELECT COUNT(*)
-			FROM `tabLegal CRM Deal`
-			WHERE creation >= %(start_date)s AND creation <= %(end_date)s
-		"""
-		params = {
-			"start_date": filters["start_date"],
-			"end_date": filters["end_date"]
-		}
-
-		if additional_filters:
-			conditions = []
-			for field, value in additional_filters.items():
-				conditions.append(f"{field} = %({field})s")
-				params[field] = value
-			query += " AND " + " AND ".join(conditions)
-
-		result = frappe.db.sql(query, params)
-		return result[0][0] if result else 0
-
-	def get_won_deals(self, filters):
-		"""Get won deals count"""
-		additional_filters = {}
-		if self.practice_area_filter:
-			additional_filters["practice_area"] = self.practice_area_filter
-		if self.lawyer_filter:
-			additional_filters["deal_owner"] = self.lawyer_filter
-		if self.client_type_filter:
-			additional_filters["client_type"] = self.client_type_filter
-
-		query = """
-			SELECT COUNT(*)
-			FROM `tabLegal CRM Deal`
-			WHERE status = 'Won' AND creation >= %(start_date)s AND creation <= %(end_date)s
-		"""
-		params = {
-			"start_date": filters["start_date"],
-			"end_date": filters["end_date"]
-		}
-
-		if additional_filters:
-			conditions = []
-			for field, value in additional_filters.items():
-				conditions.append(f"{field} = %({field})s")
-				params[field] = value
-			query += " AND " + " AND ".join(conditions)
-
-		result = frappe.db.sql(query, params)
-		return result[0][0] if result else 0
-
-	def get_pipeline_value(self, filters):
-		"""Get total pipeline value"""
-		additional_filters = {}
-		if self.practice_area_filter:
-			additional_filters["practice_area"] = self.practice_area_filter
-		if self.lawyer_filter:
-			additional_filters["deal_owner"] = self.lawyer_filter
-		if self.client_type_filter:
-			additional_filters["client_type"] = self.client_type_filter
-
-		query = """
-			SELECT SUM(expected_deal_value)
-			FROM `tabLegal CRM Deal`
-			WHERE status IN ('Proposal', 'Negotiation') AND creation >= %(start_date)s AND creation <= %(end_date)s
-		"""
-		params = {
-			"start_date": filters["start_date"],
-			"end_date": filters["end_date"]
+			"dashboard": self.name,
+			"computed_at": now_datetime().timestamp(),
+			"metrics": {
+				"total_leads": self.total_leads,
+				"qualified_leads": self.qualified_leads,
+				"conversion_rate": self.conversion_rate,
+				"total_deals": self.total_deals,
+				"won_deals": self.won_deals,
+				"pipeline_value": self.pipeline_value
+			},
+			"charts": {
+				"leads_by_practice_area": self.leads_by_practice_area,
+				"deals_by_status": self.deals_by_status,
+				"monthly_revenue": self.monthly_revenue
+			}
 		}
 
-		if additional_filters:
-			conditions = []
-			for field, value in additional_filters.items():
-				conditions.append(f"{field} = %({field})s")
-				params[field] = value
-			query += " AND " + " AND ".join(conditions)
-
-		result = frappe.db.sql(query, params)
-		return result[0][0] if result and result[0][0] else 0
+	def store_snapshot(self):
+		"""Cache the computed metrics and charts for form dashboards"""
+		cache = frappe.cache()
+		key = self.get_snapshot_key()
+		cache.set_value(key, self.get_snapshot(), expires_in_sec=SNAPSHOT_EXPIRY)
+
+		if self.is_default:
+			# Remember the default dashboard's settings so readers can build its key without a query
+			cache.set_value(f"{SNAPSHOT_CACHE_PREFIX}|default", {
+				"date_range": self.date_range,
+				"practice_area_filter": self.practice_area_filter,
+				"lawyer_filter": self.lawyer_filter,
+				"client_type_filter": self.client_type_filter
+			}, expires_in_sec=SNAPSHOT_EXPIRY)
 
 	def generate_charts(self):
 		"""Generate chart data for dashboard"""
@@ -379,36 +276,97 @@ class LegalCRMDashboard(Document):
 
 		return html
 
+def get_date_range_bucket(date_range):
+	"""Start and end dates for a dashboard date range"""
+	today = getdate(nowdate())
+
+	if date_range == "This Month":
+		start_date = today.replace(day=1)
+		end_date = add_days(add_months(start_date, 1), -1)
+	elif date_range == "Last Month":
+		end_date = add_days(today.replace(day=1), -1)
+		start_date = end_date.replace(day=1)
+	elif date_range == "This Quarter":
+		quarter = (today.month - 1) // 3 + 1
+		start_date = getdate(f"{today.year}-{3*quarter-2}-01")
+		end_date = add_days(add_months(start_date, 3), -1)
+	else:  # Default to last 30 days
+		start_date = add_days(today, -30)
+		end_date = today
+
+	return {
+		"start_date": start_date,
+		"end_date": end_date
+	}
+
+
+def get_snapshot_key(date_range, practice_area_filter=None, lawyer_filter=None, client_type_filter=None):
+	"""Snapshot cache key for (dashboard filters, date range bucket)"""
+	bucket = get_date_range_bucket(date_range)
+	key = "|".join(str(part or "") for part in (
+		date_range, practice_area_filter, lawyer_filter, client_type_filter,
+		bucket["start_date"], bucket["end_date"]
+	))
+	return f"{SNAPSHOT_CACHE_PREFIX}|{key}"
+
+
+def refresh_dashboard_snapshots():
+	"""Recompute and cache every Legal CRM Dashboard"""
+	has_default = False
+	for name in frappe.get_all("Legal CRM Dashboard", pluck="name"):
+		dashboard_doc = frappe.get_doc("Legal CRM Dashboard", name)
+		dashboard_doc.calculate_metrics()
+		dashboard_doc.generate_charts()
+		dashboard_doc.store_snapshot()
+		has_default = has_default or dashboard_doc.is_default
+
+	if not has_default:
+		# Cache that there is no default too, so form loads stop asking for refreshes
+		frappe.cache().set_value(f"{SNAPSHOT_CACHE_PREFIX}|default", {}, expires_in_sec=SNAPSHOT_EXPIRY)
+
+
+def enqueue_snapshot_refresh():
+	"""Refresh snapshots in the background, once for any burst of changes"""
+	frappe.enqueue(
+		"sheria_app.crm_extensions.doctype.legal_crm_dashboard.legal_crm_dashboard.refresh_dashboard_snapshots",
+		queue="short",
+		job_id="sheria_crm_dashboard_refresh",
+		deduplicate=True,
+		enqueue_after_commit=True
+	)
+
+
+def on_lead_or_deal_change(doc, method=None):
+	"""Lead and deal changes make the cached metrics stale"""
+	enqueue_snapshot_refresh()
+
+
 @frappe.whitelist()
 def get_dashboard_data(data):
-	"""Get dashboard data for API calls"""
-	# Get the default dashboard
-	dashboard = frappe.get_all("Legal CRM Dashboard", 
-		filters={"is_default": 1}, 
-		limit=1)
-	
-	if not dashboard:
+	"""Get dashboard data for API calls
+
+	Served from the cached snapshot of the default dashboard so opening a lead
+	or deal form runs no aggregate queries. Missing or stale snapshots are
+	refreshed in the background; a cached empty setting means there is no
+	default dashboard, and nothing is refreshed.
+	"""
+	cache = frappe.cache()
+	settings = cache.get_value(f"{SNAPSHOT_CACHE_PREFIX}|default")
+	if settings == {}:
+		return data
+
+	snapshot = cache.get_value(get_snapshot_key(**settings)) if settings else None
+
+	if not snapshot or now_datetime().timestamp() - snapshot["computed_at"] > SNAPSHOT_TTL:
+		enqueue_snapshot_refresh()
+
+	if not snapshot:
 		return data
-	
-	dashboard_doc = frappe.get_doc("Legal CRM Dashboard", dashboard[0].name)
-	dashboard_doc.calculate_metrics()
-	dashboard_doc.generate_charts()
 
 	# Merge with existing data
 	data.update({
-		"metrics": {
-			"total_leads": dashboard_doc.total_leads,
-			"qualified_leads": dashboard_doc.qualified_leads,
-			"conversion_rate": dashboard_doc.conversion_rate,
-			"total_deals": dashboard_doc.total_deals,
-			"won_deals": dashboard_doc.won_deals,
-			"pipeline_value": dashboard_doc.pipeline_value
-		},
-		"charts": {
-			"leads_by_practice_area": dashboard_doc.leads_by_practice_area,
-			"deals_by_status": dashboard_doc.deals_by_status,
-			"monthly_revenue": dashboard_doc.monthly_revenue
-		}
+		"metrics": snapshot["metrics"],
+		"charts": snapshot["charts"]
 	})
 
-	return data
\ No newline at end of file
+	return data
@@ -0,0 +1,63 @@
+// Client Script for Legal CRM Deal
+frappe.ui.form.on('Legal CRM Deal', {
+    refresh: function(frm) {
+        // Full trust history loads on demand instead of with the form
+        if (!frm.is_new() && frm.doc.kra_pin) {
+            frm.add_custom_button(__('Trust Movements'), function() {
+                show_trust_movements(frm);
+            }, __('View'));
+        }
+    }
+});
+
+function show_trust_movements(frm) {
+    let dialog = new frappe.ui.Dialog({
+        title: __('Trust Movements for {0}', [frm.doc.kra_pin]),
+        size: 'large',
+        fields: [{ fieldtype: 'HTML', fieldname: 'movements' }],
+        primary_action_label: __('Load More'),
+        primary_action: function() {
+            load_page();
+        }
+    });
+
+    let $body = dialog.fields_dict.movements.$wrapper;
+    $body.html(`<table class="table table-bordered">
+        <thead><tr>
+            <th>${__('Date')}</th><th>${__('Type')}</th>
+            <th>${__('Amount')}</th><th>${__('Balance After')}</th><th>${__('Description')}</th>
+        </tr></thead>
+        <tbody></tbody>
+    </table>`);
+
+    let cursor = {};
+
+    function load_page() {
+        frappe.call({
+            method: 'sheria_app.crm_extensions.doctype.legal_crm_deal.legal_crm_deal.get_deal_trust_movements',
+            args: Object.assign({ deal: frm.doc.name, page_length: 20 }, cursor),
+            callback: function(r) {
+                let rows = r.message || [];
+                rows.forEach(row => {
+                    $body.find('tbody').append(`<tr>
+                        <td>${frappe.datetime.str_to_user(row.transaction_date)}</td>
+                        <td>${frappe.utils.escape_html(row.transaction_type || '')}</td>
+                        <td>${format_currency(row.amount)}</td>
+                        <td>${format_currency(row.balance_after)}</td>
+                        <td>${frappe.utils.escape_html(row.description || '')}</td>
+                    </tr>`);
+                });
+
+                if (rows.length < 20) {
+                    dialog.get_primary_btn().addClass('hide');
+                } else {
+                    let last = rows[rows.length - 1];
+                    cursor = { after_date: last.transaction_date, after_name: last.transaction };
+                }
+            }
+        });
+    }
+
+    dialog.show();
+    load_page();
+}
@@ -10,6 +10,14 @@ from crm.fcrm.doctype.crm_service_level_agreement.utils import get_sla
 from crm.fcrm.doctype.crm_status_change_log.crm_status_change_log import add_status_change_log
 from crm.fcrm.doctype.fcrm_settings.fcrm_settings import get_exchange_rate
 
+from sheria_app.crm_extensions.doctype.deal_trust_movement.deal_trust_movement import (
+	TRUST_MOVEMENTS_LIMIT,
+	get_kra_pin_clients,
+	get_kra_pin_trust_balance,
+	get_movement_row,
+	get_trust_movements,
+)
+
 
 class LegalCRMDeal(CRMDeal):
 	def validate(self):
@@ -68,49 +76,21 @@ class LegalCRMDeal(CRMDeal):
 			frappe.throw(_("Case status is required when case type is specified."))
 
 	def update_trust_balance(self):
-		"""Update trust balance from trust account transactions"""
-		if self.kra_pin:
-			# Get trust balance from trust account ledger
-			balance = frappe.db.sql("""
-				SELECT SUM(credit - debit) as balance
-				FROM `tabTrust Account Ledger`
-				WHERE kra_pin = %s AND docstatus = 1
-			""", self.kra_pin)
-
-			if balance and balance[0][0]:
-				self.trust_balance = balance[0][0]
-			else:
-				self.trust_balance = 0
-
-			# Update trust account transactions table
-			self.update_trust_transactions()
-
-	def update_trust_transactions(self):
-		"""Update the trust account transactions child table"""
-		if self.kra_pin:
-			# Clear existing transactions
-			self.set("trust_account_transactions", [])
-
-			# Get transactions from trust account ledger
-			transactions = frappe.db.sql("""
-				SELECT name, transaction_date, transaction_type, debit, credit,
-					   balance, description, reference_document
-				FROM `tabTrust Account Transaction`
-				WHERE kra_pin = %s AND docstatus = 1
-				ORDER BY transaction_date DESC, creation DESC
-				LIMIT 50
-			""", self.kra_pin, as_dict=True)
-
-			for transaction in transactions:
-				self.append("trust_account_transactions", {
-					"transaction_date": transaction.transaction_date,
-					"transaction_type": transaction.transaction_type,
-					"debit": transaction.debit,
-					"credit": transaction.credit,
-					"balance": transaction.balance,
-					"description": transaction.description,
-					"reference_document": transaction.reference_document,
-				})
+		"""Rebuild the trust projection when the deal's KRA PIN changes
+
+		Otherwise the balance and recent movements are kept current by
+		sync_trust_movement as transactions post, so saving a deal touches
+		neither the ledger nor the child table.
+		"""
+		if not self.has_value_changed("kra_pin"):
+			return
+
+		clients = get_kra_pin_clients(self.kra_pin)
+		self.trust_balance = get_kra_pin_trust_balance(clients)
+
+		self.set("trust_account_transactions", [])
+		for movement in get_trust_movements(clients, page_length=TRUST_MOVEMENTS_LIMIT):
+			self.append("trust_account_transactions", get_movement_row(movement))
 
 	def validate_billing_information(self):
 		"""Validate billing information for legal matters"""
@@ -227,6 +207,22 @@ class LegalCRMDeal(CRMDeal):
 		return {"columns": columns, "rows": rows}
 
 
+@frappe.whitelist()
+def get_deal_trust_movements(deal, after_date=None, after_name=None, page_length=20):
+	"""Page through a deal's trust movements for the form"""
+	if not frappe.has_permission("Legal CRM Deal", "read", deal):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	movements = get_trust_movements(
+		get_kra_pin_clients(frappe.db.get_value("Legal CRM Deal", deal, "kra_pin")),
+		after_date=after_date,
+		after_name=after_name,
+		page_length=min(frappe.utils.cint(page_length) or 20, 200)
+	)
+
+	return [get_movement_row(movement) for movement in movements]
+
+
 # Standalone validation functions for testing
 def validate_company_registration(reg_number):
 	"""Standalone company registration validation function for testing"""
@@ -1,9 +1,34 @@
 # Copyright (c) 2025, Coale Tech and contributors
 # For license information, please see license.txt
 
+"""
+Form scripts are served as prebuilt bundles.
+
+When a script is saved, the active scripts of its doctype are concatenated in
+script name order and written to a content-hashed file under the site's
+private folder, outside the web server's static files. The doctype -> bundle
+manifest is cached and the URLs of the bundles a user may read are sent in the
+boot payload. Bundles are served by get_form_script_bundle, which needs a
+logged-in user with read access to the doctype; the URL carries the content
+hash, so the browser may keep a bundle until a script change gives it a new
+URL. Bundles are the scripts as written, not minified.
+"""
+
+import hashlib
+import os
+import shutil
+from urllib.parse import quote
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
+from werkzeug.wrappers import Response
+
+BUNDLE_MANIFEST_CACHE_KEY = "sheria_form_script_bundles"
+BUNDLE_PATH = ("private", "form_scripts")
+# Where bundles were written before they moved to the private folder
+LEGACY_BUNDLE_PATH = ("public", "files", "form_scripts")
+BUNDLE_URL = "/api/method/sheria_app.crm_extensions.doctype.legal_crm_form_script.legal_crm_form_script.get_form_script_bundle"
 
 class LegalCRMFormScript(Document):
 	def validate(self):
@@ -21,23 +46,137 @@ class LegalCRMFormScript(Document):
 					alert=True)
 
 	def on_update(self):
-		"""Clear cache when form script is updated"""
-		frappe.clear_cache()
+		"""Rebuild the bundles of this script's doctype, and of its old doctype if it moved"""
+		doctypes = {self.doctype_name}
+		previous = self.get_doc_before_save()
+		if previous and previous.doctype_name:
+			doctypes.add(previous.doctype_name)
+
+		for doctype_name in doctypes:
+			build_form_script_bundle(doctype_name)
+
+		clear_bootinfo_cache()
+
+	def on_trash(self):
+		build_form_script_bundle(self.doctype_name, exclude=self.name)
+		clear_bootinfo_cache()
+
+def clear_bootinfo_cache():
+	"""Boot payloads carry the bundle URLs, so drop the cached boot of every user"""
+	frappe.cache().delete_key("bootinfo")
+
+def get_bundle_source(doctype_name, exclude=None):
+	"""Active JavaScript of a doctype's form scripts, concatenated in script name order"""
+	filters = {"doctype_name": doctype_name, "is_active": 1}
+	if exclude:
+		filters["name"] = ["!=", exclude]
 
-@frappe.whitelist()
-def get_form_script(doctype_name):
-	"""Get active form script for a doctype"""
 	scripts = frappe.get_all("Legal CRM Form Script",
-		filters={
-			"doctype_name": doctype_name,
-			"is_active": 1
-		},
-		fields=["javascript_code", "python_code"]
+		filters=filters,
+		pluck="javascript_code",
+		order_by="script_name"
 	)
 
-	if scripts:
-		return scripts[0]
-	return {}
+	# Separate scripts so one without a trailing semicolon cannot run into the next
+	return "\n;\n".join(script for script in scripts if (script or "").strip())
+
+def build_form_script_bundle(doctype_name, exclude=None):
+	"""Write the content-hashed bundle of a doctype and update the manifest"""
+	if not doctype_name:
+		return
+
+	dist = frappe.get_site_path(*BUNDLE_PATH)
+	os.makedirs(dist, exist_ok=True)
+
+	prefix = f"{frappe.scrub(doctype_name)}."
+	content = get_bundle_source(doctype_name, exclude)
+	filename = None
+	if content:
+		filename = f"{prefix}{hashlib.md5(content.encode()).hexdigest()[:10]}.js"
+		with open(os.path.join(dist, filename), "w") as f:
+			f.write(content)
+
+	# Drop bundles from earlier versions of this doctype's scripts
+	for existing in os.listdir(dist):
+		if existing.startswith(prefix) and existing.endswith(".js") and existing != filename:
+			os.remove(os.path.join(dist, existing))
+
+	manifest = dict(get_form_script_manifest())
+	if filename:
+		manifest[doctype_name] = filename
+	else:
+		manifest.pop(doctype_name, None)
+
+	frappe.cache().set_value(BUNDLE_MANIFEST_CACHE_KEY, manifest)
+	return manifest.get(doctype_name)
+
+def build_form_script_bundles():
+	"""Rebuild the bundle of every doctype that has form scripts"""
+	# Bundles left in the public files would still be served to guests
+	shutil.rmtree(frappe.get_site_path(*LEGACY_BUNDLE_PATH), ignore_errors=True)
+
+	frappe.cache().set_value(BUNDLE_MANIFEST_CACHE_KEY, {})
+	for doctype_name in frappe.get_all("Legal CRM Form Script", pluck="doctype_name", distinct=True):
+		build_form_script_bundle(doctype_name)
+
+def get_form_script_manifest():
+	"""Doctype -> bundle file, rebuilt from the scripts if the cache or the files are gone"""
+	manifest = frappe.cache().get_value(BUNDLE_MANIFEST_CACHE_KEY)
+	if manifest is None or not all(
+		os.path.exists(frappe.get_site_path(*BUNDLE_PATH, filename)) for filename in manifest.values()
+	):
+		build_form_script_bundles()
+		manifest = frappe.cache().get_value(BUNDLE_MANIFEST_CACHE_KEY) or {}
+
+	return manifest
+
+def get_bundle_version(doctype_name, filename):
+	"""Content hash in a bundle's file name"""
+	return filename[len(frappe.scrub(doctype_name)) + 1:].split(".", 1)[0]
+
+def get_bundle_url(doctype_name, filename):
+	return f"{BUNDLE_URL}?doctype_name={quote(doctype_name)}&v={get_bundle_version(doctype_name, filename)}"
+
+def read_bundle(doctype_name):
+	filename = get_form_script_manifest().get(doctype_name)
+	if not filename:
+		return ""
+
+	with open(frappe.get_site_path(*BUNDLE_PATH, filename)) as f:
+		return f.read()
+
+def extend_bootinfo(bootinfo):
+	"""Boot hook: URLs of the form script bundles of the doctypes the user can read"""
+	bootinfo.sheria_form_scripts = {
+		doctype_name: get_bundle_url(doctype_name, filename)
+		for doctype_name, filename in get_form_script_manifest().items()
+		if frappe.has_permission(doctype_name, "read")
+	}
+
+@frappe.whitelist()
+def get_form_script(doctype_name):
+	"""Bundled JavaScript of a doctype's active form scripts"""
+	if not frappe.has_permission(doctype_name, "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	return read_bundle(doctype_name)
+
+@frappe.whitelist(methods=["GET"])
+def get_form_script_bundle(doctype_name, v=None):
+	"""The bundle as a script response for the desk loader
+
+	A request for the current version `v` may be cached for good, since a
+	script change gives the bundle a new URL.
+	"""
+	content = get_form_script(doctype_name)
+	filename = get_form_script_manifest().get(doctype_name)
+
+	if filename and v == get_bundle_version(doctype_name, filename):
+		cache_control = "private, max-age=31536000, immutable"
+	else:
+		cache_control = "private, no-cache"
+
+	return Response(content, mimetype="application/javascript", headers={"Cache-Control": cache_control})
 
 # Default Legal CRM Lead Form Script
 DEFAULT_LEAD_SCRIPT = """
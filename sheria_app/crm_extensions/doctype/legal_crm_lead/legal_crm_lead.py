@@ -12,6 +12,8 @@ from crm.fcrm.doctype.crm_status_change_log.crm_status_change_log import (
 	add_status_change_log,
 )
 
+from sheria_app.client_services.doctype.client_identity_key.client_identity_key import find_identity_matches
+
 
 class LegalCRMLead(CRMLead):
 	def validate(self):
@@ -34,8 +36,8 @@ class LegalCRMLead(CRMLead):
 				frappe.throw(_("Invalid KRA PIN format. Should be A/P followed by 9 digits and a letter."))
 
 			# Check for duplicates
-			existing = frappe.db.exists("Legal CRM Lead",
-				{"kra_pin": self.kra_pin, "name": ["!=", self.name]})
+			existing = find_identity_matches({"KRA PIN": self.kra_pin},
+				doctypes=["Legal CRM Lead"], exclude=(self.doctype, self.name))
 			if existing:
 				frappe.throw(_("KRA PIN {0} already exists for another lead.").format(self.kra_pin))
 
@@ -1,104 +1,317 @@
 # Migration script to migrate existing Client records to Legal CRM Leads
 # Run this after installing the CRM extensions
 # Note: Client doctype has been deprecated and removed. This script is kept for backward compatibility.
+#
+# Single process:  bench --site <site> execute sheria_app.crm_extensions.migrations.migrate_clients_to_crm.migrate_clients_to_crm_leads
+# Parallel:        bench --site <site> execute sheria_app.crm_extensions.migrations.migrate_clients_to_crm.enqueue_client_migration --kwargs "{'workers': 4}"
+
+import time
 
 import frappe
 from frappe import _
+from frappe.model.naming import parse_naming_series
+from frappe.utils import now
+
+from sheria_app.bulk_import import reserve_series
+from sheria_app.client_services.doctype.client_identity_key.client_identity_key import (
+	normalize_identifier,
+	write_identity_keys,
+)
+from sheria_app.crm_extensions.doctype.legal_crm_lead.legal_crm_lead import validate_kra_pin
+from sheria_app.legal_practice.doctype.conflict_party.conflict_party import get_lead_parties, write_conflict_parties
+
+CLIENT_FIELDS = ["name", "client_name", "client_type", "status", "email_address",
+	"phone_number", "kra_pin", "id_passport_number", "company_registration_number",
+	"practice_area", "court", "assigned_lawyer", "case_priority",
+	"billing_address", "payment_terms", "credit_limit", "trust_balance",
+	"confidentiality_agreement_signed", "marketing_consent"]
+
+LEAD_FIELDS = ["name", "naming_series", "lead_name", "first_name", "last_name", "organization",
+	"client_type", "status", "email", "phone", "kra_pin", "id_passport_number",
+	"company_registration_number", "practice_area", "court", "case_priority",
+	"confidentiality_agreement_signed", "marketing_consent", "billing_address",
+	"payment_terms", "credit_limit", "trust_balance", "lead_owner",
+	"creation", "modified", "owner", "modified_by", "docstatus"]
+
+LEAD_NAMING_SERIES = "CRM-LEAD-.YYYY.-"
+CHUNK_SIZE = 1000
 
-def migrate_clients_to_crm_leads():
-	"""Migrate existing Client records to Legal CRM Lead records"""
+
+def migrate_clients_to_crm_leads(chunk_size=CHUNK_SIZE, dry_run=False, run="default", worker=0, workers=1):
+	"""Migrate existing Client records to Legal CRM Lead records
+
+	Clients are streamed by name in chunks. Each chunk is deduplicated against
+	KRA PINs prefetched up front, inserted in one statement, flagged as
+	migrated in one statement and committed together with a checkpoint, so an
+	interrupted or failed run resumes from the last committed chunk. The
+	checkpoint is cleared only once the shard has no clients left.
+
+	With workers > 1 each worker takes the clients whose KRA PIN hashes to its
+	shard, which keeps every client sharing a PIN on the same worker.
+	"""
+	chunk_size, worker, workers = int(chunk_size), int(worker), int(workers)
 
 	# Check if Client doctype exists
 	if not frappe.db.exists("DocType", "Client"):
 		frappe.msgprint(_("Client doctype not found. Migration not needed."))
 		return
 
-	# Get all existing clients
-	clients = frappe.get_all("Client",
-		fields=["name", "client_name", "client_type", "status", "email_address",
-				"phone_number", "kra_pin", "id_passport_number", "company_registration_number",
-				"practice_area", "court", "assigned_lawyer", "case_priority",
-				"billing_address", "payment_terms", "credit_limit", "trust_balance",
-				"confidentiality_agreement_signed", "marketing_consent"],
-		filters={"migrated_to_crm": ["!=", 1]}  # Only migrate unmigrated clients
-	)
+	checkpoint_key = get_checkpoint_key(run, worker, workers)
+	last_name = frappe.db.get_global(checkpoint_key) or ""
+	known_pins = get_existing_kra_pins()
 
-	if not clients:
-		frappe.msgprint(_("No Client records found to migrate."))
-		return
+	stats = {"migrated": 0, "skipped": 0, "invalid": 0, "chunks": 0, "completed": False, "error": None,
+		"dry_run": bool(dry_run)}
+	started = time.monotonic()
 
-	migrated_count = 0
-	skipped_count = 0
+	while True:
+		clients = get_client_chunk(last_name, chunk_size, worker, workers)
+		if not clients:
+			stats["completed"] = True
+			break
 
-	for client in clients:
 		try:
-			# Check if lead already exists for this client
-			existing_lead = frappe.db.exists("Legal CRM Lead",
-				{"kra_pin": client.kra_pin}) if client.kra_pin else None
-
-			if existing_lead:
-				frappe.db.set_value("Client", client.name, "migrated_to_crm", 1)
-				skipped_count += 1
-				continue
-
-			# Create new Legal CRM Lead
-			lead = frappe.new_doc("Legal CRM Lead")
-
-			# Map client fields to lead fields
-			lead.update({
-				"lead_name": client.client_name,
-				"client_type": client.client_type,
-				"status": "Qualified" if client.status == "Active" else "New",
-				"email": client.email_address,
-				"phone": client.phone_number,
-				"kra_pin": client.kra_pin,
-				"id_passport_number": client.id_passport_number,
-				"company_registration_number": client.company_registration_number,
-				"practice_area": client.practice_area,
-				"court": client.court,
-				"case_priority": client.case_priority,
-				"confidentiality_agreement_signed": client.confidentiality_agreement_signed,
-				"marketing_consent": client.marketing_consent,
-				"billing_address": client.billing_address,
-				"payment_terms": client.payment_terms,
-				"credit_limit": client.credit_limit,
-				"trust_balance": client.trust_balance,
-			})
-
-			# Set organization for company clients
-			if client.client_type == "Company":
-				lead.organization = client.client_name
-				lead.lead_name = client.client_name
-
-			# Set first/last name for individual clients
-			elif client.client_type == "Individual":
-				name_parts = client.client_name.split(" ", 1)
-				lead.first_name = name_parts[0]
-				if len(name_parts) > 1:
-					lead.last_name = name_parts[1]
-
-			# Set default lead owner (could be assigned_lawyer or a default user)
-			if client.assigned_lawyer:
-				lead.lead_owner = client.assigned_lawyer
-
-			lead.flags.ignore_mandatory = True
-			lead.insert(ignore_permissions=True)
-
-			# Mark client as migrated
-			frappe.db.set_value("Client", client.name, "migrated_to_crm", 1)
-
-			migrated_count += 1
-			frappe.db.commit()
+			leads, skipped, invalid = build_leads(clients, known_pins)
+
+			if not dry_run:
+				insert_leads(leads)
+				# Clients with an invalid KRA PIN stay unmigrated for correction
+				mark_clients_migrated([client.name for client in clients if client.name not in invalid])
+				frappe.db.set_global(checkpoint_key, clients[-1].name)
+				frappe.db.commit()
 
 		except Exception as e:
-			frappe.log_error(f"Failed to migrate client {client.name}: {str(e)}",
+			frappe.db.rollback()
+			frappe.log_error(f"Failed to migrate clients after {last_name or 'start'}: {str(e)}",
 				"Client Migration Error")
-			continue
+			stats["error"] = str(e)
+			break
+
+		last_name = clients[-1].name
+		stats["migrated"] += len(leads)
+		stats["skipped"] += skipped
+		stats["invalid"] += len(invalid)
+		stats["chunks"] += 1
+		report_progress(stats, started, worker, workers)
+
+	if not dry_run and stats["completed"] and stats["chunks"]:
+		# Finished shard, a later run starts afresh over anything left unmigrated
+		frappe.db.set_global(checkpoint_key, "")
+		frappe.db.commit()
+
+	stats["seconds"] = round(time.monotonic() - started, 2)
+	stats["rows_per_second"] = get_rate(stats, started)
 
 	# Log migration results
-	frappe.msgprint(_(f"Migration completed: {migrated_count} clients migrated, {skipped_count} skipped"))
+	if stats["error"]:
+		frappe.msgprint(_("Migration stopped after {0} clients migrated: {1}. Run it again to resume.").format(
+			stats["migrated"], stats["error"]
+		))
+	else:
+		frappe.msgprint(_("Migration completed: {0} clients migrated, {1} skipped, {2} invalid ({3} rows/s)").format(
+			stats["migrated"], stats["skipped"], stats["invalid"], stats["rows_per_second"]
+		))
+
+	return stats
+
+
+def enqueue_client_migration(workers=4, chunk_size=CHUNK_SIZE, dry_run=False, run="default"):
+	"""Run the migration as one background job per shard"""
+	workers = int(workers)
+
+	for worker in range(workers):
+		frappe.enqueue(
+			"sheria_app.crm_extensions.migrations.migrate_clients_to_crm.migrate_clients_to_crm_leads",
+			queue="long",
+			timeout=4 * 3600,
+			job_id=f"client_crm_migration::{run}::{worker}/{workers}",
+			deduplicate=True,
+			chunk_size=chunk_size,
+			dry_run=dry_run,
+			run=run,
+			worker=worker,
+			workers=workers
+		)
+
+	return {"workers": workers, "run": run}
+
+
+def get_checkpoint_key(run, worker, workers):
+	return f"client_crm_migration::{run}::{worker}/{workers}"
+
+
+def get_existing_kra_pins():
+	"""Normalized KRA PINs of existing leads, as the identity index compares them"""
+	return {
+		normalize_identifier(pin)
+		for pin in frappe.db.sql_list("""
+			SELECT DISTINCT kra_pin
+			FROM `tabLegal CRM Lead`
+			WHERE IFNULL(kra_pin, '') != ''
+		""")
+	}
+
+
+def get_client_chunk(after, chunk_size, worker=0, workers=1):
+	"""Next unmigrated clients after `after`, in name order"""
+	shard_condition = ""
+	if workers > 1:
+		shard_condition = "AND CRC32(IFNULL(NULLIF(kra_pin, ''), name)) %% %(workers)s = %(worker)s"
+
+	return frappe.db.sql(f"""
+		SELECT {', '.join(f'`{field}`' for field in CLIENT_FIELDS)}
+		FROM `tabClient`
+		WHERE name > %(after)s
+			AND IFNULL(migrated_to_crm, 0) != 1
+			{shard_condition}
+		ORDER BY name
+		LIMIT %(chunk_size)s
+	""", {"after": after, "chunk_size": chunk_size, "worker": worker, "workers": workers}, as_dict=True)
+
+
+def build_leads(clients, known_pins):
+	"""Map a chunk of clients to lead rows with the lead's KRA PIN checks
+
+	PINs that already have a lead are skipped, as the lead's duplicate check
+	would reject them; PINs of new leads are added to `known_pins` so duplicates
+	later in the run are skipped too. Clients whose PIN fails the lead's format
+	check are left out and logged. Returns (leads, skipped_count, invalid_names).
+	"""
+	leads = []
+	skipped = 0
+	invalid = set()
+
+	for client in clients:
+		pin = normalize_identifier(client.kra_pin) if client.kra_pin else None
+
+		if pin and not validate_kra_pin(pin):
+			invalid.add(client.name)
+			frappe.log_error(f"Client {client.name} not migrated: invalid KRA PIN {client.kra_pin}",
+				"Client Migration Error")
+			continue
+
+		if pin and pin in known_pins:
+			skipped += 1
+			continue
+
+		if pin:
+			known_pins.add(pin)
+
+		leads.append(get_lead_values(client))
+
+	return leads, skipped, invalid
+
+
+def get_lead_values(client):
+	"""Map client fields to lead fields"""
+	lead = frappe._dict({
+		"lead_name": client.client_name,
+		"client_type": client.client_type,
+		"status": "Qualified" if client.status == "Active" else "New",
+		"email": client.email_address,
+		"phone": client.phone_number,
+		"kra_pin": client.kra_pin,
+		"id_passport_number": client.id_passport_number,
+		"company_registration_number": client.company_registration_number,
+		"practice_area": client.practice_area,
+		"court": client.court,
+		"case_priority": client.case_priority,
+		"confidentiality_agreement_signed": client.confidentiality_agreement_signed,
+		"marketing_consent": client.marketing_consent,
+		"billing_address": client.billing_address,
+		"payment_terms": client.payment_terms,
+		"credit_limit": client.credit_limit,
+		"trust_balance": client.trust_balance,
+	})
+
+	# Set organization for company clients
+	if client.client_type == "Company":
+		lead.organization = client.client_name
+
+	# Set first/last name for individual clients
+	elif client.client_type == "Individual" and client.client_name:
+		name_parts = client.client_name.split(" ", 1)
+		lead.first_name = name_parts[0]
+		if len(name_parts) > 1:
+			lead.last_name = name_parts[1]
+
+	# Set default lead owner (could be assigned_lawyer or a default user)
+	if client.assigned_lawyer:
+		lead.lead_owner = client.assigned_lawyer
+
+	return lead
+
+
+def insert_leads(leads):
+	"""Insert a chunk of leads in one statement
+
+	Rows are written directly, so the Legal CRM Lead controller's validate and
+	hooks do not run. build_leads applies its KRA PIN format and duplicate
+	checks; the client type, company registration and email checks are not
+	applied to migrated leads.
+	"""
+	if not leads:
+		return
+
+	names = reserve_lead_names(len(leads))
+	timestamp = now()
+	user = frappe.session.user
+
+	for lead, name in zip(leads, names):
+		lead.update({
+			"name": name,
+			"naming_series": LEAD_NAMING_SERIES,
+			"creation": timestamp,
+			"modified": timestamp,
+			"owner": user,
+			"modified_by": user,
+			"docstatus": 0
+		})
+
+	frappe.db.bulk_insert("Legal CRM Lead", LEAD_FIELDS,
+		[tuple(lead.get(field) for field in LEAD_FIELDS) for lead in leads])
+
+	# Hooks do not run for these rows, so index them here
+	write_identity_keys("Legal CRM Lead", leads)
+	write_conflict_parties("Legal CRM Lead", [
+		{"name": lead.name, "title": lead.lead_name, "parties": get_lead_parties(lead)}
+		for lead in leads
+	])
+
+
+def reserve_lead_names(count):
+	"""Take `count` consecutive names from the lead naming series in one update"""
+	prefix = parse_naming_series(LEAD_NAMING_SERIES)
+	first = reserve_series(prefix, count)
+
+	return [f"{prefix}{number:05d}" for number in range(first, first + count)]
+
+
+def mark_clients_migrated(client_names):
+	# A chunk of only invalid KRA PINs has nothing to mark, but its checkpoint still moves on
+	if not client_names:
+		return
+
+	frappe.db.sql("""
+		UPDATE `tabClient`
+		SET migrated_to_crm = 1
+		WHERE name IN %(names)s
+	""", {"names": tuple(client_names)})
+
+
+def get_rate(stats, started):
+	elapsed = time.monotonic() - started
+	return round((stats["migrated"] + stats["skipped"]) / elapsed) if elapsed else 0
+
+
+def report_progress(stats, started, worker, workers):
+	frappe.logger("sheria_app.client_migration").info(
+		f"Client migration [{worker + 1}/{workers}] chunk {stats['chunks']}: "
+		f"{stats['migrated']} migrated, {stats['skipped']} skipped, {stats['invalid']} invalid, "
+		f"{get_rate(stats, started)} rows/s"
+		f"{' (dry run)' if stats['dry_run'] else ''}"
+	)
 
-	return {"migrated": migrated_count, "skipped": skipped_count}
 
 def add_migration_field():
 	"""Add migration tracking field to Client doctype"""
@@ -109,4 +322,4 @@ def add_migration_field():
 # Execute migration
 if __name__ == "__main__":
 	add_migration_field()
-	migrate_clients_to_crm_leads()
\ No newline at end of file
+	migrate_clients_to_crm_leads()
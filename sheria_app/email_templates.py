@@ -205,27 +205,58 @@ def create_default_email_templates():
 	except Exception as e:
 		frappe.log_error(f"Error creating email templates: {str(e)}")
 
+EMAIL_TEMPLATE_CACHE_KEY = "sheria_email_templates"
+BULK_EMAIL_RECIPIENTS = 500
+
+# Compiled (subject, response) templates by (template name, modified)
+_compiled_email_templates = {}
+
+def get_compiled_email_template(template_name):
+	"""Compiled subject and response of an Email Template, compiled once per version"""
+	template = frappe.cache().hget(EMAIL_TEMPLATE_CACHE_KEY, template_name)
+	if template is None:
+		template = frappe.db.get_value("Email Template", template_name,
+			["subject", "response", "modified"], as_dict=True)
+		if not template:
+			frappe.throw(_("Email Template {0} not found").format(template_name), frappe.DoesNotExistError)
+
+		template = {"subject": template.subject, "response": template.response, "modified": str(template.modified)}
+		frappe.cache().hset(EMAIL_TEMPLATE_CACHE_KEY, template_name, template)
+
+	key = (template_name, template["modified"])
+	if key not in _compiled_email_templates:
+		# Drop older versions of this template
+		for stale in [k for k in _compiled_email_templates if k[0] == template_name]:
+			del _compiled_email_templates[stale]
+
+		jenv = frappe.get_jenv()
+		_compiled_email_templates[key] = (
+			jenv.from_string(template["subject"] or ""),
+			jenv.from_string(template["response"] or "")
+		)
+
+	return _compiled_email_templates[key]
+
+def clear_email_template_cache(doc, method=None):
+	"""doc_events handler: drop the cached source of a changed Email Template"""
+	frappe.cache().hdel(EMAIL_TEMPLATE_CACHE_KEY, doc.name)
+
+def render_email_template(compiled, doc=None, context=None):
+	"""Render a compiled template once with `doc` and `context` merged"""
+	subject_template, response_template = compiled
+	values = dict(context or {})
+	if doc:
+		values["doc"] = doc
+
+	return {
+		"subject": subject_template.render(values),
+		"message": response_template.render(values)
+	}
+
 def get_email_template_content(template_name, doc=None, context=None):
 	"""Get email template content with document context"""
 	try:
-		template = frappe.get_doc("Email Template", template_name)
-
-		if doc:
-			# Render template with document context
-			subject = frappe.render_template(template.subject, {"doc": doc})
-			message = frappe.render_template(template.response, {"doc": doc})
-		else:
-			subject = template.subject
-			message = template.response
-
-		if context:
-			subject = frappe.render_template(subject, context)
-			message = frappe.render_template(message, context)
-
-		return {
-			"subject": subject,
-			"message": message
-		}
+		return render_email_template(get_compiled_email_template(template_name), doc, context)
 
 	except Exception as e:
 		frappe.log_error(f"Error getting email template content: {str(e)}")
@@ -254,6 +285,47 @@ def send_email_from_template(template_name, recipients, doc=None, context=None,
 		frappe.log_error(f"Error sending email from template: {str(e)}")
 		return False
 
+def send_bulk_from_template(template_name, messages, attachments=None):
+	"""Send a template to many recipients
+
+	`messages` is a list of (recipient, doc, context) tuples. The template is
+	compiled once, and recipients whose rendered email is identical share one
+	queued email (each still receives their own copy). Returns the number of
+	recipients queued.
+	"""
+	try:
+		compiled = get_compiled_email_template(template_name)
+		groups = {}
+
+		for recipient, doc, context in messages:
+			if not recipient:
+				continue
+
+			content = render_email_template(compiled, doc, context)
+			key = (content["subject"], content["message"],
+				doc.doctype if doc else None, doc.name if doc else None)
+			groups.setdefault(key, []).append(recipient)
+
+		queued = 0
+		for (subject, message, reference_doctype, reference_name), recipients in groups.items():
+			for start in range(0, len(recipients), BULK_EMAIL_RECIPIENTS):
+				batch = recipients[start:start + BULK_EMAIL_RECIPIENTS]
+				frappe.sendmail(
+					recipients=batch,
+					subject=subject,
+					message=message,
+					reference_doctype=reference_doctype,
+					reference_name=reference_name,
+					attachments=attachments
+				)
+				queued += len(batch)
+
+		return queued
+
+	except Exception as e:
+		frappe.log_error(f"Error sending bulk email from template: {str(e)}")
+		return 0
+
 # Template-specific helper functions
 
 def send_case_assigned_email(doc):
@@ -343,4 +415,4 @@ def send_newsletter_email(recipients, updates_data):
 		"upcoming_events": updates_data.get("upcoming_events", "No upcoming events.")
 	}
 
-	send_email_from_template("Legal Newsletter", recipients, context=context)
\ No newline at end of file
+	send_bulk_from_template("Legal Newsletter", [(recipient, None, context) for recipient in recipients])
\ No newline at end of file
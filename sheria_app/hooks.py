@@ -13,8 +13,8 @@ app_license = "mit"
 # ------------------
 
 # include js, css files in header of desk.html
-app_include_css = "/assets/sheria_app/css/sheria_app.css"
-app_include_js = "/assets/sheria_app/js/sheria_app.js"
+app_include_css = "/assets/sheria_app/css/sheria.css"
+app_include_js = "/assets/sheria_app/js/sheria.js"
 
 # include js, css files in header of web template
 web_include_css = "/assets/sheria_app/css/sheria-web.css"
@@ -24,7 +24,10 @@ web_include_js = "/assets/sheria_app/js/sheria-web.js"
 website_theme_scss = "sheria_app/public/scss/website"
 
 # include js, css files in header of web form
-webform_include_js = {"Legal Service Request": "public/js/legal_service_request.js"}
+webform_include_js = {
+	"Legal Service Request": "public/js/legal_service_request.js",
+	"Consultation": "public/js/consultation_booking.js"
+}
 webform_include_css = {"Legal Service Request": "public/css/legal_service_request.css"}
 
 # Home Pages
@@ -39,17 +42,33 @@ role_home_page = {
 	"Lawyer": "legal-dashboard"
 }
 
+# Bundled JS/CSS of the default web pages
+update_website_context = "sheria_app.web_assets.update_website_context"
+
 # Generators
 # ----------
 
 # automatically create page for each record of this doctype
 website_generators = ["Legal Case", "Legal Service"]
 
+# Generator profile pages, served through the rendered page cache
+page_renderer = ["sheria_app.page_cache.GeneratorPage"]
+
 # Installation
 # ------------
 
 before_install = "sheria_app.install.before_install"
 after_install = "sheria_app.install.after_install"
+after_migrate = [
+	"sheria_app.web_assets.build_web_page_assets",
+	"sheria_app.crm_extensions.doctype.legal_crm_form_script.legal_crm_form_script.build_form_script_bundles",
+	"sheria_app.page_cache.enqueue_page_cache_warmup"
+]
+
+# Boot
+# ----
+
+extend_bootinfo = "sheria_app.crm_extensions.doctype.legal_crm_form_script.legal_crm_form_script.extend_bootinfo"
 
 # Desk Notifications
 # ------------------
@@ -89,9 +108,106 @@ doc_events = {
 	"Legal Case": {
 		"on_submit": "sheria_app.legal_practice.doctype.legal_case.legal_case.on_case_submit",
 		"on_cancel": "sheria_app.legal_practice.doctype.legal_case.legal_case.on_case_cancel",
+		"on_update": [
+			"sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card.on_legal_case_update",
+			"sheria_app.page_cache.clear_page_cache",
+			"sheria_app.legal_practice.doctype.conflict_party.conflict_party.update_conflict_index",
+		],
+		"on_trash": [
+			"sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card.on_legal_case_update",
+			"sheria_app.page_cache.clear_page_cache",
+			"sheria_app.legal_practice.doctype.conflict_party.conflict_party.remove_from_conflict_index",
+		],
+	},
+	"Lawyer": {
+		"on_update": [
+			"sheria_app.legal_practice.doctype.consultation_slot.consultation_slot.clear_consultation_slot_cache",
+			"sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card.on_lawyer_update",
+		],
+		"on_trash": [
+			"sheria_app.legal_practice.doctype.consultation_slot.consultation_slot.clear_consultation_slot_cache",
+			"sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card.on_lawyer_update",
+		],
+	},
+	"Consultation": {
+		"validate": "sheria_app.web_forms.validate_consultation_booking",
+		"on_cancel": "sheria_app.legal_practice.doctype.consultation_slot.consultation_slot.release_consultation_slots",
+		"on_trash": "sheria_app.legal_practice.doctype.consultation_slot.consultation_slot.release_consultation_slots",
+	},
+	"Client Feedback": {
+		"validate": "sheria_app.web_forms.validate_client_feedback",
+	},
+	"Document Request": {
+		"validate": "sheria_app.web_forms.validate_document_request",
+	},
+	"Employee": {
+		"on_update": "sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card.on_employee_update",
+		"on_trash": "sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card.on_employee_update",
+	},
+	"User": {
+		"on_update": "sheria_app.notifications.clear_role_emails_cache",
+		"on_trash": "sheria_app.notifications.clear_role_emails_cache",
+	},
+	"Email Template": {
+		"on_update": "sheria_app.email_templates.clear_email_template_cache",
+		"on_trash": "sheria_app.email_templates.clear_email_template_cache",
+	},
+	"Has Role": {
+		"on_update": "sheria_app.notifications.clear_role_emails_cache",
+		"on_trash": "sheria_app.notifications.clear_role_emails_cache",
+	},
+	"Website Settings": {
+		"on_update": "sheria_app.page_cache.clear_all_page_cache",
 	},
 	"Legal Service": {
 		"on_submit": "sheria_app.client_services.doctype.legal_service.legal_service.on_service_submit",
+		"on_update": "sheria_app.page_cache.clear_page_cache",
+		"on_trash": "sheria_app.page_cache.clear_page_cache",
+	},
+	"Sales Invoice": {
+		"on_submit": "sheria_app.client_services.doctype.client_financial_event.client_financial_event.post_financial_event",
+		"on_cancel": "sheria_app.client_services.doctype.client_financial_event.client_financial_event.remove_financial_event",
+	},
+	"Payment Entry": {
+		"on_submit": "sheria_app.client_services.doctype.client_financial_event.client_financial_event.post_financial_event",
+		"on_cancel": "sheria_app.client_services.doctype.client_financial_event.client_financial_event.remove_financial_event",
+	},
+	"Case Activity": {
+		"on_change": "sheria_app.realtime.publish_update",
+		"on_trash": "sheria_app.realtime.publish_update",
+	},
+	"Case Hearing": {
+		"on_change": "sheria_app.realtime.publish_update",
+		"on_trash": "sheria_app.realtime.publish_update",
+	},
+	"Service Request": {
+		"validate": "sheria_app.web_forms.validate_service_request",
+		"on_change": "sheria_app.realtime.publish_update",
+		"on_trash": "sheria_app.realtime.publish_update",
+	},
+	"Trust Account Transaction": {
+		"on_change": "sheria_app.realtime.publish_update",
+		"on_trash": "sheria_app.realtime.publish_update",
+	},
+	"Legal CRM Lead": {
+		"on_update": [
+			"sheria_app.crm_extensions.doctype.legal_crm_dashboard.legal_crm_dashboard.on_lead_or_deal_change",
+			"sheria_app.client_services.doctype.client_identity_key.client_identity_key.update_identity_index",
+			"sheria_app.legal_practice.doctype.conflict_party.conflict_party.update_conflict_index",
+		],
+		"on_trash": [
+			"sheria_app.crm_extensions.doctype.legal_crm_dashboard.legal_crm_dashboard.on_lead_or_deal_change",
+			"sheria_app.client_services.doctype.client_identity_key.client_identity_key.remove_from_identity_index",
+			"sheria_app.legal_practice.doctype.conflict_party.conflict_party.remove_from_conflict_index",
+		],
+	},
+	"Client": {
+		"on_update": "sheria_app.client_services.doctype.client_identity_key.client_identity_key.update_identity_index",
+		"on_trash": "sheria_app.client_services.doctype.client_identity_key.client_identity_key.remove_from_identity_index",
+	},
+	"Legal CRM Deal": {
+		"on_update": "sheria_app.crm_extensions.doctype.legal_crm_dashboard.legal_crm_dashboard.on_lead_or_deal_change",
+		"on_trash": "sheria_app.crm_extensions.doctype.legal_crm_dashboard.legal_crm_dashboard.on_lead_or_deal_change",
 	},
 	# "Customer": {
 	# 	"validate": "sheria_app.overrides.customer.validate_kenya_customer",
@@ -103,13 +219,16 @@ doc_events = {
 
 scheduler_events = {
 	"all": [
-		"sheria_app.tasks.all"
+		"sheria_app.tasks.all",
+		"sheria_app.client_services.doctype.web_intake_submission.web_intake_submission.requeue_stale_intakes"
 	],
 	"daily": [
 		"sheria_app.tasks.daily"
 	],
 	"hourly": [
 		"sheria_app.tasks.hourly",
+		"sheria_app.notifications.send_notification_digests",
+		"sheria_app.legal_practice.doctype.consultation_slot.consultation_slot.release_expired_holds",
 		"sheria_app.crm_extensions.doctype.legal_document_template.legal_document_template.auto_generate_documents"
 	],
 	"weekly": [
@@ -0,0 +1,196 @@
+# Billing Rate Card DocType
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, getdate
+
+CASE_RATES_CACHE_KEY = "sheria_case_billing_rates"
+EMPLOYEE_RATES_CACHE_KEY = "sheria_employee_billing_rates"
+
+
+class BillingRateCard(Document):
+	def validate(self):
+		self.validate_dates()
+		self.validate_overlap()
+
+	def validate_dates(self):
+		"""Validate effective date range"""
+		if self.effective_to and getdate(self.effective_to) < getdate(self.effective_from):
+			frappe.throw(_("Effective To cannot be before Effective From"))
+
+	def validate_overlap(self):
+		"""Ensure only one rate card applies to an employee and case on any date"""
+		overlapping = frappe.db.sql("""
+			SELECT name
+			FROM `tabBilling Rate Card`
+			WHERE employee = %(employee)s
+				AND IFNULL(`case`, '') = %(case)s
+				AND name != %(name)s
+				AND effective_from <= IFNULL(%(effective_to)s, '9999-12-31')
+				AND IFNULL(effective_to, '9999-12-31') >= %(effective_from)s
+			LIMIT 1
+		""", {
+			"employee": self.employee,
+			"case": self.case or "",
+			"name": self.name or "",
+			"effective_from": self.effective_from,
+			"effective_to": self.effective_to
+		})
+
+		if overlapping:
+			frappe.throw(_("Rate Card {0} already covers this period").format(overlapping[0][0]))
+
+	def on_update(self):
+		clear_employee_rate_cache(self.employee)
+
+	def on_trash(self):
+		clear_employee_rate_cache(self.employee)
+
+
+def get_case_rates(cases):
+	"""Return {case: {employee: rate}} from the Lawyer Table rows of each case
+
+	Lawyer rates are keyed by the lawyer's linked employee, the identity time
+	entries carry; lawyers without one have no case rate. Cached per case;
+	misses are loaded together in one query.
+	"""
+	cache = frappe.cache()
+	case_rates = {}
+	missing = []
+
+	for case in set(filter(None, cases)):
+		rates = cache.hget(CASE_RATES_CACHE_KEY, case)
+		if rates is None:
+			missing.append(case)
+		else:
+			case_rates[case] = rates
+
+	if missing:
+		loaded = {case: {} for case in missing}
+		for row in frappe.db.sql("""
+			SELECT lt.parent, l.employee, lt.rate
+			FROM `tabLawyer Table` lt
+			JOIN `tabLawyer` l ON l.name = lt.lawyer
+			WHERE lt.parenttype = 'Legal Case'
+				AND lt.parent IN %(cases)s
+				AND lt.rate > 0
+				AND IFNULL(l.employee, '') != ''
+		""", {"cases": tuple(missing)}, as_dict=True):
+			loaded[row.parent][row.employee] = flt(row.rate)
+
+		for case, rates in loaded.items():
+			cache.hset(CASE_RATES_CACHE_KEY, case, rates)
+			case_rates[case] = rates
+
+	return case_rates
+
+
+def get_employee_rates(employees):
+	"""Return {employee: {"default": rate, "cards": [...]}} with effective-dated rate cards
+
+	Cached per employee; misses are loaded together in two queries.
+	"""
+	cache = frappe.cache()
+	employee_rates = {}
+	missing = []
+
+	for employee in set(filter(None, employees)):
+		rates = cache.hget(EMPLOYEE_RATES_CACHE_KEY, employee)
+		if rates is None:
+			missing.append(employee)
+		else:
+			employee_rates[employee] = rates
+
+	if missing:
+		loaded = {employee: {"default": 0, "cards": []} for employee in missing}
+
+		for employee in frappe.get_all("Employee",
+			filters={"name": ["in", missing]},
+			fields=["name", "billing_rate"]
+		):
+			loaded[employee.name]["default"] = flt(employee.billing_rate)
+
+		for card in frappe.get_all("Billing Rate Card",
+			filters={"employee": ["in", missing]},
+			fields=["employee", "case", "rate", "effective_from", "effective_to"],
+			order_by="effective_from desc"
+		):
+			loaded[card.employee]["cards"].append({
+				"case": card.case,
+				"rate": flt(card.rate),
+				"effective_from": str(card.effective_from),
+				"effective_to": str(card.effective_to) if card.effective_to else None
+			})
+
+		for employee, rates in loaded.items():
+			cache.hset(EMPLOYEE_RATES_CACHE_KEY, employee, rates)
+			employee_rates[employee] = rates
+
+	return employee_rates
+
+
+def resolve_billing_rate(employee, case=None, date=None, employee_rates=None, case_rates=None):
+	"""Resolve the billing rate for an employee on a case at a date
+
+	Precedence: case rate card, case lawyer rate, employee rate card, employee default.
+	Pass prefetched employee_rates/case_rates when resolving many entries.
+	"""
+	if not employee:
+		return 0
+
+	if employee_rates is None:
+		employee_rates = get_employee_rates([employee])
+	if case_rates is None:
+		case_rates = get_case_rates([case])
+
+	date = str(getdate(date))
+	rates = employee_rates.get(employee) or {"default": 0, "cards": []}
+	cards = [
+		card for card in rates["cards"]
+		if card["effective_from"] <= date and (not card["effective_to"] or card["effective_to"] >= date)
+	]
+
+	if case:
+		for card in cards:
+			if card["case"] == case:
+				return card["rate"]
+
+		case_rate = (case_rates.get(case) or {}).get(employee)
+		if case_rate:
+			return case_rate
+
+	for card in cards:
+		if not card["case"]:
+			return card["rate"]
+
+	return rates["default"]
+
+
+def clear_case_rate_cache(case):
+	frappe.cache().hdel(CASE_RATES_CACHE_KEY, case)
+
+
+def clear_all_case_rate_caches():
+	frappe.cache().delete_key(CASE_RATES_CACHE_KEY)
+
+
+def clear_employee_rate_cache(employee):
+	frappe.cache().hdel(EMPLOYEE_RATES_CACHE_KEY, employee)
+
+
+def on_legal_case_update(doc, method=None):
+	"""Invalidate cached case lawyer rates"""
+	clear_case_rate_cache(doc.name)
+
+
+def on_lawyer_update(doc, method=None):
+	"""Invalidate cached case lawyer rates, which are keyed by the lawyer's employee"""
+	clear_all_case_rate_caches()
+
+
+def on_employee_update(doc, method=None):
+	"""Invalidate cached employee default rate"""
+	clear_employee_rate_cache(doc.name)
@@ -61,6 +61,10 @@ class CaseActivity(Document):
 					time_entry.insert()
 
 
+def on_doctype_update():
+	frappe.db.add_index("Case Activity", ["`case`", "date"], index_name="case_date_index")
+
+
 @frappe.whitelist()
 def get_case_activities(case, limit=50):
 	"""Get activities for a specific case"""
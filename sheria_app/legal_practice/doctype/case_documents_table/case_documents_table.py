@@ -8,4 +8,8 @@ from frappe.model.document import Document
 
 
 class CaseDocumentsTable(Document):
-	pass
\ No newline at end of file
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Case Documents Table", ["parent", "date_uploaded"])
\ No newline at end of file
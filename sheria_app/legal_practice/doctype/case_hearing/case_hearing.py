@@ -117,6 +117,10 @@ class CaseHearing(Document):
 			activity.insert()
 
 
+def on_doctype_update():
+	frappe.db.add_index("Case Hearing", ["`case`", "hearing_date"], index_name="case_hearing_date_index")
+
+
 @frappe.whitelist()
 def get_upcoming_hearings(days=30):
 	"""Get upcoming hearings within specified days"""
@@ -0,0 +1,15 @@
+# Conflict Name Key
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ConflictNameKey(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique("Conflict Name Key", ["key_type", "key_value", "normalized_name"],
+		constraint_name="unique_conflict_name_key")
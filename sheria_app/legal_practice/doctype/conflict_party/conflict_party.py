@@ -0,0 +1,366 @@
+# Conflict Party
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Conflict-of-interest index over every party recorded on a matter.
+
+Conflict Party holds one row per party per Legal Case or Legal CRM Lead. The
+party names are normalized, and Conflict Name Key stores each distinct
+normalized name once under its tokens, Soundex codes and trigrams. A check
+looks up candidate names by those keys in a single grouped query. It scores
+the candidates in Python and then fetches their matters and roles in one more
+query. Both tables are updated when a case or lead is saved.
+"""
+
+import math
+import re
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import cint, now
+
+from sheria_app.client_services.doctype.client_identity_key.client_identity_key import soundex
+
+MIN_SCORE = 0.5
+TRIGRAM_MIN_SHARE = 0.5
+MAX_CANDIDATES = 200
+MATTERS_PER_PARTY = 50
+REBUILD_CHUNK_SIZE = 1000
+
+# Words that do not tell parties apart
+STOP_WORDS = {
+	"THE", "AND", "OF", "LTD", "LIMITED", "CO", "COMPANY", "INC", "PLC", "LLP", "LLC", "GROUP",
+	"MR", "MRS", "MS", "DR", "HON", "PROF", "ADVOCATES", "ADVOCATE"
+}
+
+# Legal Case table field, child doctype, name field, role
+CASE_PARTY_TABLES = [
+	("appellant_table", "Appellant Table", "party_name", "Appellant"),
+	("respondent_table", "Respondent Table", "party_name", "Respondent"),
+	("legislation_opposition_lawyer", "Opposition Lawyer Table", "lawyer_name", "Opposing Counsel"),
+	("legislation_opposition_lawyer", "Opposition Lawyer Table", "firm", "Opposing Firm"),
+	("case_details_assigned_to", "Lawyer Table", "lawyer", "Assigned Lawyer")
+]
+
+LEAD_PARTY_FIELDS = ["lead_name", "organization"]
+
+
+class ConflictParty(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Conflict Party", ["reference_doctype", "reference_name"])
+
+
+def normalize_party_name(name):
+	"""Upper-case name tokens without punctuation, titles or company suffixes"""
+	tokens = [token for token in re.sub(r"[^A-Z0-9]+", " ", str(name or "").upper()).split()
+		if token not in STOP_WORDS]
+	return " ".join(tokens)[:140] or None
+
+
+def get_trigrams(normalized):
+	return {
+		padded[i:i + 3]
+		for token in normalized.split()
+		for padded in [f"_{token}_"]
+		for i in range(len(padded) - 2)
+	}
+
+
+def get_name_keys(normalized):
+	"""{key_type: set of keys} of a normalized name"""
+	tokens = {token for token in normalized.split() if len(token) > 1}
+	return {
+		"Token": tokens,
+		"Phonetic": set(filter(None, (soundex(token) for token in tokens))),
+		"Trigram": get_trigrams(normalized)
+	}
+
+
+def dice(a, b):
+	return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0
+
+
+def get_similarity(a, b):
+	"""Best of token, phonetic and trigram overlap between two normalized names"""
+	if a == b:
+		return 1.0
+
+	keys_a, keys_b = get_name_keys(a), get_name_keys(b)
+	return round(max(
+		dice(keys_a["Token"], keys_b["Token"]),
+		0.9 * dice(keys_a["Phonetic"], keys_b["Phonetic"]),
+		dice(keys_a["Trigram"], keys_b["Trigram"])
+	), 3)
+
+
+def get_case_parties(case):
+	"""(party name, role) pairs of a Legal Case document"""
+	parties = [(case.case_details_client_name, "Client")]
+	for table_field, _doctype, name_field, role in CASE_PARTY_TABLES:
+		parties.extend((row.get(name_field), role) for row in case.get(table_field) or [])
+
+	return parties
+
+
+def get_lead_parties(lead):
+	return [(lead.get(field), "Prospective Client") for field in LEAD_PARTY_FIELDS]
+
+
+def update_conflict_index(doc, method=None):
+	"""doc_events handler: re-index the parties of a saved case or lead"""
+	if doc.doctype == "Legal Case":
+		matter = {"name": doc.name, "title": doc.case_details_title, "parties": get_case_parties(doc)}
+	else:
+		matter = {"name": doc.name, "title": doc.get("lead_name"), "parties": get_lead_parties(doc)}
+
+	write_conflict_parties(doc.doctype, [matter])
+
+
+def remove_from_conflict_index(doc, method=None):
+	"""doc_events handler: drop the parties of a deleted case or lead"""
+	frappe.db.delete("Conflict Party", {"reference_doctype": doc.doctype, "reference_name": doc.name})
+
+
+def write_conflict_parties(reference_doctype, matters):
+	"""Replace the party rows of `matters` ({name, title, parties}) and key any new names"""
+	if not matters:
+		return
+
+	frappe.db.delete("Conflict Party", {
+		"reference_doctype": reference_doctype,
+		"reference_name": ["in", [matter["name"] for matter in matters]]
+	})
+
+	timestamp = now()
+	user = frappe.session.user
+	values = []
+	for matter in matters:
+		seen = set()
+		for party_name, role in matter["parties"]:
+			normalized = normalize_party_name(party_name)
+			if not normalized or (normalized, role) in seen:
+				continue
+
+			seen.add((normalized, role))
+			values.append((frappe.generate_hash(length=10), str(party_name)[:140], normalized, role,
+				reference_doctype, matter["name"], matter["title"], timestamp, timestamp, user, user))
+
+	if not values:
+		return
+
+	frappe.db.bulk_insert("Conflict Party",
+		["name", "party_name", "normalized_name", "role", "reference_doctype", "reference_name", "matter_title",
+			"creation", "modified", "owner", "modified_by"],
+		values
+	)
+
+	write_name_keys({row[2] for row in values})
+
+
+def write_name_keys(normalized_names):
+	"""Add the keys of names that are not keyed yet"""
+	keyed = set(frappe.db.sql_list("""
+		SELECT DISTINCT normalized_name
+		FROM `tabConflict Name Key`
+		WHERE normalized_name IN %s
+	""", (tuple(normalized_names),)))
+
+	timestamp = now()
+	user = frappe.session.user
+	values = [
+		(frappe.generate_hash(length=10), key_type, key_value, normalized, timestamp, timestamp, user, user)
+		for normalized in normalized_names - keyed
+		for key_type, key_values in get_name_keys(normalized).items()
+		for key_value in key_values
+	]
+
+	if values:
+		frappe.db.bulk_insert("Conflict Name Key",
+			["name", "key_type", "key_value", "normalized_name", "creation", "modified", "owner", "modified_by"],
+			values,
+			ignore_duplicates=True
+		)
+
+
+def find_party_candidates(normalized):
+	"""{indexed normalized name: similarity} of names close to `normalized`"""
+	keys = get_name_keys(normalized)
+	conditions = []
+	params = []
+	for key_type, key_values in keys.items():
+		if key_values:
+			conditions.append("(key_type = %s AND key_value IN %s)")
+			params.extend([key_type, tuple(key_values)])
+
+	if not conditions:
+		return {}
+
+	min_trigrams = max(1, math.ceil(len(keys["Trigram"]) * TRIGRAM_MIN_SHARE))
+	rows = frappe.db.sql(f"""
+		SELECT normalized_name,
+			SUM(key_type = 'Token') AS tokens,
+			SUM(key_type = 'Phonetic') AS phonetic,
+			SUM(key_type = 'Trigram') AS trigrams
+		FROM `tabConflict Name Key`
+		WHERE {" OR ".join(conditions)}
+		GROUP BY normalized_name
+		HAVING tokens > 0 OR phonetic > 0 OR trigrams >= %s
+		ORDER BY tokens DESC, phonetic DESC, trigrams DESC
+		LIMIT %s
+	""", params + [min_trigrams, MAX_CANDIDATES], as_dict=True)
+
+	candidates = {}
+	for row in rows:
+		score = get_similarity(normalized, row.normalized_name)
+		if score >= MIN_SCORE:
+			candidates[row.normalized_name] = score
+
+	return candidates
+
+
+def get_party_matters(normalized_names, reference_doctypes, exclude=None):
+	"""Most recent matters of each candidate name in `reference_doctypes`, with the matter count per name"""
+	if not normalized_names or not reference_doctypes:
+		return []
+
+	exclude_doctype, exclude_name = exclude or (None, None)
+	return frappe.db.sql("""
+		SELECT party_name, normalized_name, role, reference_doctype, reference_name, matter_title, matter_count
+		FROM (
+			SELECT party_name, normalized_name, role, reference_doctype, reference_name, matter_title,
+				COUNT(*) OVER (PARTITION BY normalized_name) AS matter_count,
+				ROW_NUMBER() OVER (PARTITION BY normalized_name ORDER BY creation DESC) AS recency
+			FROM `tabConflict Party`
+			WHERE normalized_name IN %(names)s
+				AND reference_doctype IN %(reference_doctypes)s
+				AND NOT (reference_doctype <=> %(exclude_doctype)s AND reference_name <=> %(exclude_name)s)
+		) parties
+		WHERE recency <= %(per_party)s
+	""", {
+		"names": tuple(normalized_names),
+		"reference_doctypes": tuple(reference_doctypes),
+		"exclude_doctype": exclude_doctype,
+		"exclude_name": exclude_name,
+		"per_party": MATTERS_PER_PARTY
+	}, as_dict=True)
+
+
+@frappe.whitelist()
+def check_conflicts(names, exclude_case=None, limit=20):
+	"""Ranked conflict hits, with matters and roles, for each of a list of party names
+
+	`names` is a JSON list or newline-separated text; `exclude_case` leaves the
+	matter being opened out of its own check.
+	"""
+	if not frappe.has_permission("Legal Case", "read"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	if isinstance(names, str):
+		names = frappe.parse_json(names) if names.strip().startswith("[") else names.splitlines()
+
+	limit = cint(limit) or 20
+	queries = {}
+	for name in names:
+		normalized = normalize_party_name(name)
+		if normalized:
+			queries[name] = find_party_candidates(normalized)
+
+	candidate_names = {candidate for candidates in queries.values() for candidate in candidates}
+	exclude = ("Legal Case", exclude_case) if exclude_case else None
+
+	# Lead hits only for users who may read leads
+	reference_doctypes = ["Legal Case"]
+	if frappe.db.table_exists("Legal CRM Lead") and frappe.has_permission("Legal CRM Lead", "read"):
+		reference_doctypes.append("Legal CRM Lead")
+
+	matters = {}
+	for row in get_party_matters(candidate_names, reference_doctypes, exclude):
+		matters.setdefault(row.normalized_name, []).append(row)
+
+	results = []
+	for name, candidates in queries.items():
+		hits = [
+			{
+				"party_name": row.party_name,
+				"score": score,
+				"role": row.role,
+				"reference_doctype": row.reference_doctype,
+				"reference_name": row.reference_name,
+				"matter_title": row.matter_title,
+				"matter_count": row.matter_count
+			}
+			for candidate, score in candidates.items()
+			for row in matters.get(candidate, [])
+		]
+		hits.sort(key=lambda hit: (-hit["score"], hit["reference_doctype"], hit["reference_name"]))
+		results.append({"name": name, "conflict": bool(hits), "hits": hits[:limit]})
+
+	return results
+
+
+def rebuild_conflict_index():
+	"""Re-index the parties of every Legal Case and Legal CRM Lead in keyset chunks"""
+	frappe.db.delete("Conflict Party")
+	frappe.db.delete("Conflict Name Key")
+
+	last_name = ""
+	while True:
+		cases = frappe.get_all("Legal Case",
+			filters={"name": [">", last_name]},
+			fields=["name", "case_details_title", "case_details_client_name"],
+			order_by="name",
+			limit_page_length=REBUILD_CHUNK_SIZE
+		)
+		if not cases:
+			break
+
+		write_conflict_parties("Legal Case", get_case_chunk_matters(cases))
+		frappe.db.commit()
+		last_name = cases[-1].name
+
+	if not frappe.db.table_exists("Legal CRM Lead"):
+		return
+
+	last_name = ""
+	while True:
+		leads = frappe.get_all("Legal CRM Lead",
+			filters={"name": [">", last_name]},
+			fields=["name"] + LEAD_PARTY_FIELDS,
+			order_by="name",
+			limit_page_length=REBUILD_CHUNK_SIZE
+		)
+		if not leads:
+			break
+
+		write_conflict_parties("Legal CRM Lead", [
+			{"name": lead.name, "title": lead.lead_name, "parties": get_lead_parties(lead)}
+			for lead in leads
+		])
+		frappe.db.commit()
+		last_name = leads[-1].name
+
+
+def get_case_chunk_matters(cases):
+	"""Matters of a chunk of cases, reading each party table once for the chunk"""
+	matters = {
+		case.name: {
+			"name": case.name,
+			"title": case.case_details_title,
+			"parties": [(case.case_details_client_name, "Client")]
+		}
+		for case in cases
+	}
+
+	for table_field, child_doctype, name_field, role in CASE_PARTY_TABLES:
+		for row in frappe.get_all(child_doctype,
+			filters={"parenttype": "Legal Case", "parentfield": table_field, "parent": ["in", list(matters)]},
+			fields=["parent", name_field]
+		):
+			matters[row.parent]["parties"].append((row.get(name_field), role))
+
+	return list(matters.values())
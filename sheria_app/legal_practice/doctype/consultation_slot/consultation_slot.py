@@ -0,0 +1,335 @@
+# Consultation Slot
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Consultation slot inventory.
+
+Bookable slots are generated from each lawyer's working hours and cached per
+lawyer and day. Only reserved slots are stored: a Consultation Slot row is a
+hold (expiring after HOLD_MINUTES) or a booking, and its unique slot_key
+guarantees a slot is reserved at most once. Expired holds are reclaimed under
+a row lock, and holds are confirmed with their rows locked, so concurrent
+bookings cannot take the same slot.
+"""
+
+import math
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_days, add_to_date, cint, date_diff, get_datetime, get_time, getdate, now_datetime
+
+from sheria_app.rate_limit import check_rate_limit
+
+CALENDAR_CACHE_KEY = "sheria_consultation_calendars"
+SLOT_CACHE_KEY = "sheria_consultation_slots"
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DEFAULT_SLOT_DURATION = 30
+HOLD_MINUTES = 10
+MAX_RANGE_DAYS = 31
+
+
+class ConsultationSlot(Document):
+	pass
+
+
+def get_consultation_calendars():
+	"""Lawyer -> {"slot_duration", "hours": {weekday: [(start_minute, end_minute)]}} for lawyers taking consultations"""
+	calendars = frappe.cache().get_value(CALENDAR_CACHE_KEY)
+	if calendars is not None:
+		return calendars
+
+	calendars = {
+		lawyer.name: {"slot_duration": cint(lawyer.slot_duration) or DEFAULT_SLOT_DURATION, "hours": {}}
+		for lawyer in frappe.get_all("Lawyer",
+			filters={"accepts_consultations": 1, "status": "Active"},
+			fields=["name", "slot_duration"]
+		)
+	}
+
+	if calendars:
+		for row in frappe.get_all("Lawyer Working Hours",
+			filters={"parenttype": "Lawyer", "parent": ["in", list(calendars)]},
+			fields=["parent", "day_of_week", "start_time", "end_time"],
+			order_by="start_time"
+		):
+			calendars[row.parent]["hours"].setdefault(row.day_of_week, []).append(
+				(get_minutes(row.start_time), get_minutes(row.end_time))
+			)
+
+	frappe.cache().set_value(CALENDAR_CACHE_KEY, calendars)
+	return calendars
+
+
+def get_day_slots(lawyer, date):
+	"""[start, end] time strings of a lawyer's bookable slots on a date, cached per day"""
+	date = getdate(date)
+	key = f"{SLOT_CACHE_KEY}:{lawyer}:{date}"
+
+	slots = frappe.cache().get_value(key)
+	if slots is None:
+		calendar = get_consultation_calendars().get(lawyer)
+		slots = generate_day_slots(calendar, date) if calendar else []
+		frappe.cache().set_value(key, slots, expires_in_sec=86400)
+
+	return slots
+
+
+def generate_day_slots(calendar, date):
+	duration = calendar["slot_duration"]
+	slots = []
+
+	for start, end in calendar["hours"].get(WEEKDAYS[date.weekday()], []):
+		while start + duration <= end:
+			slots.append([format_minutes(start), format_minutes(start + duration)])
+			start += duration
+
+	return sorted(slots)
+
+
+def get_minutes(value):
+	"""Minutes since midnight of a Time field value"""
+	if hasattr(value, "total_seconds"):
+		return int(value.total_seconds()) // 60
+
+	value = get_time(value)
+	return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes):
+	return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def get_slot_key(lawyer, date, start):
+	return f"{lawyer}|{getdate(date)} {start}"
+
+
+def get_slots_needed(lawyer, duration):
+	"""Consecutive slots a consultation of `duration` minutes ("60" or "60 minutes") takes"""
+	minutes = cint(str(duration or "").split(" ")[0])
+	slot_duration = get_consultation_calendars()[lawyer]["slot_duration"]
+	return max(1, math.ceil(minutes / slot_duration))
+
+
+def get_slot_run(day_slots, start, needed):
+	"""The `needed` back-to-back slots beginning at `start`, or None"""
+	starts = [slot[0] for slot in day_slots]
+	if start not in starts:
+		return None
+
+	index = starts.index(start)
+	run = day_slots[index:index + needed]
+	if len(run) < needed or any(run[i][1] != run[i + 1][0] for i in range(len(run) - 1)):
+		return None
+
+	return run
+
+
+def get_taken_slots(lawyers, from_date, to_date):
+	"""Slot keys booked or actively held between two dates, in one query"""
+	return set(frappe.db.sql_list("""
+		SELECT slot_key
+		FROM `tabConsultation Slot`
+		WHERE lawyer IN %(lawyers)s
+			AND slot_start >= %(from_date)s
+			AND slot_start < %(to_date)s
+			AND (status = 'Booked' OR held_until >= %(now)s)
+	""", {
+		"lawyers": tuple(lawyers),
+		"from_date": getdate(from_date),
+		"to_date": add_days(getdate(to_date), 1),
+		"now": now_datetime()
+	}))
+
+
+@frappe.whitelist(allow_guest=True)
+def get_available_slots(from_date, to_date=None, lawyer=None, duration=None):
+	"""Free consultation slots between two dates (at most MAX_RANGE_DAYS), optionally for one lawyer"""
+	from_date = max(getdate(from_date), getdate())
+	to_date = getdate(to_date) if to_date else from_date
+	if date_diff(to_date, from_date) > MAX_RANGE_DAYS:
+		to_date = add_days(from_date, MAX_RANGE_DAYS)
+
+	calendars = get_consultation_calendars()
+	lawyers = [lawyer] if lawyer else list(calendars)
+	lawyers = [name for name in lawyers if name in calendars]
+	if not lawyers or from_date > to_date:
+		return []
+
+	taken = get_taken_slots(lawyers, from_date, to_date)
+	now = now_datetime()
+	slots = []
+
+	for day in range(date_diff(to_date, from_date) + 1):
+		date = add_days(from_date, day)
+		for name in lawyers:
+			day_slots = get_day_slots(name, date)
+			needed = get_slots_needed(name, duration)
+
+			for start, end in day_slots:
+				if get_datetime(f"{date} {start}") <= now:
+					continue
+
+				run = get_slot_run(day_slots, start, needed)
+				if run and not any(get_slot_key(name, date, slot[0]) in taken for slot in run):
+					slots.append({"lawyer": name, "date": str(date), "start": start, "end": run[-1][1]})
+
+	return sorted(slots, key=lambda slot: (slot["date"], slot["start"], slot["lawyer"]))
+
+
+def reserve_slots(lawyer, date, start_time, duration=None, **values):
+	"""Reserve the slots of a consultation starting at `start_time`; False if any is taken
+
+	`values` are the Consultation Slot fields to set (status, hold_token, held_until, email, consultation).
+	"""
+	if lawyer not in get_consultation_calendars():
+		return False
+
+	date = getdate(date)
+	start = get_time(start_time).strftime("%H:%M:%S")
+	run = get_slot_run(get_day_slots(lawyer, date), start, get_slots_needed(lawyer, duration))
+	if not run or get_datetime(f"{date} {start}") <= now_datetime():
+		return False
+
+	frappe.db.savepoint("consultation_slot")
+	for slot_start, slot_end in run:
+		reserved = take_slot(dict(values,
+			lawyer=lawyer,
+			slot_start=f"{date} {slot_start}",
+			slot_end=f"{date} {slot_end}",
+			slot_key=get_slot_key(lawyer, date, slot_start)
+		))
+		if not reserved:
+			frappe.db.rollback(save_point="consultation_slot")
+			return False
+
+	return True
+
+
+def take_slot(values):
+	"""Insert a slot reservation, or reclaim the slot if it is only held by an expired hold"""
+	try:
+		frappe.get_doc(dict(values, doctype="Consultation Slot")).insert(ignore_permissions=True)
+		return True
+	except (frappe.UniqueValidationError, frappe.DuplicateEntryError):
+		pass
+
+	existing = frappe.db.sql("""
+		SELECT name, status, held_until
+		FROM `tabConsultation Slot`
+		WHERE slot_key = %s
+		FOR UPDATE
+	""", (values["slot_key"],), as_dict=True)
+
+	if not existing or existing[0].status != "Held" or get_datetime(existing[0].held_until) >= now_datetime():
+		return False
+
+	frappe.db.set_value("Consultation Slot", existing[0].name, {
+		"status": values.get("status"),
+		"hold_token": values.get("hold_token"),
+		"held_until": values.get("held_until"),
+		"email": values.get("email"),
+		"consultation": values.get("consultation")
+	})
+	return True
+
+
+@frappe.whitelist(allow_guest=True)
+def hold_slot(lawyer, date, start_time, email=None, duration=None):
+	"""Hold a slot for HOLD_MINUTES while the client completes the booking"""
+	try:
+		check_rate_limit("consultation_hold", {"email": email})
+
+		hold_token = frappe.generate_hash(length=20)
+		held_until = add_to_date(now_datetime(), minutes=HOLD_MINUTES)
+
+		if not reserve_slots(lawyer, date, start_time, duration,
+			status="Held", hold_token=hold_token, held_until=held_until, email=email):
+			return {"error": "This time slot is no longer available. Please select a different time."}
+
+		return {"success": True, "hold_token": hold_token, "held_until": str(held_until)}
+	except frappe.RateLimitExceededError as e:
+		frappe.clear_messages()
+		return {"error": str(e)}
+	except Exception as e:
+		frappe.log_error(f"Error holding consultation slot: {str(e)}")
+		return {"error": "Failed to hold slot"}
+
+
+@frappe.whitelist(allow_guest=True)
+def release_hold(hold_token):
+	"""Give up a hold the client no longer needs"""
+	frappe.db.sql("""
+		DELETE FROM `tabConsultation Slot`
+		WHERE hold_token = %s AND status = 'Held'
+	""", (hold_token,))
+
+	return {"success": True}
+
+
+def confirm_slot(hold_token, consultation=None):
+	"""Turn a live hold into a booking; returns the lawyer, or None if the hold has expired"""
+	rows = frappe.db.sql("""
+		SELECT name, lawyer, status, held_until
+		FROM `tabConsultation Slot`
+		WHERE hold_token = %s
+		FOR UPDATE
+	""", (hold_token,), as_dict=True)
+
+	now = now_datetime()
+	if not rows or any(row.status != "Held" or get_datetime(row.held_until) < now for row in rows):
+		return None
+
+	frappe.db.sql("""
+		UPDATE `tabConsultation Slot`
+		SET status = 'Booked', held_until = NULL, consultation = %(consultation)s, modified = %(now)s
+		WHERE hold_token = %(hold_token)s
+	""", {"consultation": consultation, "now": now, "hold_token": hold_token})
+
+	return rows[0].lawyer
+
+
+def book_consultation_slot(doc):
+	"""Reserve the slot of a new consultation and return its lawyer, or None if the time is taken
+
+	Confirms the portal hold when the consultation carries one, otherwise books
+	the first lawyer free at the preferred time.
+	"""
+	if doc.get("slot_hold_token"):
+		return confirm_slot(doc.slot_hold_token, doc.name)
+
+	start = get_time(doc.preferred_time).strftime("%H:%M:%S")
+	free_lawyers = [
+		slot["lawyer"]
+		for slot in get_available_slots(doc.preferred_date, doc.preferred_date, doc.get("lawyer"), doc.get("duration"))
+		if slot["start"] == start
+	]
+
+	for lawyer in free_lawyers:
+		if reserve_slots(lawyer, doc.preferred_date, start, doc.get("duration"),
+			status="Booked", email=doc.get("email"), consultation=doc.name):
+			return lawyer
+
+
+def release_consultation_slots(doc, method=None):
+	"""doc_events handler: free the slots of a cancelled or deleted consultation"""
+	frappe.db.sql("""
+		DELETE FROM `tabConsultation Slot`
+		WHERE consultation = %s
+	""", (doc.name,))
+
+
+def release_expired_holds():
+	"""Scheduler: drop holds that were never confirmed"""
+	frappe.db.sql("""
+		DELETE FROM `tabConsultation Slot`
+		WHERE status = 'Held' AND held_until < %s
+	""", (now_datetime(),))
+
+
+def clear_consultation_slot_cache(doc=None, method=None):
+	"""doc_events handler: regenerate calendars and slots after a lawyer changes"""
+	frappe.cache().delete_value(CALENDAR_CACHE_KEY)
+	frappe.cache().delete_keys(f"{SLOT_CACHE_KEY}:")
@@ -0,0 +1,73 @@
+# Tests for consultation slot reservations
+# Run with: bench --site <site> run-tests --doctype "Consultation Slot"
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_to_date, getdate, now_datetime
+
+from sheria_app.legal_practice.doctype.consultation_slot.consultation_slot import (
+    WEEKDAYS,
+    clear_consultation_slot_cache,
+    confirm_slot,
+    get_available_slots,
+    hold_slot,
+)
+
+TEST_LAWYER = "_Test Consultation Lawyer"
+
+
+class TestConsultationSlot(FrappeTestCase):
+    """A slot can only be reserved once, and expired holds free it again"""
+
+    def setUp(self):
+        self.date = add_days(getdate(), 1)
+        # Fresh addresses so repeated runs stay under the hold rate limit
+        self.email_a = f"{frappe.generate_hash(length=8)}@example.com"
+        self.email_b = f"{frappe.generate_hash(length=8)}@example.com"
+
+        if not frappe.db.exists("Lawyer", TEST_LAWYER):
+            frappe.get_doc({
+                "doctype": "Lawyer",
+                "lawyer_name": TEST_LAWYER,
+                "status": "Active",
+                "accepts_consultations": 1,
+                "slot_duration": 30,
+                "working_hours": [
+                    {"day_of_week": day, "start_time": "09:00:00", "end_time": "11:00:00"}
+                    for day in WEEKDAYS
+                ]
+            }).insert(ignore_permissions=True)
+
+        clear_consultation_slot_cache()
+
+    def tearDown(self):
+        frappe.db.delete("Consultation Slot", {"lawyer": TEST_LAWYER})
+        frappe.delete_doc("Lawyer", TEST_LAWYER, force=True)
+        clear_consultation_slot_cache()
+
+    def get_starts(self, duration=None):
+        return [slot["start"] for slot in get_available_slots(self.date, self.date, TEST_LAWYER, duration)]
+
+    def test_slots_from_working_hours(self):
+        self.assertEqual(self.get_starts(), ["09:00:00", "09:30:00", "10:00:00", "10:30:00"])
+        self.assertEqual(self.get_starts(duration="60 minutes"), ["09:00:00", "09:30:00", "10:00:00"])
+
+    def test_hold_is_exclusive(self):
+        first = hold_slot(TEST_LAWYER, self.date, "09:00:00", self.email_a, duration="60")
+        second = hold_slot(TEST_LAWYER, self.date, "09:30:00", self.email_b)
+
+        self.assertTrue(first.get("success"))
+        self.assertTrue(second.get("error"))
+        self.assertEqual(self.get_starts(), ["10:00:00", "10:30:00"])
+
+        self.assertEqual(confirm_slot(first["hold_token"], "CONS-TEST"), TEST_LAWYER)
+        self.assertIsNone(confirm_slot(first["hold_token"], "CONS-TEST"))
+
+    def test_expired_hold_is_reclaimed(self):
+        hold = hold_slot(TEST_LAWYER, self.date, "10:00:00", self.email_a)
+        frappe.db.set_value("Consultation Slot", {"hold_token": hold["hold_token"]},
+            "held_until", add_to_date(now_datetime(), minutes=-1))
+
+        self.assertIn("10:00:00", self.get_starts())
+        self.assertTrue(hold_slot(TEST_LAWYER, self.date, "10:00:00", self.email_b).get("success"))
+        self.assertIsNone(confirm_slot(hold["hold_token"]))
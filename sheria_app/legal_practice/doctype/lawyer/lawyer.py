@@ -18,6 +18,11 @@ class Lawyer(Document):
 		if self.admission_number and not self.admission_number.isalnum():
 			frappe.throw("Admission Number should contain only letters and numbers")
 
+		# Validate consultation working hours
+		for row in self.get("working_hours") or []:
+			if frappe.utils.get_time(row.end_time) <= frappe.utils.get_time(row.start_time):
+				frappe.throw(f"Row {row.idx}: End Time must be after Start Time")
+
 	def before_save(self):
 		# Set default status if not set
 		if not self.status:
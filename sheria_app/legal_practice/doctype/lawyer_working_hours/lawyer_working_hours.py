@@ -0,0 +1,8 @@
+# Copyright (c) 2024, Sheria Law Management System and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+class LawyerWorkingHours(Document):
+	pass
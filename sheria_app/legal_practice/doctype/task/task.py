@@ -91,6 +91,10 @@ class Task(Document):
 		frappe.db.sql("UPDATE `tabTime Entry` SET task = NULL WHERE task = %s", (self.name,))
 
 
+def on_doctype_update():
+	frappe.db.add_index("Task", ["`case`", "due_date"], index_name="case_due_date_index")
+
+
 @frappe.whitelist()
 def get_tasks_for_user(user=None, status=None, priority=None):
 	"""Get tasks for a specific user with optional filters"""
@@ -7,6 +7,9 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import time_diff_in_hours, get_datetime, flt
 
+from sheria_app.legal_practice.doctype.billing_rate_card.billing_rate_card import resolve_billing_rate
+from sheria_app.legal_practice.doctype.wip_ledger_entry.wip_ledger_entry import remove_wip_entry, update_wip_ledger
+
 
 class TimeEntry(Document):
 	def validate(self):
@@ -40,14 +43,27 @@ class TimeEntry(Document):
 
 	def set_employee_name(self):
 		"""Set employee name from Employee doctype"""
+		if self.flags.links_prefetched:
+			return
+
 		if self.employee:
 			self.employee_name = frappe.db.get_value("Employee", self.employee, "employee_name")
 
 	def set_case_title(self):
 		"""Set case title from Legal Case doctype"""
+		if self.flags.links_prefetched:
+			return
+
 		if self.case:
 			self.case_title = frappe.db.get_value("Legal Case", self.case, "case_details_title")
 
+	def on_update(self):
+		"""Keep the WIP ledger in step with approval and billing"""
+		update_wip_ledger(self)
+
+	def on_trash(self):
+		remove_wip_entry(self)
+
 	def on_submit(self):
 		"""Actions when time entry is submitted"""
 		self.status = "Submitted"
@@ -58,6 +74,8 @@ class TimeEntry(Document):
 		if self.billed:
 			frappe.throw(_("Cannot cancel a billed Time Entry"))
 
+		remove_wip_entry(self)
+
 	def notify_approver(self):
 		"""Send notification to approver"""
 		if self.employee:
@@ -80,6 +98,10 @@ class TimeEntry(Document):
 				)
 
 
+def on_doctype_update():
+	frappe.db.add_index("Time Entry", ["`case`", "date"], index_name="case_date_index")
+
+
 @frappe.whitelist()
 def approve_time_entry(time_entry, approved=1):
 	"""Approve or reject time entry"""
@@ -96,22 +118,38 @@ def approve_time_entry(time_entry, approved=1):
 
 
 @frappe.whitelist()
-def get_employee_billing_rate(employee, case=None):
-	"""Get billing rate for employee, optionally based on case"""
-	if not employee:
-		return 0
-
-	# First check if there's a case-specific rate
-	if case:
-		case_doc = frappe.get_doc("Legal Case", case)
-		if case_doc.lawyer_table:
-			for lawyer in case_doc.lawyer_table:
-				if lawyer.lawyer == employee:
-					return flt(lawyer.rate or 0)
-
-	# Get default employee billing rate
-	employee_doc = frappe.get_doc("Employee", employee)
-	return flt(employee_doc.billing_rate or 0)
+def get_employee_billing_rate(employee, case=None, date=None):
+	"""Get billing rate for employee, optionally based on case and entry date"""
+	return resolve_billing_rate(employee, case, date)
+
+
+def get_time_entry_link_maps(employees, cases):
+	"""Prefetch employee and case details needed to validate a batch of time entries
+
+	Returns (employee_map, case_map) so bulk capture resolves names without a
+	lookup per entry.
+	"""
+	employee_map = {}
+	case_map = {}
+
+	employees = list({e for e in employees if e})
+	cases = list({c for c in cases if c})
+
+	if employees:
+		for employee in frappe.get_all("Employee",
+			filters={"name": ["in", employees]},
+			fields=["name", "employee_name"]
+		):
+			employee_map[employee.name] = employee
+
+	if cases:
+		for case in frappe.get_all("Legal Case",
+			filters={"name": ["in", cases]},
+			fields=["name", "case_details_title"]
+		):
+			case_map[case.name] = case
+
+	return employee_map, case_map
 
 
 @frappe.whitelist()
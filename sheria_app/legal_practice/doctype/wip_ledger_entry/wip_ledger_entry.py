@@ -0,0 +1,135 @@
+# WIP Ledger Entry DocType
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt
+
+
+class WIPLedgerEntry(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("WIP Ledger Entry", ["client", "date"])
+
+
+def is_unbilled_work(time_entry):
+	"""Time that has been approved as billable but not yet invoiced"""
+	return (
+		time_entry.docstatus != 2
+		and time_entry.status == "Approved"
+		and time_entry.is_billable
+		and not time_entry.billed
+	)
+
+
+def update_wip_ledger(time_entry):
+	"""Post, refresh or release the WIP ledger row for a time entry"""
+	if not is_unbilled_work(time_entry):
+		frappe.db.delete("WIP Ledger Entry", {"time_entry": time_entry.name})
+		return
+
+	values = {
+		"client": frappe.db.get_value("Legal Case", time_entry.case, "case_details_client_name") if time_entry.case else None,
+		"case": time_entry.case,
+		"case_title": time_entry.case_title,
+		"employee": time_entry.employee,
+		"employee_name": time_entry.employee_name,
+		"date": time_entry.date,
+		"hours": flt(time_entry.hours),
+		"billing_rate": flt(time_entry.billing_rate),
+		"amount": flt(time_entry.billing_amount)
+	}
+
+	if frappe.db.exists("WIP Ledger Entry", time_entry.name):
+		frappe.db.set_value("WIP Ledger Entry", time_entry.name, values, update_modified=False)
+	else:
+		frappe.get_doc(dict(values, doctype="WIP Ledger Entry", time_entry=time_entry.name)).insert(
+			ignore_permissions=True
+		)
+
+
+def remove_wip_entry(time_entry):
+	frappe.db.delete("WIP Ledger Entry", {"time_entry": time_entry.name})
+
+
+def rebuild_wip_ledger():
+	"""Rebuild the WIP ledger from Time Entry in one pass"""
+	frappe.db.delete("WIP Ledger Entry")
+	frappe.db.sql("""
+		INSERT INTO `tabWIP Ledger Entry`
+			(name, time_entry, client, `case`, case_title, employee, employee_name,
+			date, hours, billing_rate, amount,
+			creation, modified, owner, modified_by, docstatus)
+		SELECT
+			te.name, te.name, lc.case_details_client_name, te.case, te.case_title,
+			te.employee, te.employee_name, te.date, IFNULL(te.hours, 0),
+			IFNULL(te.billing_rate, 0), IFNULL(te.billing_amount, 0),
+			NOW(), NOW(), 'Administrator', 'Administrator', 0
+		FROM `tabTime Entry` te
+		LEFT JOIN `tabLegal Case` lc ON lc.name = te.case
+		WHERE te.status = 'Approved'
+			AND te.is_billable = 1
+			AND te.billed = 0
+			AND te.docstatus != 2
+	""")
+
+
+def get_wip_totals(client=None, case=None, group_by="case"):
+	"""Unbilled hours, value and aging buckets grouped by client or case"""
+	group_field = "client" if group_by == "client" else "case"
+	conditions = []
+	values = {}
+
+	if client:
+		conditions.append("client = %(client)s")
+		values["client"] = client
+	if case:
+		conditions.append("`case` = %(case)s")
+		values["case"] = case
+
+	where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+	return frappe.db.sql(f"""
+		SELECT
+			`{group_field}` as `{group_field}`,
+			COUNT(*) as entries,
+			SUM(hours) as hours,
+			SUM(amount) as amount,
+			SUM(CASE WHEN DATEDIFF(CURDATE(), date) <= 30 THEN amount ELSE 0 END) as age_0_30,
+			SUM(CASE WHEN DATEDIFF(CURDATE(), date) BETWEEN 31 AND 60 THEN amount ELSE 0 END) as age_31_60,
+			SUM(CASE WHEN DATEDIFF(CURDATE(), date) BETWEEN 61 AND 90 THEN amount ELSE 0 END) as age_61_90,
+			SUM(CASE WHEN DATEDIFF(CURDATE(), date) > 90 THEN amount ELSE 0 END) as age_90_plus,
+			MIN(date) as oldest_date
+		FROM `tabWIP Ledger Entry`
+		{where}
+		GROUP BY `{group_field}`
+		ORDER BY amount DESC
+	""", values, as_dict=True)
+
+
+def get_wip_page(client, after=None, page_length=50):
+	"""Page through a client's WIP by (date, name), newest first
+
+	`after` is the (date, name) of the last row of the previous page.
+	"""
+	values = {"client": client, "page_length": page_length}
+	cursor_condition = ""
+
+	if after:
+		cursor_condition = "AND (date < %(after_date)s OR (date = %(after_date)s AND name < %(after_name)s))"
+		values["after_date"] = after[0]
+		values["after_name"] = after[1]
+
+	return frappe.db.sql(f"""
+		SELECT
+			name, time_entry, `case`, case_title, employee, employee_name,
+			date, hours, billing_rate, amount
+		FROM `tabWIP Ledger Entry`
+		WHERE client = %(client)s
+			{cursor_condition}
+		ORDER BY date DESC, name DESC
+		LIMIT %(page_length)s
+	""", values, as_dict=True)
@@ -2,8 +2,12 @@
 # Copyright (c) 2024, Sheria Legal Technologies
 # For license information, please see license.txt
 
+import json
+
 import frappe
 from frappe import _
+from frappe.model.document import Document
+from frappe.utils import get_url_to_form, now
 
 def get_notification_config():
 	"""Get notification configuration for Sheria app"""
@@ -29,7 +33,8 @@ def get_notification_config():
 					"send_to_all_assigned": 1,
 					"subject": _("Case Deadline Approaching: {0}"),
 					"message": _("Case deadline is approaching: {0}"),
-					"attach_print": 0
+					"attach_print": 0,
+					"digest": 1
 				},
 				"case_closed": {
 					"doc_type": "Legal Case",
@@ -102,7 +107,8 @@ def get_notification_config():
 					"message": _("Service request is overdue for response"),
 					"doctype": "Service Request",
 					"event": "overdue",
-					"send_to": ["Legal Admin", "Client Services"]
+					"send_to": ["Legal Admin", "Client Services"],
+					"digest": 1
 				}
 			}
 		},
@@ -122,51 +128,69 @@ def get_notification_config():
 		}
 	}
 
+ROLE_EMAILS_CACHE_KEY = "sheria_role_emails"
+DIGEST_QUEUE_CACHE_KEY = "sheria_notification_digest"
+
+# Compiled rule maps per language, since subjects and messages are translated
+_notification_rules = {}
+
+def get_notification_rules():
+	"""Flat notification name -> rule map compiled once from get_notification_config"""
+	lang = frappe.local.lang
+	if lang not in _notification_rules:
+		rules = {}
+		for section in ("for_user", "for_module", "for_doctype"):
+			groups = get_notification_config().get(section, {})
+			if section == "for_user":
+				groups = {"": groups}
+
+			# for_doctype is applied last so it wins name clashes, as in the old nested lookup
+			for group in groups.values():
+				rules.update(group)
+
+		_notification_rules[lang] = rules
+
+	return _notification_rules[lang]
+
 def get_notification_info(notification_name, doc, context=None):
 	"""Get notification information for a specific notification"""
-	config = get_notification_config()
-
-	# Find notification in config
-	for module, module_config in config.get("for_doctype", {}).items():
-		if notification_name in module_config:
-			notification = module_config[notification_name]
-			break
-	else:
-		for module, module_config in config.get("for_module", {}).items():
-			if notification_name in module_config:
-				notification = module_config[notification_name]
-				break
-		else:
-			for user_type, user_config in config.get("for_user", {}).items():
-				if notification_name in user_config:
-					notification = user_config[notification_name]
-					break
-			else:
-				return None
+	notification = get_notification_rules().get(notification_name)
+	if not notification:
+		return None
 
 	# Get recipients
 	recipients = get_notification_recipients(notification, doc)
 
 	# Get subject and message
-	subject = notification.get("subject", "").format(doc.get_title() if hasattr(doc, 'get_title') else str(doc.name))
-	message = notification.get("message", "").format(doc.get_title() if hasattr(doc, 'get_title') else str(doc.name))
+	title = get_doc_title(doc)
+	subject = notification.get("subject", "").format(title)
+	message = notification.get("message", "").format(title)
 
 	return {
 		"recipients": recipients,
 		"subject": subject,
 		"message": message,
-		"attach_print": notification.get("attach_print", 0)
+		"attach_print": notification.get("attach_print", 0),
+		"digest": notification.get("digest", 0)
 	}
 
+def get_doc_title(doc):
+	"""Title of a document, or of a row selected with a `title` column"""
+	if isinstance(doc, Document):
+		return doc.get_title()
+
+	return doc.get("title") or str(doc.name)
+
 def get_notification_recipients(notification, doc):
-	"""Get recipients for a notification"""
+	"""Get recipients for a notification
+
+	Assigned users resolve in one query; role members come from the cached
+	role index.
+	"""
 	recipients = []
 
 	# Get recipients based on notification type
-	if notification.get("send_to_all_assigned"):
-		recipients.extend(get_assigned_users(doc))
-
-	if notification.get("send_to_assigned"):
+	if notification.get("send_to_all_assigned") or notification.get("send_to_assigned"):
 		recipients.extend(get_assigned_users(doc))
 
 	if notification.get("send_to_client"):
@@ -175,8 +199,8 @@ def get_notification_recipients(notification, doc):
 			recipients.append(client_email)
 
 	if notification.get("send_to"):
-		for role in notification["send_to"]:
-			recipients.extend(get_users_by_role(role))
+		for emails in get_role_emails(notification["send_to"]).values():
+			recipients.extend(emails)
 
 	# Remove duplicates
 	recipients = list(set(recipients))
@@ -188,25 +212,28 @@ def get_assigned_users(doc):
 	users = []
 
 	# Check for assigned_to field
-	if hasattr(doc, 'assigned_to') and doc.assigned_to:
-		user_email = frappe.db.get_value("User", doc.assigned_to, "email")
-		if user_email:
-			users.append(user_email)
+	if doc.get("assigned_to"):
+		users.append(doc.assigned_to)
+
+	# Check for _assign field
+	if doc.get("_assign"):
+		assigned = doc._assign
+		users.extend(frappe.parse_json(assigned) if isinstance(assigned, str) else assigned)
+
+	emails = []
+	if users:
+		emails = frappe.get_all("User",
+			filters={"name": ["in", list(set(users))], "email": ["is", "set"]},
+			pluck="email"
+		)
 
 	# Check for assigned_lawyer field (Legal Case specific)
-	if hasattr(doc, 'assigned_lawyer') and doc.assigned_lawyer:
+	if doc.get("assigned_lawyer"):
 		lawyer_email = frappe.db.get_value("Lawyer", doc.assigned_lawyer, "email")
 		if lawyer_email:
-			users.append(lawyer_email)
+			emails.append(lawyer_email)
 
-	# Check for _assign field
-	if hasattr(doc, '_assign'):
-		for user in doc._assign:
-			user_email = frappe.db.get_value("User", user, "email")
-			if user_email:
-				users.append(user_email)
-
-	return users
+	return emails
 
 def get_client_email(doc):
 	"""Get client email from document"""
@@ -222,27 +249,65 @@ def get_client_email(doc):
 
 	return None
 
+def get_role_emails(roles):
+	"""Return {role: [emails]} for enabled users, cached per role
+
+	Roles missing from the cache are loaded together in one query.
+	"""
+	cache = frappe.cache()
+	role_emails = {}
+	missing = []
+
+	for role in set(roles):
+		emails = cache.hget(ROLE_EMAILS_CACHE_KEY, role)
+		if emails is None:
+			missing.append(role)
+		else:
+			role_emails[role] = emails
+
+	if missing:
+		loaded = {role: [] for role in missing}
+		for row in frappe.db.sql("""
+			SELECT DISTINCT hr.role, u.email
+			FROM `tabUser` u
+			JOIN `tabHas Role` hr ON hr.parent = u.name AND hr.parenttype = 'User'
+			WHERE hr.role IN %(roles)s
+				AND u.enabled = 1
+				AND u.email IS NOT NULL
+		""", {"roles": tuple(missing)}, as_dict=True):
+			loaded[row.role].append(row.email)
+
+		for role, emails in loaded.items():
+			cache.hset(ROLE_EMAILS_CACHE_KEY, role, emails)
+			role_emails[role] = emails
+
+	return role_emails
+
 def get_users_by_role(role):
 	"""Get users by role"""
-	users = frappe.db.sql("""
-		SELECT DISTINCT u.email
-		FROM `tabUser` u
-		JOIN `tabHas Role` hr ON hr.parent = u.name
-		WHERE hr.role = %s
-			AND u.enabled = 1
-			AND u.email IS NOT NULL
-	""", (role,), as_dict=True)
+	return get_role_emails([role])[role]
 
-	return [user.email for user in users]
+def clear_role_emails_cache(doc=None, method=None):
+	"""Invalidate the role index when users or their roles change"""
+	frappe.cache().delete_value(ROLE_EMAILS_CACHE_KEY)
 
 def send_notification(notification_name, doc, context=None):
-	"""Send a notification"""
+	"""Send a notification
+
+	`doc` may be a document or a row with doctype, name and the fields the
+	notification reads. Digest notifications are queued and sent in the next
+	digest run instead.
+	"""
 	try:
 		notification_info = get_notification_info(notification_name, doc, context)
 
 		if not notification_info:
 			return
 
+		if notification_info["digest"]:
+			queue_digest(notification_name, doc, notification_info)
+			return
+
 		# Send email notification
 		if notification_info["recipients"]:
 			frappe.sendmail(
@@ -262,21 +327,115 @@ def send_notification(notification_name, doc, context=None):
 
 def log_notification(notification_name, doc, notification_info):
 	"""Log notification for tracking"""
+	log_notifications([{
+		"recipient": recipient,
+		"subject": notification_info["subject"],
+		"message": notification_info["message"],
+		"document_type": doc.doctype,
+		"document_name": doc.name
+	} for recipient in notification_info["recipients"]])
+
+def log_notifications(entries):
+	"""Write Notification Log rows for sent notifications in one insert
+
+	Each entry has recipient, subject, message, document_type and
+	document_name; recipients without a user account are not logged.
+	"""
 	try:
-		log = frappe.get_doc({
-			"doctype": "Notification Log",
-			"notification_name": notification_name,
-			"document_type": doc.doctype,
-			"document_name": doc.name,
-			"recipients": ", ".join(notification_info["recipients"]),
-			"subject": notification_info["subject"],
-			"sent_at": frappe.utils.now()
-		})
-		log.insert(ignore_permissions=True)
+		emails = list({entry["recipient"] for entry in entries})
+		if not emails:
+			return
+
+		users = dict(frappe.get_all("User",
+			filters={"email": ["in", emails]},
+			fields=["email", "name"],
+			as_list=True
+		))
+
+		timestamp = now()
+		sender = frappe.session.user
+		fields = ["name", "subject", "email_content", "for_user", "type", "document_type", "document_name",
+			"from_user", "read", "creation", "modified", "owner", "modified_by"]
+		values = [
+			(frappe.generate_hash(length=10), entry["subject"], entry["message"], users[entry["recipient"]],
+				"Alert", entry["document_type"], entry["document_name"], sender, 0,
+				timestamp, timestamp, sender, sender)
+			for entry in entries if entry["recipient"] in users
+		]
+
+		if values:
+			frappe.db.bulk_insert("Notification Log", fields, values)
 
 	except Exception as e:
 		frappe.log_error(f"Error logging notification: {str(e)}")
 
+def queue_digest(notification_name, doc, notification_info):
+	"""Hold a notification for the recipients' next digest email
+
+	Queued after commit, so a rolled back transaction queues nothing.
+	"""
+	if not notification_info["recipients"]:
+		return
+
+	item = json.dumps({
+		"notification_name": notification_name,
+		"document_type": doc.doctype,
+		"document_name": doc.name,
+		"recipients": notification_info["recipients"],
+		"subject": notification_info["subject"],
+		"message": notification_info["message"]
+	}, default=str)
+
+	frappe.db.after_commit.add(lambda: frappe.cache().rpush(DIGEST_QUEUE_CACHE_KEY, item))
+
+def send_notification_digests():
+	"""Send each recipient one email with everything queued since the last run
+
+	A notification queued several times for the same document in one window
+	appears once, with its latest subject and message.
+	"""
+	cache = frappe.cache()
+	items = cache.lrange(DIGEST_QUEUE_CACHE_KEY, 0, -1)
+	if not items:
+		return
+
+	# Drop only what was read; anything queued meanwhile waits for the next run
+	cache.ltrim(DIGEST_QUEUE_CACHE_KEY, len(items), -1)
+
+	digests = {}
+	for item in items:
+		item = json.loads(item)
+		key = (item["notification_name"], item["document_type"], item["document_name"])
+		for recipient in item["recipients"]:
+			digests.setdefault(recipient, {})[key] = item
+
+	sent = []
+	for recipient, entries in digests.items():
+		entries = list(entries.values())
+		try:
+			frappe.sendmail(
+				recipients=[recipient],
+				subject=entries[0]["subject"] if len(entries) == 1 else _("{0} notifications").format(len(entries)),
+				message=get_digest_message(entries)
+			)
+			sent.extend(dict(entry, recipient=recipient) for entry in entries)
+		except Exception as e:
+			frappe.log_error(f"Error sending notification digest to {recipient}: {str(e)}")
+
+	log_notifications(sent)
+
+def get_digest_message(entries):
+	rows = "".join(
+		'<li><a href="{0}">{1}</a><br>{2}</li>'.format(
+			get_url_to_form(entry["document_type"], entry["document_name"]),
+			frappe.utils.escape_html(entry["subject"]),
+			entry["message"]
+		)
+		for entry in entries
+	)
+
+	return f"<ul>{rows}</ul>"
+
 # Custom notification triggers
 
 def case_assigned_notification(doc, method):
@@ -294,7 +453,7 @@ def case_deadline_notification():
 	try:
 		# Get cases with deadlines approaching
 		cases = frappe.db.sql("""
-			SELECT name
+			SELECT name, case_details_title as title, _assign
 			FROM `tabLegal Case`
 			WHERE deadline_date IS NOT NULL
 				AND deadline_date >= CURDATE()
@@ -304,8 +463,7 @@ def case_deadline_notification():
 		""", as_dict=True)
 
 		for case in cases:
-			doc = frappe.get_doc("Legal Case", case.name)
-			send_notification("case_deadline_approaching", doc)
+			send_notification("case_deadline_approaching", frappe._dict(case, doctype="Legal Case"))
 
 	except Exception as e:
 		frappe.log_error(f"Error sending deadline notifications: {str(e)}")
@@ -330,7 +488,7 @@ def overdue_service_check():
 	try:
 		# Get overdue service requests
 		overdue_requests = frappe.db.sql("""
-			SELECT name
+			SELECT name, service_name as title, client, assigned_to, _assign
 			FROM `tabService Request`
 			WHERE status = 'Submitted'
 				AND DATE(request_date) <= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
@@ -338,8 +496,7 @@ def overdue_service_check():
 		""", as_dict=True)
 
 		for request in overdue_requests:
-			doc = frappe.get_doc("Service Request", request.name)
-			send_notification("service_request_overdue", doc)
+			send_notification("service_request_overdue", frappe._dict(request, doctype="Service Request"))
 
 	except Exception as e:
 		frappe.log_error(f"Error checking overdue services: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,167 @@
+# Sheria Generator Page Cache
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Rendered HTML cache for the Legal Service and Legal Case profile pages.
+
+Pages are served by GeneratorPage (registered as a page_renderer) at
+/legal-services/<name> and /cases/<name> with the doctypes' own profile
+templates. Guest HTML is cached per route and language together with the
+document's `modified`, so an edit makes the entry stale even before the
+on_update hook drops it. Saving Website Settings drops every entry, since the
+navbar and footer are part of each page. Guest responses carry an ETag and
+Last-Modified derived from `modified`, and conditional GETs get a 304.
+Logged-in users get pages rendered for their session, which are never
+revalidated or stored, and every response varies on the cookie.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import get_datetime
+from frappe.website.page_renderers.base_template_page import BaseTemplatePage
+from werkzeug.http import http_date, parse_date
+from werkzeug.wrappers import Response
+
+PAGE_CACHE_KEY = "sheria_generator_pages"
+
+GENERATOR_PAGES = {
+	"legal-services": {
+		"doctype": "Legal Service",
+		"condition_field": "is_active",
+		"title_field": "service_name",
+		"template": "client_services/templates/legal_service_profile.html"
+	},
+	"cases": {
+		"doctype": "Legal Case",
+		"condition_field": "published",
+		"title_field": "case_details_title",
+		"template": "legal_practice/templates/legal_case_profile.html"
+	}
+}
+
+
+class GeneratorPage(BaseTemplatePage):
+	"""Renders published Legal Service and Legal Case pages through the page cache"""
+
+	def can_render(self):
+		prefix, _, name = self.path.strip("/").partition("/")
+		config = GENERATOR_PAGES.get(prefix)
+		if not config or not name or "/" in name:
+			return False
+
+		page = frappe.db.get_value(config["doctype"],
+			{"name": name, config["condition_field"]: 1},
+			["name", "modified"],
+			as_dict=True
+		)
+		if not page:
+			return False
+
+		self.config = config
+		self.docname = page.name
+		self.modified = get_datetime(page.modified)
+		self.route = f"{prefix}/{name}"
+		self.template_path = config["template"]
+		return True
+
+	def render(self):
+		is_guest = frappe.session.user == "Guest"
+		headers = get_validators(self.route, self.modified) if is_guest else {"Cache-Control": "private, no-store"}
+		# A guest copy must never answer a request that carries a session cookie
+		headers["Vary"] = "Cookie"
+
+		if is_guest and is_not_modified(headers, self.modified):
+			return Response(status=304, headers=headers)
+
+		html = get_cached_page(self.route, self.modified) if is_guest else None
+		if html is None:
+			html = self.get_html()
+			if is_guest:
+				frappe.cache().hset(get_page_cache_key(self.route), frappe.local.lang,
+					{"modified": str(self.modified), "html": html})
+
+		return self.build_response(self.add_csrf_token(html), headers=headers)
+
+	def get_html(self):
+		self.doc = frappe.get_doc(self.config["doctype"], self.docname)
+		self.init_context()
+		self.context.doc = self.doc
+		self.context.title = self.doc.get(self.config["title_field"]) or self.doc.name
+		self.post_process_context()
+
+		return frappe.get_template(self.template_path).render(self.context)
+
+
+def get_page_cache_key(route):
+	"""Cache hash of a route's pages, one field per language"""
+	return f"{PAGE_CACHE_KEY}:{route}"
+
+
+def get_cached_page(route, modified):
+	page = frappe.cache().hget(get_page_cache_key(route), frappe.local.lang)
+	if page and page["modified"] == str(modified):
+		return page["html"]
+
+
+def get_validators(route, modified):
+	"""Validators of the guest version of a page"""
+	return {
+		"ETag": '"{0}"'.format(hashlib.md5(f"Guest:{route}:{modified}".encode()).hexdigest()),
+		"Last-Modified": http_date(modified),
+		"Cache-Control": "no-cache"
+	}
+
+
+def is_not_modified(headers, modified):
+	"""Whether the request's conditional headers match the current version"""
+	request = getattr(frappe.local, "request", None)
+	request_headers = request.headers if request else {}
+
+	if_none_match = request_headers.get("If-None-Match")
+	if if_none_match:
+		return headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]
+
+	if_modified_since = parse_date(request_headers.get("If-Modified-Since"))
+	# HTTP dates have whole-second precision
+	return bool(if_modified_since) and if_modified_since.replace(tzinfo=None) >= modified.replace(microsecond=0)
+
+
+def clear_page_cache(doc, method=None):
+	"""doc_events handler: drop the cached page of a changed service or case"""
+	for prefix, config in GENERATOR_PAGES.items():
+		if config["doctype"] == doc.doctype:
+			frappe.cache().delete_value(get_page_cache_key(f"{prefix}/{doc.name}"))
+
+
+def clear_all_page_cache(doc=None, method=None):
+	"""doc_events handler: drop every cached page after Website Settings change"""
+	frappe.cache().delete_keys(f"{PAGE_CACHE_KEY}:")
+
+
+def enqueue_page_cache_warmup():
+	frappe.enqueue(
+		"sheria_app.page_cache.warm_page_cache",
+		queue="long",
+		job_id="sheria_page_cache_warmup",
+		deduplicate=True,
+		enqueue_after_commit=True
+	)
+
+
+def warm_page_cache():
+	"""Pre-render every active service page as Guest so first visitors hit the cache"""
+	from frappe.utils import set_request
+	from frappe.website.serve import get_response_content
+
+	frappe.set_user("Guest")
+	config = GENERATOR_PAGES["legal-services"]
+
+	for name in frappe.get_all(config["doctype"], filters={config["condition_field"]: 1}, pluck="name"):
+		route = f"legal-services/{name}"
+		try:
+			set_request(method="GET", path=f"/{route}")
+			get_response_content(route)
+		except Exception as e:
+			frappe.log_error(f"Error warming page cache for {route}: {str(e)}")
@@ -0,0 +1,17 @@
+from sheria_app.legal_practice.doctype.case_activity.case_activity import (
+	on_doctype_update as index_case_activity,
+)
+from sheria_app.legal_practice.doctype.case_documents_table.case_documents_table import (
+	on_doctype_update as index_case_documents,
+)
+from sheria_app.legal_practice.doctype.case_hearing.case_hearing import (
+	on_doctype_update as index_case_hearing,
+)
+from sheria_app.legal_practice.doctype.task.task import on_doctype_update as index_task
+from sheria_app.legal_practice.doctype.time_entry.time_entry import on_doctype_update as index_time_entry
+
+
+def execute():
+	# The doctypes are unchanged, so migrate does not run their on_doctype_update
+	for add_index in (index_case_activity, index_case_documents, index_case_hearing, index_task, index_time_entry):
+		add_index()
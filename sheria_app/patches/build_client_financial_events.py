@@ -0,0 +1,10 @@
+import frappe
+
+from sheria_app.client_services.doctype.client_financial_event.client_financial_event import (
+	rebuild_financial_events,
+)
+
+
+def execute():
+	frappe.reload_doc("client_services", "doctype", "client_financial_event")
+	rebuild_financial_events()
@@ -0,0 +1,8 @@
+import frappe
+
+from sheria_app.client_services.doctype.client_identity_key.client_identity_key import rebuild_identity_index
+
+
+def execute():
+	frappe.reload_doc("client_services", "doctype", "client_identity_key")
+	rebuild_identity_index()
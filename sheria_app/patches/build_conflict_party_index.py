@@ -0,0 +1,9 @@
+import frappe
+
+from sheria_app.legal_practice.doctype.conflict_party.conflict_party import rebuild_conflict_index
+
+
+def execute():
+	frappe.reload_doc("legal_practice", "doctype", "conflict_party")
+	frappe.reload_doc("legal_practice", "doctype", "conflict_name_key")
+	rebuild_conflict_index()
@@ -0,0 +1,10 @@
+import frappe
+
+from sheria_app.client_services.doctype.trust_account_balance.trust_account_balance import (
+	rebuild_trust_balances,
+)
+
+
+def execute():
+	frappe.reload_doc("client_services", "doctype", "trust_account_balance")
+	rebuild_trust_balances()
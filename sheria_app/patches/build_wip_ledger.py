@@ -0,0 +1,8 @@
+import frappe
+
+from sheria_app.legal_practice.doctype.wip_ledger_entry.wip_ledger_entry import rebuild_wip_ledger
+
+
+def execute():
+	frappe.reload_doc("legal_practice", "doctype", "wip_ledger_entry")
+	rebuild_wip_ledger()
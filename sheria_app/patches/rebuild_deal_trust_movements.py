@@ -0,0 +1,14 @@
+import frappe
+
+from sheria_app.crm_extensions.doctype.deal_trust_movement.deal_trust_movement import rebuild_deal_trust_movements
+
+
+def execute():
+	frappe.reload_doc("crm_extensions", "doctype", "deal_trust_movement")
+	frappe.reload_doc("crm_extensions", "doctype", "legal_crm_deal")
+
+	# Deal saves used to store their child rows in the trust ledger table itself
+	if frappe.db.has_column("Trust Account Transaction", "parenttype"):
+		frappe.db.delete("Trust Account Transaction", {"parenttype": "Legal CRM Deal", "docstatus": 0})
+
+	rebuild_deal_trust_movements()
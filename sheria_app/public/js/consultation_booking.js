@@ -0,0 +1,97 @@
+// Consultation Booking Web Form
+// Copyright (c) 2024, Sheria Legal Technologies
+// For license information, please see license.txt
+
+// Offers the free slots of the chosen date and holds the chosen one while the
+// client completes the form; saving the consultation confirms the hold.
+
+const SLOT_METHOD = 'sheria_app.legal_practice.doctype.consultation_slot.consultation_slot.';
+
+frappe.ready(function() {
+	let slots = [];
+
+	const format_time = function(time) {
+		let [hours, minutes] = time.split(':').map(Number);
+		let suffix = hours < 12 ? 'AM' : 'PM';
+		hours = hours % 12 || 12;
+		return `${String(hours).padStart(2, '0')}:${String(minutes).padStart(2, '0')} ${suffix}`;
+	};
+
+	const release_hold = function() {
+		let hold_token = frappe.web_form.get_value('slot_hold_token');
+		if (hold_token) {
+			frappe.call({
+				method: SLOT_METHOD + 'release_hold',
+				args: { hold_token: hold_token }
+			});
+		}
+		frappe.web_form.set_value('slot_hold_token', '');
+		frappe.web_form.set_value('lawyer', '');
+	};
+
+	const load_slots = function() {
+		let date = frappe.web_form.get_value('preferred_date');
+		if (!date) {
+			return;
+		}
+
+		release_hold();
+		frappe.call({
+			method: SLOT_METHOD + 'get_available_slots',
+			args: {
+				from_date: date,
+				to_date: date,
+				duration: frappe.web_form.get_value('duration')
+			},
+			callback: function(r) {
+				slots = r.message || [];
+
+				// Without published working hours the form keeps its fixed times
+				if (!slots.length) {
+					return;
+				}
+
+				let times = [...new Set(slots.map(slot => format_time(slot.start)))];
+				frappe.web_form.set_df_property('preferred_time', 'options', [''].concat(times).join('\n'));
+				frappe.web_form.set_value('preferred_time', '');
+			}
+		});
+	};
+
+	const hold_slot = function(time) {
+		release_hold();
+
+		let slot = slots.find(slot => format_time(slot.start) === time);
+		if (!slot) {
+			return;
+		}
+
+		frappe.call({
+			method: SLOT_METHOD + 'hold_slot',
+			args: {
+				lawyer: slot.lawyer,
+				date: slot.date,
+				start_time: slot.start,
+				email: frappe.web_form.get_value('email'),
+				duration: frappe.web_form.get_value('duration')
+			},
+			callback: function(r) {
+				if (r.message && r.message.success) {
+					frappe.web_form.set_value('lawyer', slot.lawyer);
+					frappe.web_form.set_value('slot_hold_token', r.message.hold_token);
+				} else {
+					frappe.msgprint(r.message ? r.message.error : __('This time slot is no longer available.'));
+					load_slots();
+				}
+			}
+		});
+	};
+
+	frappe.web_form.on('preferred_date', load_slots);
+	frappe.web_form.on('duration', load_slots);
+	frappe.web_form.on('preferred_time', function(field, value) {
+		if (value && slots.length) {
+			hold_slot(value);
+		}
+	});
+});
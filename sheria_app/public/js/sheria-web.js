@@ -150,7 +150,7 @@ sheria.web.submit_service_booking = function(form) {
 
 	// Submit booking
 	frappe.call({
-		method: 'sheria.api.submit_service_booking',
+		method: 'sheria_app.api.submit_service_booking',
 		args: data,
 		callback: function(r) {
 			submitBtn.prop('disabled', false).text(originalText);
@@ -187,7 +187,7 @@ sheria.web.submit_contact_form = function(form) {
 
 	// Submit contact
 	frappe.call({
-		method: 'sheria.api.submit_contact',
+		method: 'sheria_app.api.submit_contact',
 		args: data,
 		callback: function(r) {
 			submitBtn.prop('disabled', false).text(originalText);
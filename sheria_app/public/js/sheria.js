@@ -26,6 +26,16 @@ sheria.init = function() {
 
 	// Initialize real-time notifications
 	sheria.init_notifications();
+
+	// Load bundled Legal CRM form scripts
+	sheria.load_form_scripts();
+};
+
+sheria.load_form_scripts = function() {
+	// Bundle URLs carry a content hash, so the browser cache can keep them
+	$.each(frappe.boot.sheria_form_scripts || {}, function(doctype, url) {
+		$.ajax({ url: url, dataType: 'script', cache: true });
+	});
 };
 
 sheria.init_legal_dashboard = function() {
@@ -64,6 +74,74 @@ sheria.init_notifications = function() {
 			sheria.show_notification(data);
 		});
 	}
+
+	// Apply record deltas pushed by sheria_app.realtime instead of refetching
+	frappe.realtime.on('sheria_update', function(delta) {
+		sheria.apply_update(delta);
+	});
+};
+
+// Dashboard lists kept client side so pushed deltas can be applied in place
+sheria.state = {
+	hearings: [],
+	activities: []
+};
+
+sheria.HEARINGS_LIMIT = 5;
+sheria.ACTIVITIES_LIMIT = 10;
+
+sheria.apply_update = function(delta) {
+	if (delta.doctype === 'Case Hearing') {
+		sheria.state.hearings = sheria.merge_row(sheria.state.hearings, delta, function(data) {
+			return data.status !== 'Cancelled' && data.hearing_date >= frappe.datetime.get_today();
+		});
+		sheria.state.hearings.sort(function(a, b) {
+			return (a.hearing_date + (a.hearing_time || '')).localeCompare(b.hearing_date + (b.hearing_time || ''));
+		});
+		sheria.state.hearings = sheria.state.hearings.slice(0, sheria.HEARINGS_LIMIT);
+		sheria.render_upcoming_hearings(sheria.state.hearings);
+	} else if (delta.doctype === 'Case Activity') {
+		sheria.state.activities = sheria.merge_row(sheria.state.activities, delta, function() {
+			return true;
+		}, function(data) {
+			return {
+				activity: data.activity_type,
+				description: data.description,
+				case_title: data.case_title,
+				timestamp: frappe.datetime.str_to_user(data.date)
+			};
+		}).slice(0, sheria.ACTIVITIES_LIMIT);
+		sheria.render_recent_activities(sheria.state.activities);
+	} else if (delta.doctype === 'Service Request' && $('#service-requests').length) {
+		sheria.state.service_requests = sheria.merge_row(sheria.state.service_requests || [], delta, function() {
+			return true;
+		});
+		sheria.render_service_requests(sheria.state.service_requests);
+	}
+};
+
+sheria.merge_row = function(rows, delta, keep, format) {
+	// Replace, insert (newest first) or drop the row the delta refers to
+	let others = rows.filter(function(row) {
+		return row.name !== delta.name;
+	});
+
+	if (delta.action === 'remove' || !keep(delta.data)) {
+		return others;
+	}
+
+	let row = Object.assign({ name: delta.name }, format ? format(delta.data) : delta.data);
+	let index = rows.findIndex(function(existing) {
+		return existing.name === delta.name;
+	});
+
+	if (index === -1) {
+		others.unshift(row);
+	} else {
+		others.splice(index, 0, row);
+	}
+
+	return others;
 };
 
 sheria.new_case = function() {
@@ -77,7 +155,7 @@ sheria.new_service_request = function() {
 sheria.load_case_statistics = function() {
 	// Load case statistics for dashboard
 	frappe.call({
-		method: 'sheria.api.get_case_statistics',
+		method: 'sheria_app.api.get_case_statistics',
 		callback: function(r) {
 			if (r.message) {
 				sheria.render_case_stats(r.message);
@@ -89,9 +167,10 @@ sheria.load_case_statistics = function() {
 sheria.load_upcoming_hearings = function() {
 	// Load upcoming hearings
 	frappe.call({
-		method: 'sheria.api.get_upcoming_hearings',
+		method: 'sheria_app.api.get_upcoming_hearings',
 		callback: function(r) {
 			if (r.message) {
+				sheria.state.hearings = r.message;
 				sheria.render_upcoming_hearings(r.message);
 			}
 		}
@@ -101,9 +180,10 @@ sheria.load_upcoming_hearings = function() {
 sheria.load_recent_activities = function() {
 	// Load recent case activities
 	frappe.call({
-		method: 'sheria.api.get_recent_activities',
+		method: 'sheria_app.api.get_recent_activities',
 		callback: function(r) {
 			if (r.message) {
+				sheria.state.activities = r.message;
 				sheria.render_recent_activities(r.message);
 			}
 		}
@@ -113,7 +193,7 @@ sheria.load_recent_activities = function() {
 sheria.load_client_services = function() {
 	// Load client services
 	frappe.call({
-		method: 'sheria.api.get_client_services',
+		method: 'sheria_app.api.get_client_services',
 		callback: function(r) {
 			if (r.message) {
 				sheria.render_client_services(r.message);
@@ -125,9 +205,10 @@ sheria.load_client_services = function() {
 sheria.load_service_requests = function() {
 	// Load service requests
 	frappe.call({
-		method: 'sheria.api.get_service_requests',
+		method: 'sheria_app.api.get_service_requests',
 		callback: function(r) {
 			if (r.message) {
+				sheria.state.service_requests = r.message;
 				sheria.render_service_requests(r.message);
 			}
 		}
@@ -268,7 +349,7 @@ sheria.render_service_requests = function(data) {
 sheria.request_service = function(service_name) {
 	// Request a legal service
 	frappe.call({
-		method: 'sheria.api.request_service',
+		method: 'sheria_app.api.request_service',
 		args: {
 			service: service_name
 		},
@@ -0,0 +1,251 @@
+// Client Portal Page JavaScript
+let portal_hearings = [];
+
+frappe.ready(function() {
+	setup_portal_login();
+	setup_portal_logout();
+	setup_new_message();
+	setup_portal_updates();
+});
+
+function setup_portal_updates() {
+	// Hearing changes are pushed by sheria_app.realtime; apply them without refetching
+	if (!(frappe.realtime && frappe.realtime.on)) {
+		return;
+	}
+
+	frappe.realtime.on('sheria_update', function(delta) {
+		if (delta.doctype !== 'Case Hearing') {
+			return;
+		}
+
+		portal_hearings = portal_hearings.filter(function(hearing) {
+			return hearing.name !== delta.name;
+		});
+
+		if (delta.action === 'upsert' && delta.data.status !== 'Cancelled') {
+			portal_hearings.push(Object.assign({ name: delta.name, court_name: delta.data.court }, delta.data));
+			portal_hearings.sort(function(a, b) {
+				return (a.hearing_date + (a.hearing_time || '')).localeCompare(b.hearing_date + (b.hearing_time || ''));
+			});
+		}
+
+		render_hearings(portal_hearings);
+	});
+}
+
+function setup_portal_login() {
+	const loginForm = document.getElementById('login-form');
+
+	loginForm.addEventListener('submit', function(e) {
+		e.preventDefault();
+
+		const email = document.getElementById('login_email').value;
+		const password = document.getElementById('login_password').value;
+
+		frappe.call({
+			method: 'sheria_app.api.client_portal_login',
+			args: { email: email, password: password },
+			callback: function(r) {
+				if (r.message && r.message.success) {
+					show_portal_dashboard(r.message.client_data);
+				} else {
+					show_error_message(r.message ? r.message.message : 'Login failed');
+				}
+			}
+		});
+	});
+}
+
+function setup_portal_logout() {
+	document.getElementById('logout-btn').addEventListener('click', function() {
+		document.getElementById('portal-login').style.display = 'block';
+		document.getElementById('portal-dashboard').style.display = 'none';
+		document.getElementById('login-form').reset();
+	});
+}
+
+function setup_new_message() {
+	document.getElementById('new-message-btn').addEventListener('click', function() {
+		const subject = prompt('Message Subject:');
+		if (subject) {
+			const message = prompt('Message:');
+			if (message) {
+				send_message(subject, message);
+			}
+		}
+	});
+}
+
+function show_portal_dashboard(client_data) {
+	document.getElementById('portal-login').style.display = 'none';
+	document.getElementById('portal-dashboard').style.display = 'block';
+	document.getElementById('client-name').textContent = client_data.client_name;
+
+	load_client_cases(client_data.client_id);
+	load_client_documents(client_data.client_id);
+	load_client_hearings(client_data.client_id);
+	load_client_messages(client_data.client_id);
+}
+
+function load_client_cases(client_id) {
+	frappe.call({
+		method: 'sheria_app.api.get_client_cases',
+		args: { client_id: client_id },
+		callback: function(r) {
+			if (r.message) {
+				render_cases(r.message);
+			}
+		}
+	});
+}
+
+function load_client_documents(client_id) {
+	frappe.call({
+		method: 'sheria_app.api.get_client_documents',
+		args: { client_id: client_id },
+		callback: function(r) {
+			if (r.message) {
+				render_documents(r.message);
+			}
+		}
+	});
+}
+
+function load_client_hearings(client_id) {
+	frappe.call({
+		method: 'sheria_app.api.get_client_hearings',
+		args: { client_id: client_id },
+		callback: function(r) {
+			if (r.message) {
+				portal_hearings = r.message;
+				render_hearings(r.message);
+			}
+		}
+	});
+}
+
+function load_client_messages(client_id) {
+	frappe.call({
+		method: 'sheria_app.api.get_client_messages',
+		args: { client_id: client_id },
+		callback: function(r) {
+			if (r.message) {
+				render_messages(r.message);
+			}
+		}
+	});
+}
+
+function render_cases(cases) {
+	const container = document.getElementById('cases-list');
+	container.innerHTML = '';
+
+	if (cases.length === 0) {
+		container.innerHTML = '<p>No active cases found.</p>';
+		return;
+	}
+
+	cases.forEach(case_item => {
+		const caseDiv = document.createElement('div');
+		caseDiv.className = 'case-item';
+		caseDiv.innerHTML = `
+			<h4>${case_item.case_title}</h4>
+			<p>Status: ${case_item.status}</p>
+			<p>Lawyer: ${case_item.lawyer_name}</p>
+			<small>Filed: ${case_item.filing_date}</small>
+		`;
+		container.appendChild(caseDiv);
+	});
+}
+
+function render_documents(documents) {
+	const container = document.getElementById('documents-list');
+	container.innerHTML = '';
+
+	if (documents.length === 0) {
+		container.innerHTML = '<p>No recent documents.</p>';
+		return;
+	}
+
+	documents.forEach(doc => {
+		const docDiv = document.createElement('div');
+		docDiv.className = 'document-item';
+		docDiv.innerHTML = `
+			<h4>${doc.document_name}</h4>
+			<p>Type: ${doc.document_type}</p>
+			<small>Uploaded: ${doc.upload_date}</small>
+			<a href="${doc.file_url}" target="_blank" class="btn btn-sm">Download</a>
+		`;
+		container.appendChild(docDiv);
+	});
+}
+
+function render_hearings(hearings) {
+	const container = document.getElementById('hearings-list');
+	container.innerHTML = '';
+
+	if (hearings.length === 0) {
+		container.innerHTML = '<p>No upcoming hearings.</p>';
+		return;
+	}
+
+	hearings.forEach(hearing => {
+		const hearingDiv = document.createElement('div');
+		hearingDiv.className = 'hearing-item';
+		hearingDiv.innerHTML = `
+			<h4>${hearing.case_title}</h4>
+			<p>Date: ${hearing.hearing_date} at ${hearing.hearing_time}</p>
+			<p>Court: ${hearing.court_name}</p>
+		`;
+		container.appendChild(hearingDiv);
+	});
+}
+
+function render_messages(messages) {
+	const container = document.getElementById('messages-list');
+	container.innerHTML = '';
+
+	if (messages.length === 0) {
+		container.innerHTML = '<p>No messages.</p>';
+		return;
+	}
+
+	messages.forEach(msg => {
+		const msgDiv = document.createElement('div');
+		msgDiv.className = 'message-item';
+		msgDiv.innerHTML = `
+			<h4>${msg.subject}</h4>
+			<p>${msg.message}</p>
+			<small>From: ${msg.from_user} on ${msg.sent_date}</small>
+		`;
+		container.appendChild(msgDiv);
+	});
+}
+
+function send_message(subject, message) {
+	const client_email = document.getElementById('login_email').value;
+
+	frappe.call({
+		method: 'sheria_app.api.send_client_message',
+		args: {
+			client_email: client_email,
+			subject: subject,
+			message: message
+		},
+		callback: function(r) {
+			if (r.message && r.message.success) {
+				alert('Message sent successfully!');
+				// Reload messages
+				const client_id = r.message.client_id;
+				load_client_messages(client_id);
+			} else {
+				show_error_message('Failed to send message');
+			}
+		}
+	});
+}
+
+function show_error_message(message) {
+	alert(message);
+}
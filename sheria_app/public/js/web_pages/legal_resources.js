@@ -0,0 +1,95 @@
+// Legal Resources Page JavaScript
+frappe.ready(function() {
+	load_resources();
+	setup_filters();
+	setup_search();
+	setup_load_more();
+});
+
+let current_page = 1;
+let current_category = 'all';
+let search_query = '';
+
+function load_resources() {
+	frappe.call({
+		method: 'sheria_app.api.get_legal_resources',
+		args: {
+			category: current_category,
+			search: search_query,
+			page: current_page
+		},
+		callback: function(r) {
+			if (r.message) {
+				if (current_page === 1) {
+					document.getElementById('resources-grid').innerHTML = '';
+				}
+				render_resources(r.message.resources);
+
+				const loadMoreBtn = document.getElementById('load-more-btn');
+				if (r.message.has_more) {
+					loadMoreBtn.style.display = 'block';
+				} else {
+					loadMoreBtn.style.display = 'none';
+				}
+			}
+		}
+	});
+}
+
+function render_resources(resources) {
+	const grid = document.getElementById('resources-grid');
+
+	resources.forEach(resource => {
+		const resourceCard = document.createElement('div');
+		resourceCard.className = 'resource-card';
+		resourceCard.innerHTML = `
+			<div class="resource-header">
+				<span class="resource-category">${resource.category}</span>
+				<span class="resource-date">${resource.publish_date}</span>
+			</div>
+			<h3>${resource.title}</h3>
+			<p>${resource.summary}</p>
+			<a href="/resource/${resource.name}" class="btn btn-outline">Read More</a>
+		`;
+		grid.appendChild(resourceCard);
+	});
+}
+
+function setup_filters() {
+	const tabBtns = document.querySelectorAll('.tab-btn');
+
+	tabBtns.forEach(btn => {
+		btn.addEventListener('click', function() {
+			// Remove active class from all buttons
+			tabBtns.forEach(b => b.classList.remove('active'));
+			// Add active class to clicked button
+			this.classList.add('active');
+
+			current_category = this.dataset.category;
+			current_page = 1;
+			load_resources();
+		});
+	});
+}
+
+function setup_search() {
+	const searchInput = document.getElementById('resource-search');
+	let searchTimeout;
+
+	searchInput.addEventListener('input', function() {
+		clearTimeout(searchTimeout);
+		search_query = this.value;
+
+		searchTimeout = setTimeout(() => {
+			current_page = 1;
+			load_resources();
+		}, 500);
+	});
+}
+
+function setup_load_more() {
+	document.getElementById('load-more-btn').addEventListener('click', function() {
+		current_page++;
+		load_resources();
+	});
+}
@@ -0,0 +1,35 @@
+// Legal Services Page JavaScript
+frappe.ready(function() {
+	load_services();
+});
+
+function load_services() {
+	frappe.call({
+		method: 'sheria_app.api.get_published_services',
+		callback: function(r) {
+			if (r.message) {
+				render_services(r.message);
+			}
+		}
+	});
+}
+
+function render_services(services) {
+	const grid = document.getElementById('services-grid');
+	grid.innerHTML = '';
+
+	services.forEach(service => {
+		const serviceCard = `
+			<div class="service-card">
+				<h3>${service.service_name}</h3>
+				<p>${service.description}</p>
+				<div class="service-meta">
+					<span class="category">${service.category_name}</span>
+					<span class="price">From KES ${service.base_price}</span>
+				</div>
+				<a href="/service-request?service=${service.name}" class="btn btn-outline">Request Service</a>
+			</div>
+		`;
+		grid.innerHTML += serviceCard;
+	});
+}
@@ -0,0 +1,121 @@
+// Service Request Page JavaScript
+frappe.ready(function() {
+	load_service_types();
+	setup_form_submission();
+});
+
+function load_service_types() {
+	frappe.call({
+		method: 'sheria_app.api.get_service_types',
+		callback: function(r) {
+			if (r.message) {
+				const select = document.getElementById('service_type');
+				r.message.forEach(service => {
+					const option = document.createElement('option');
+					option.value = service.name;
+					option.textContent = service.service_name;
+					select.appendChild(option);
+				});
+			}
+		}
+	});
+}
+
+function setup_form_submission() {
+	const form = document.getElementById('service-request-form');
+
+	form.addEventListener('submit', function(e) {
+		e.preventDefault();
+
+		if (!validate_form()) {
+			return;
+		}
+
+		const formData = new FormData(form);
+
+		// Show loading state
+		const submitBtn = form.querySelector('button[type="submit"]');
+		const originalText = submitBtn.textContent;
+		submitBtn.textContent = 'Submitting...';
+		submitBtn.disabled = true;
+
+		frappe.call({
+			method: 'sheria_app.web_pages.submit_service_request',
+			args: {
+				service_type: formData.get('service_type'),
+				subject: formData.get('subject'),
+				description: formData.get('description'),
+				client_name: formData.get('client_name'),
+				email: formData.get('email'),
+				phone: formData.get('phone'),
+				priority: formData.get('priority')
+			},
+			callback: function(r) {
+				submitBtn.textContent = originalText;
+				submitBtn.disabled = false;
+
+				if (r.message && r.message.success) {
+					show_success_message('Service request submitted successfully! We will contact you soon.');
+					form.reset();
+				} else {
+					show_error_message(r.message ? r.message.message : 'Error submitting request');
+				}
+			}
+		});
+	});
+}
+
+function validate_form() {
+	const required_fields = ['service_type', 'subject', 'description', 'client_name', 'email', 'phone'];
+	let is_valid = true;
+
+	required_fields.forEach(field => {
+		const element = document.getElementById(field);
+		if (!element.value.trim()) {
+			element.classList.add('error');
+			is_valid = false;
+		} else {
+			element.classList.remove('error');
+		}
+	});
+
+	const email = document.getElementById('email');
+	const email_regex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+	if (email.value && !email_regex.test(email.value)) {
+		email.classList.add('error');
+		is_valid = false;
+	}
+
+	const terms = document.getElementById('terms');
+	if (!terms.checked) {
+		terms.closest('.checkbox-label').classList.add('error');
+		is_valid = false;
+	} else {
+		terms.closest('.checkbox-label').classList.remove('error');
+	}
+
+	return is_valid;
+}
+
+function show_success_message(message) {
+	show_message(message, 'success');
+}
+
+function show_error_message(message) {
+	show_message(message, 'error');
+}
+
+function show_message(message, type) {
+	// Remove existing messages
+	const existing = document.querySelector('.message');
+	if (existing) existing.remove();
+
+	const messageDiv = document.createElement('div');
+	messageDiv.className = `message ${type}`;
+	messageDiv.textContent = message;
+
+	const container = document.querySelector('.request-form-container');
+	container.insertBefore(messageDiv, container.firstChild);
+
+	setTimeout(() => messageDiv.remove(), 5000);
+}
@@ -0,0 +1,131 @@
+# Sheria Rate Limits
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Sliding-window submission limits for web forms and guest APIs.
+
+Every accepted submission is recorded as a timestamped member of a Redis sorted
+set per (form, email) and per (form, IP). A new submission is rejected when a
+set already holds `limit` members younger than `window` seconds, before any
+database work happens. The check and the record run as one Lua script, so
+concurrent submissions cannot both pass on the same last free place.
+
+Limits come from the `rate_limit` entry of each form in
+web_forms.get_web_forms(), and from API_RATE_LIMITS for guest endpoints that
+have no web form:
+
+	"rate_limit": {
+		"limit": 3,                         # submissions per email in the window
+		"window": 86400,                    # seconds
+		"ip_limit": 20,                     # submissions per IP in the window
+		"dedupe_fields": ["document_type"], # optional, count per email and these values
+		"message": _("...")
+	}
+"""
+
+import time
+
+import frappe
+from frappe import _
+
+RATE_LIMIT_KEY = "sheria_rate_limit"
+
+# KEYS: the scope sets; ARGV: now, window, member, then the limit of each key.
+# Returns 0 without recording when any set is full, otherwise records the member everywhere.
+CHECK_AND_ADD_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+for i, key in ipairs(KEYS) do
+	redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+	if redis.call('ZCARD', key) >= tonumber(ARGV[3 + i]) then
+		return 0
+	end
+end
+for _, key in ipairs(KEYS) do
+	redis.call('ZADD', key, now, ARGV[3])
+	redis.call('EXPIRE', key, math.ceil(window))
+end
+return 1
+"""
+
+# Guest endpoints without a web form
+API_RATE_LIMITS = {
+	"service_booking": {
+		"limit": 3,
+		"window": 86400,
+		"ip_limit": 20,
+		"email_field": "client_email"
+	},
+	"contact": {
+		"limit": 5,
+		"window": 3600,
+		"ip_limit": 30
+	},
+	"consultation_hold": {
+		"limit": 10,
+		"window": 3600,
+		"ip_limit": 30
+	}
+}
+
+# Compiled limit maps per language, since messages are translated
+_rate_limits = {}
+
+def get_rate_limits():
+	"""Form key -> limit map compiled once from the web form config"""
+	from sheria_app.web_forms import get_web_forms
+
+	lang = frappe.local.lang
+	if lang not in _rate_limits:
+		limits = dict(API_RATE_LIMITS)
+		for form_key, form in get_web_forms().items():
+			if form.get("rate_limit"):
+				limits[form_key] = form["rate_limit"]
+
+		_rate_limits[lang] = limits
+
+	return _rate_limits[lang]
+
+def check_rate_limit(form_key, data):
+	"""Throw RateLimitExceededError if a submission of `data` to `form_key` is over its limits
+
+	Records the submission when it is allowed.
+	"""
+	rule = get_rate_limits().get(form_key)
+	if not rule or frappe.flags.in_import or frappe.flags.in_migrate:
+		return
+
+	keys = get_limit_keys(form_key, rule, data)
+	if not keys:
+		return
+
+	now = time.time()
+	member = f"{now}:{frappe.generate_hash(length=8)}"
+
+	allowed = frappe.cache().eval(CHECK_AND_ADD_SCRIPT, len(keys),
+		*keys, now, rule["window"], member, *keys.values())
+
+	if not allowed:
+		frappe.throw(
+			rule.get("message") or _("Too many submissions. Please try again later."),
+			frappe.RateLimitExceededError
+		)
+
+def get_limit_keys(form_key, rule, data):
+	"""Redis key -> limit for the email and IP scopes of a submission"""
+	keys = {}
+
+	email = (data.get(rule.get("email_field", "email")) or "").strip().lower()
+	if email and rule.get("limit"):
+		scope = ":".join([email] + [str(data.get(field) or "") for field in rule.get("dedupe_fields", [])])
+		keys[make_key(form_key, "email", scope)] = rule["limit"]
+
+	ip = getattr(frappe.local, "request_ip", None)
+	if ip and rule.get("ip_limit"):
+		keys[make_key(form_key, "ip", ip)] = rule["ip_limit"]
+
+	return keys
+
+def make_key(form_key, scope_type, scope):
+	return frappe.cache().make_key(f"{RATE_LIMIT_KEY}:{form_key}:{scope_type}:{scope}")
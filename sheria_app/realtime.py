@@ -0,0 +1,105 @@
+# Sheria Realtime Updates
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Push compact change deltas for case, hearing, service request and trust
+records to the desk dashboards and client portal over socket.io.
+
+A delta carries only the fields the dashboards render. The save only builds
+it; a short-queue job enqueued after commit works out the users allowed to
+read the changed document and sends it to each of them, so per-user permission
+checks stay off the request.
+"""
+
+import frappe
+
+REALTIME_EVENT = "sheria_update"
+
+REALTIME_FIELDS = {
+	"Case Activity": ["case", "case_title", "activity_type", "description", "date", "status"],
+	"Case Hearing": ["case", "case_title", "court", "judge", "hearing_date", "hearing_time", "hearing_type",
+		"status", "outcome"],
+	"Service Request": ["service_name", "client", "status", "priority", "description", "request_date"],
+	"Trust Account Transaction": ["client", "transaction_type", "amount", "transaction_date", "balance_after"]
+}
+
+
+def publish_update(doc, method=None):
+	"""doc_events handler: publish a delta for a changed or deleted document"""
+	try:
+		frappe.enqueue(
+			"sheria_app.realtime.publish_to_subscribers",
+			queue="short",
+			enqueue_after_commit=True,
+			# The document as saved, since a deleted one cannot be reloaded for permission checks
+			doc=doc.as_dict(),
+			delta=get_delta(doc, removed=method == "on_trash" or doc.docstatus == 2)
+		)
+
+	except Exception as e:
+		frappe.log_error(f"Error publishing realtime update for {doc.doctype} {doc.name}: {str(e)}")
+
+
+def publish_to_subscribers(doc, delta):
+	"""Background job: send a delta to every user allowed to read the document"""
+	doc = frappe.get_doc(doc)
+
+	for user in get_subscribers(doc):
+		frappe.publish_realtime(REALTIME_EVENT, delta, user=user)
+
+
+def get_delta(doc, removed=False):
+	delta = {
+		"doctype": doc.doctype,
+		"name": doc.name,
+		"action": "remove" if removed else "upsert"
+	}
+
+	if not removed:
+		delta["data"] = {field: doc.get(field) for field in REALTIME_FIELDS[doc.doctype]}
+
+	return delta
+
+
+def get_subscribers(doc):
+	"""Users who may read `doc`: holders of its read roles, assignees and the client's portal users"""
+	candidates = set(get_read_role_users(doc.doctype))
+	candidates.update(frappe.parse_json(doc.get("_assign") or "[]"))
+	candidates.update(get_client_users(doc))
+	candidates.discard("Guest")
+
+	return [
+		user for user in candidates
+		if frappe.has_permission(doc.doctype, "read", doc=doc, user=user)
+	]
+
+
+def get_read_role_users(doctype):
+	roles = list({perm.role for perm in frappe.get_meta(doctype).permissions if perm.read and not perm.permlevel})
+	if not roles:
+		return []
+
+	return frappe.db.sql_list("""
+		SELECT DISTINCT hr.parent
+		FROM `tabHas Role` hr
+		JOIN `tabUser` u ON u.name = hr.parent
+		WHERE hr.parenttype = 'User'
+			AND hr.role IN %(roles)s
+			AND u.enabled = 1
+	""", {"roles": tuple(roles)})
+
+
+def get_client_users(doc):
+	"""Portal users of the customer the document belongs to"""
+	client = doc.get("client")
+	if not client and doc.get("case"):
+		client = frappe.db.get_value("Legal Case", doc.case, "case_details_client_name")
+
+	if not client or not frappe.db.table_exists("Portal User"):
+		return []
+
+	return frappe.get_all("Portal User",
+		filters={"parenttype": "Customer", "parent": client},
+		pluck="user"
+	)
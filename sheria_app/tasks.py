@@ -6,6 +6,8 @@ import frappe
 from frappe import _
 from frappe.utils import now, getdate, add_days, now_datetime
 
+from sheria_app.notifications import queue_digest
+
 def all():
 	"""Run all scheduled tasks"""
 	try:
@@ -498,12 +500,12 @@ def send_deadline_reminder(case, priority):
 			if lawyer_email:
 				recipients.append(lawyer_email)
 
-		if recipients:
-			frappe.sendmail(
-				recipients=recipients,
-				subject=subject,
-				message=message
-			)
+		# Collected into the lawyer's next digest; repeats for the case within a window collapse into one
+		queue_digest("case_deadline_reminder", frappe._dict(doctype="Legal Case", name=case.name), {
+			"recipients": recipients,
+			"subject": subject,
+			"message": message
+		})
 
 	except Exception as e:
 		frappe.log_error(f"Error sending deadline reminder: {str(e)}")
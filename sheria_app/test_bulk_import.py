@@ -0,0 +1,96 @@
+# Tests for the bulk loader
+# Run with: bench --site <site> run-tests --module sheria_app.test_bulk_import
+# Throughput: SHERIA_BENCHMARK=1 bench --site <site> run-tests --module sheria_app.test_bulk_import
+
+import os
+import unittest
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from sheria_app.bulk_import import bulk_import
+
+CASE_NUMBER_PREFIX = "_TBI"
+BENCHMARK_ROWS = 10000
+TARGET_ROWS_PER_SECOND = 10000
+
+
+class TestBulkImport(FrappeTestCase):
+    """Deferred imports write in bulk without clobbering existing documents"""
+
+    def tearDown(self):
+        names = frappe.get_all("Legal Case",
+            filters={"header_case_number": ["like", f"{CASE_NUMBER_PREFIX}%"]},
+            pluck="name"
+        )
+        if names:
+            frappe.db.delete("Legal Case", {"name": ["in", names]})
+            frappe.db.delete("Conflict Party", {"reference_doctype": "Legal Case", "reference_name": ["in", names]})
+        frappe.db.commit()
+
+    def make_rows(self, count, **values):
+        return [
+            dict(values, header_case_number=f"{CASE_NUMBER_PREFIX}{i}", header_case_year="2024",
+                case_details_title=f"Imported matter {i}")
+            for i in range(count)
+        ]
+
+    def test_partial_upsert_keeps_other_fields(self):
+        """An upsert row only changes the fields it carries"""
+        bulk_import("Legal Case", self.make_rows(2, published=1))
+
+        stats = bulk_import("Legal Case",
+            [{"header_case_number": f"{CASE_NUMBER_PREFIX}0", "case_details_title": "Renamed"}],
+            upsert_key="header_case_number"
+        )
+
+        case = frappe.db.get_value("Legal Case", {"header_case_number": f"{CASE_NUMBER_PREFIX}0"},
+            ["case_details_title", "published", "header_case_year", "docstatus"], as_dict=True)
+        self.assertEqual(stats["updated"], 1)
+        self.assertEqual(case.case_details_title, "Renamed")
+        self.assertEqual(case.published, 1)
+        self.assertEqual(str(case.header_case_year), "2024")
+        self.assertEqual(case.docstatus, 0)
+
+    def test_upsert_refuses_submitted_documents(self):
+        """A row matching a submitted document is reported, not written"""
+        bulk_import("Legal Case", self.make_rows(1))
+        frappe.db.set_value("Legal Case", {"header_case_number": f"{CASE_NUMBER_PREFIX}0"}, "docstatus", 1)
+
+        stats = bulk_import("Legal Case",
+            [{"header_case_number": f"{CASE_NUMBER_PREFIX}0", "case_details_title": "Renamed"}],
+            upsert_key="header_case_number"
+        )
+
+        title = frappe.db.get_value("Legal Case", {"header_case_number": f"{CASE_NUMBER_PREFIX}0"},
+            "case_details_title")
+        self.assertEqual(stats["updated"], 0)
+        self.assertEqual(len(stats["errors"]), 1)
+        self.assertEqual(title, "Imported matter 0")
+
+    def test_mixed_columns_do_not_write_nulls(self):
+        """Rows in one chunk with different columns keep the values they did not give"""
+        bulk_import("Legal Case", self.make_rows(2, published=1))
+
+        bulk_import("Legal Case", [
+            {"header_case_number": f"{CASE_NUMBER_PREFIX}0", "case_details_title": "First"},
+            {"header_case_number": f"{CASE_NUMBER_PREFIX}1", "published": 0}
+        ], upsert_key="header_case_number")
+
+        first, second = (
+            frappe.db.get_value("Legal Case", {"header_case_number": f"{CASE_NUMBER_PREFIX}{i}"},
+                ["case_details_title", "published"], as_dict=True)
+            for i in range(2)
+        )
+        self.assertEqual((first.case_details_title, first.published), ("First", 1))
+        self.assertEqual((second.case_details_title, second.published), ("Imported matter 1", 0))
+
+    @unittest.skipUnless(os.environ.get("SHERIA_BENCHMARK"), "set SHERIA_BENCHMARK=1 to measure throughput")
+    def test_legal_case_throughput(self):
+        """Deferred Legal Case imports reach the target rows per second"""
+        stats = bulk_import("Legal Case", self.make_rows(BENCHMARK_ROWS))
+
+        print(f"\nLegal Case import: {stats['inserted']} rows in {stats['seconds']}s "
+            f"({stats['rows_per_second']} rows/s)")
+        self.assertEqual(stats["inserted"], BENCHMARK_ROWS)
+        self.assertGreaterEqual(stats["rows_per_second"], TARGET_ROWS_PER_SECOND)
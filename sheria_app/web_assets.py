@@ -0,0 +1,150 @@
+# Sheria Web Page Assets
+# Copyright (c) 2024, Sheria Legal Technologies
+# For license information, please see license.txt
+
+"""
+Static bundles for the JavaScript and CSS of the default web pages.
+
+Sources live in public/js/web_pages and public/css/web_pages.
+build_web_page_assets writes content-hashed copies under public/dist/web_pages
+(CSS minified, JavaScript as written) and records their URLs in a manifest.
+When a default page is rendered, update_website_context adds its bundles to
+the page's web_include_js/web_include_css, and the Web Page's own
+javascript/css fields are left empty. /assets is served with long-lived cache
+headers, and the hash in each file name changes with its content, so browsers
+keep a bundle until it is rebuilt.
+
+Until the bundles are built, or with `sheria_inline_web_assets` set in
+site_config.json, pages keep their code inline in the javascript/css fields.
+
+Build: bench --site <site> execute sheria_app.web_assets.build_web_page_assets
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import frappe
+
+WEB_PAGE_ASSETS = {
+	"legal-services": "legal_services",
+	"service-request": "service_request",
+	"client-portal": "client_portal",
+	"legal-resources": "legal_resources"
+}
+
+ASSET_KINDS = ("js", "css")
+DIST_PATH = ("public", "dist", "web_pages")
+ASSET_URL = "/assets/sheria_app/dist/web_pages"
+
+# Manifest read by each web worker, with the file's mtime when it was read
+_manifest = {}
+
+
+def read_web_page_asset(page, kind):
+	"""Source JavaScript or CSS of a web page"""
+	with open(frappe.get_app_path("sheria_app", "public", kind, "web_pages", f"{page}.{kind}")) as f:
+		return f.read()
+
+
+def minify_css(source):
+	source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+	source = re.sub(r"\s+", " ", source)
+	source = re.sub(r"\s*([{};,>])\s*", r"\1", source)
+	source = re.sub(r":\s+", ":", source)
+	return source.replace(";}", "}").strip()
+
+
+def build_web_page_assets():
+	"""Write the hashed bundles and the manifest, then empty the inline code of the Web Pages"""
+	dist = frappe.get_app_path("sheria_app", *DIST_PATH)
+	os.makedirs(dist, exist_ok=True)
+
+	manifest = {}
+	for page in WEB_PAGE_ASSETS.values():
+		for kind in ASSET_KINDS:
+			source = read_web_page_asset(page, kind)
+			# A line-based pass cannot tell comments from template literal text, so JS is kept as written
+			content = minify_css(source) if kind == "css" else source
+			digest = hashlib.md5(content.encode()).hexdigest()[:10]
+			filename = f"{page}.{digest}.min.{kind}"
+
+			# Drop bundles from earlier builds of this asset
+			for existing in os.listdir(dist):
+				if existing.startswith(f"{page}.") and existing.endswith(f".min.{kind}") and existing != filename:
+					os.remove(os.path.join(dist, existing))
+
+			with open(os.path.join(dist, filename), "w") as f:
+				f.write(content)
+
+			manifest[f"{page}.{kind}"] = f"{ASSET_URL}/{filename}"
+
+	with open(os.path.join(dist, "manifest.json"), "w") as f:
+		json.dump(manifest, f, indent=1)
+
+	sync_web_page_assets()
+
+
+def get_asset_manifest():
+	path = frappe.get_app_path("sheria_app", *DIST_PATH, "manifest.json")
+	if not os.path.exists(path):
+		return {}
+
+	mtime = os.path.getmtime(path)
+	if _manifest.get("mtime") != mtime:
+		with open(path) as f:
+			_manifest.update({"mtime": mtime, "assets": json.load(f)})
+
+	return _manifest["assets"]
+
+
+def get_bundle_urls(page_key, manifest=None):
+	"""(js_url, css_url) of a default page, or None while it is served inline"""
+	page = WEB_PAGE_ASSETS[page_key]
+	manifest = get_asset_manifest() if manifest is None else manifest
+	js_url = manifest.get(f"{page}.js")
+	css_url = manifest.get(f"{page}.css")
+
+	if frappe.conf.get("sheria_inline_web_assets") or not (js_url and css_url):
+		return None
+
+	return js_url, css_url
+
+
+def get_page_assets(page_key, manifest=None):
+	"""Web Page javascript/css field values: empty when the page's bundles are built, the source otherwise"""
+	if get_bundle_urls(page_key, manifest):
+		return {"javascript": "", "css": ""}
+
+	page = WEB_PAGE_ASSETS[page_key]
+	return {
+		"javascript": read_web_page_asset(page, "js"),
+		"css": read_web_page_asset(page, "css")
+	}
+
+
+def update_website_context(context):
+	"""Website context hook: include the bundles of a default page being rendered"""
+	page_key = (context.get("route") or context.get("path") or "").strip("/")
+	if page_key not in WEB_PAGE_ASSETS:
+		return
+
+	urls = get_bundle_urls(page_key)
+	if not urls:
+		return
+
+	js_url, css_url = urls
+	return {
+		"web_include_js": list(context.get("web_include_js") or []) + [js_url],
+		"web_include_css": list(context.get("web_include_css") or []) + [css_url]
+	}
+
+
+def sync_web_page_assets():
+	"""Switch existing default Web Pages between bundled and inline assets"""
+	manifest = get_asset_manifest()
+
+	for page_key in WEB_PAGE_ASSETS:
+		if frappe.db.exists("Web Page", page_key):
+			frappe.db.set_value("Web Page", page_key, get_page_assets(page_key, manifest))
@@ -5,6 +5,13 @@
 import frappe
 from frappe import _
 
+from sheria_app.client_services.doctype.client_identity_key.client_identity_key import find_client_by_identity
+from sheria_app.legal_practice.doctype.consultation_slot.consultation_slot import (
+	book_consultation_slot,
+	get_consultation_calendars,
+)
+from sheria_app.rate_limit import check_rate_limit
+
 def get_web_forms():
 	"""Get web form configurations for Sheria app"""
 	return {
@@ -19,7 +26,13 @@ def get_web_forms():
 			"allow_print": 1,
 			"web_form_fields": get_service_request_fields(),
 			"success_message": _("Your service request has been submitted successfully. We will contact you within 24 hours."),
-			"success_url": "/service-request-submitted"
+			"success_url": "/service-request-submitted",
+			"rate_limit": {
+				"limit": 3,
+				"window": 86400,
+				"ip_limit": 20,
+				"message": _("You have reached the maximum number of service requests allowed per day. Please try again tomorrow.")
+			}
 		},
 		"consultation_booking": {
 			"name": "Consultation Booking",
@@ -58,7 +71,13 @@ def get_web_forms():
 			"allow_print": 0,
 			"web_form_fields": get_client_feedback_fields(),
 			"success_message": _("Thank you for your feedback. Your input helps us improve our services."),
-			"success_url": "/feedback-submitted"
+			"success_url": "/feedback-submitted",
+			"rate_limit": {
+				"limit": 5,
+				"window": 86400,
+				"ip_limit": 30,
+				"message": _("You have submitted too many feedback forms today. Please try again tomorrow.")
+			}
 		},
 		"document_request": {
 			"name": "Document Request",
@@ -71,7 +90,14 @@ def get_web_forms():
 			"allow_print": 0,
 			"web_form_fields": get_document_request_fields(),
 			"success_message": _("Your document request has been submitted. We will process it and contact you soon."),
-			"success_url": "/document-request-submitted"
+			"success_url": "/document-request-submitted",
+			"rate_limit": {
+				"limit": 1,
+				"window": 7 * 86400,
+				"ip_limit": 20,
+				"dedupe_fields": ["document_type"],
+				"message": _("You have already requested this type of document recently. Please check your email or contact us if you haven't received it.")
+			}
 		}
 	}
 
@@ -208,6 +234,19 @@ def get_consultation_booking_fields():
 			"label": _("Consultation Mode"),
 			"reqd": 1,
 			"options": "In-Person\nVideo Call\nPhone Call"
+		},
+		{
+			"fieldname": "lawyer",
+			"fieldtype": "Link",
+			"label": _("Lawyer"),
+			"options": "Lawyer",
+			"hidden": 1
+		},
+		{
+			"fieldname": "slot_hold_token",
+			"fieldtype": "Data",
+			"label": _("Slot Hold Token"),
+			"hidden": 1
 		}
 	]
 
@@ -467,17 +506,9 @@ def create_default_web_forms():
 
 def validate_service_request(doc, method):
 	"""Validate service request web form submission"""
-	# Check for duplicate requests from same email in last 24 hours
-	recent_requests = frappe.db.sql("""
-		SELECT COUNT(*) as count
-		FROM `tabService Request`
-		WHERE email = %s
-			AND creation >= DATE_SUB(NOW(), INTERVAL 1 DAY)
-			AND docstatus = 0
-	""", (doc.email,), as_dict=True)
-
-	if recent_requests and recent_requests[0].count >= 3:
-		frappe.throw(_("You have reached the maximum number of service requests allowed per day. Please try again tomorrow."))
+	# Per-email and per-IP daily limits, see the form's rate_limit config
+	if is_guest_submission(doc) and not doc.flags.rate_limit_checked:
+		check_rate_limit("service_request", doc)
 
 def validate_consultation_booking(doc, method):
 	"""Validate consultation booking web form submission"""
@@ -485,22 +516,37 @@ def validate_consultation_booking(doc, method):
 	if doc.preferred_date and doc.preferred_date < frappe.utils.today():
 		frappe.throw(_("Preferred date cannot be in the past. Please select a future date."))
 
-	# Check for booking conflicts (basic validation)
-	existing_bookings = frappe.db.sql("""
-		SELECT COUNT(*) as count
-		FROM `tabConsultation`
-		WHERE preferred_date = %s
-			AND preferred_time = %s
-			AND docstatus = 0
-	""", (doc.preferred_date, doc.preferred_time), as_dict=True)
-
-	if existing_bookings and existing_bookings[0].count > 0:
+	if not doc.is_new():
+		return
+
+	# Until lawyers publish working hours, only exact time clashes can be detected
+	if not get_consultation_calendars():
+		existing_bookings = frappe.db.sql("""
+			SELECT COUNT(*) as count
+			FROM `tabConsultation`
+			WHERE preferred_date = %s
+				AND preferred_time = %s
+				AND docstatus < 2
+		""", (doc.preferred_date, doc.preferred_time), as_dict=True)
+
+		if existing_bookings and existing_bookings[0].count > 0:
+			frappe.throw(_("This time slot is already booked. Please select a different time."))
+		return
+
+	# Reserve the slot in the consultation slot inventory
+	lawyer = book_consultation_slot(doc)
+	if not lawyer:
 		frappe.throw(_("This time slot is already booked. Please select a different time."))
 
+	if doc.meta.has_field("lawyer") and not doc.get("lawyer"):
+		doc.lawyer = lawyer
+
 def validate_client_registration(doc, method):
 	"""Validate client registration web form submission"""
-	# Check if email already exists
-	existing_client = frappe.db.exists("Client", {"email": doc.email})
+	# Check if email already exists, ignoring case and whitespace variants
+	existing_client = find_client_by_identity({"Email": doc.email})
+	if existing_client == doc.name:
+		existing_client = None
 	if existing_client:
 		frappe.throw(_("A client with this email address already exists. Please use a different email or contact us for assistance."))
 
@@ -513,29 +559,18 @@ def validate_client_registration(doc, method):
 def validate_client_feedback(doc, method):
 	"""Validate client feedback web form submission"""
 	# Check for excessive feedback submissions
-	recent_feedback = frappe.db.sql("""
-		SELECT COUNT(*) as count
-		FROM `tabClient Feedback`
-		WHERE email = %s
-			AND creation >= DATE_SUB(NOW(), INTERVAL 1 DAY)
-	""", (doc.email,), as_dict=True)
-
-	if recent_feedback and recent_feedback[0].count >= 5:
-		frappe.throw(_("You have submitted too many feedback forms today. Please try again tomorrow."))
+	if is_guest_submission(doc):
+		check_rate_limit("client_feedback", doc)
 
 def validate_document_request(doc, method):
 	"""Validate document request web form submission"""
 	# Check for duplicate document requests
-	recent_requests = frappe.db.sql("""
-		SELECT COUNT(*) as count
-		FROM `tabDocument Request`
-		WHERE email = %s
-			AND document_type = %s
-			AND creation >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-	""", (doc.email, doc.document_type), as_dict=True)
-
-	if recent_requests and recent_requests[0].count > 0:
-		frappe.throw(_("You have already requested this type of document recently. Please check your email or contact us if you haven't received it."))
+	if is_guest_submission(doc):
+		check_rate_limit("document_request", doc)
+
+def is_guest_submission(doc):
+	"""Only new public web form submissions are rate limited, desk users are not"""
+	return doc.is_new() and frappe.session.user == "Guest"
 
 # Web form success actions
 